@@ -0,0 +1,67 @@
+"""
+Benchmark of adaptive Runge_Kutta_Fehlberg rollouts of a batch of linear systems with spread out time scales.
+
+Compares fixed steps of size h, fixed steps small enough for the stiffest batch element, and adaptive substeps
+with per batch element error control, for a training step (forward and backward).
+
+    python benchmarks/adaptive_rkf.py --stiffness 1 10 100
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dynamics import integrators
+
+
+class Decay(torch.nn.Module):
+    in_features = out_features = 1
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = torch.nn.Parameter(rates)
+
+    def forward(self, x):
+        return -self.rates * x
+
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stiffness', type=float, nargs='+', default=[1., 10., 100.])
+    parser.add_argument('--batch', type=int, default=256)
+    parser.add_argument('--nsteps', type=int, default=20)
+    parser.add_argument('--h', type=float, default=0.1)
+    parser.add_argument('--rtol', type=float, default=1e-5)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    print(f'{"stiffness":>10} {"method":>10} {"time [s]":>10} {"max err":>10}')
+    for stiffness in args.stiffness:
+        # rates spread log-uniformly over [1, stiffness], only a few batch elements are stiff
+        rates = stiffness ** torch.rand(args.batch, 1) ** 4
+        x0 = torch.ones(args.batch, 1)
+        exact = torch.exp(-rates[:, None] * args.h * torch.arange(1, args.nsteps + 1)[None, :, None])
+        nfine = int(max(1, stiffness * args.h / 0.5))
+        models = {
+            'fixed': (integrators.Runge_Kutta_Fehlberg(Decay(rates), h=args.h), 1),
+            'fine': (integrators.Runge_Kutta_Fehlberg(Decay(rates), h=args.h / nfine), nfine),
+            'adaptive': (integrators.Runge_Kutta_Fehlberg(Decay(rates), h=args.h, adaptive=True,
+                                                          rtol=args.rtol, atol=1e-8), 1),
+        }
+        for name, (model, substeps) in models.items():
+            def run():
+                X = model.rollout(x0, nsteps=args.nsteps * substeps)[:, substeps - 1::substeps]
+                X.sum().backward()
+                return X
+            err = (run() - exact).abs().max().item()
+            print(f'{stiffness:>10g} {name:>10} {timeit(run, args.repeats):>10.4f} {err:>10.2e}')
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of building envelope simulations.
+
+Compares the per-step loop over BuildingEnvelope.equations against the vectorized simulate with a
+sequential and a parallel prefix scan of the linear dynamics, and simulate_batch over scenarios.
+Model parameter files are downloaded on first use.
+
+    python benchmarks/building_simulate.py --system HollandschHuys_full --nsim 8760 --ntraj 8
+"""
+import argparse
+import time
+
+
+from neuromancer.psl.building_envelope import systems
+
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def loop(system, x, U, D):
+    for k in range(len(U) - 1):
+        x, _ = system.equations(x, U[k], D[k])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--system', type=str, default='Reno_full', choices=list(systems))
+    parser.add_argument('--backend', type=str, default='numpy', choices=['numpy', 'torch'])
+    parser.add_argument('--nsim', type=int, default=2000)
+    parser.add_argument('--ntraj', type=int, default=8)
+    args = parser.parse_args()
+
+    system = systems[args.system](backend=args.backend, set_stats=False)
+    U, D = system.get_U(args.nsim + 1), system.get_D(args.nsim + 1)
+    x0 = system.x0
+    print(f'{"engine":>20} {"time [s]":>10}')
+    print(f'{"loop":>20} {timeit(lambda: loop(system, x0, U, D)):>10.3f}')
+    for parallel in [False, True]:
+        t = timeit(lambda: system.simulate(nsim=args.nsim, x0=x0, U=U, D=D, parallel=parallel))
+        print(f'{"scan" if not parallel else "prefix scan":>20} {t:>10.3f}')
+    core = system.B.core
+    x0s = core.stack([x0] * args.ntraj)
+    Us = core.stack([system.get_U(args.nsim + 1) for _ in range(args.ntraj)])
+    Ds = core.stack([system.get_D(args.nsim + 1) for _ in range(args.ntraj)])
+    t_loop = timeit(lambda: [loop(system, x0, Us[i], Ds[i]) for i in range(args.ntraj)])
+    print(f'{f"{args.ntraj} x loop":>20} {t_loop:>10.3f}')
+    for parallel in [False, True]:
+        t = timeit(lambda: system.simulate_batch(x0=x0s, U=Us, D=Ds, parallel=parallel))
+        print(f'{"batch " + ("prefix scan" if parallel else "scan"):>20} {t:>10.3f}')
@@ -0,0 +1,51 @@
+"""
+Benchmark of DiffEqIntegrator gradient modes for a neural ODE training step (forward and backward).
+
+Compares the per step adjoint integration used by System rollouts before Integrator.rollout, which calls
+odeint_adjoint once per step, against horizon level rollouts with a single solver call in each gradient mode.
+
+    python benchmarks/diffeq_integrator.py --method rk4 --nsteps 10 100 500
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dynamics.integrators import DiffEqIntegrator, Integrator
+from neuromancer.modules import blocks
+
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nsteps', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--method', default='rk4')
+    parser.add_argument('--batch', type=int, default=64)
+    parser.add_argument('--nx', type=int, default=4)
+    parser.add_argument('--nu', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    fx = blocks.MLP(args.nx + args.nu, args.nx, hsizes=[32, 32])
+    modes = ['adjoint', 'direct', 'checkpoint']
+    models = {mode: DiffEqIntegrator(fx, h=0.05, method=args.method, mode=mode) for mode in modes}
+
+    print(f'{"nsteps":>8} {"per step [s]":>13}' + ''.join(f' {m + " [s]":>15}' for m in modes) + f' {"max err":>10}')
+    for nsteps in args.nsteps:
+        x0, U = torch.randn(args.batch, args.nx), torch.randn(args.batch, nsteps, args.nu)
+        # per step adjoint integration through the base class rollout
+        t_step = timeit(lambda: Integrator.rollout(models['adjoint'], x0, U).sum().backward(), args.repeats)
+        times = [timeit(lambda: models[m].rollout(x0, U).sum().backward(), args.repeats) for m in modes]
+        with torch.no_grad():
+            err = max((models[m].rollout(x0, U) - Integrator.rollout(models['adjoint'], x0, U)).abs().max().item()
+                      for m in modes)
+        print(f'{nsteps:>8} {t_step:>13.4f}' + ''.join(f' {t:>15.4f}' for t in times) + f' {err:>10.2e}')
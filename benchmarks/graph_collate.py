@@ -0,0 +1,57 @@
+"""
+Micro-benchmark of GraphDataset batch collation.
+
+Compares the per-key concatenation with an edge offset loop used previously against
+GraphDataset.collate_fn, optionally with pinned memory output.
+
+    python benchmarks/graph_collate.py --batch-size 64 --nodes 500
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dataset import GraphDataset
+
+
+def loop_collate(x):
+    out = {}
+    keys = [k for k in x[0] if k not in ['edge_index', 'name', 'batch', 'num_nodes', 'num_edges']]
+    for key in keys:
+        out[key] = torch.cat([y[key] for y in x], dim=0)
+    nodes = [y['num_nodes'] for y in x]
+    out['batch'] = torch.cat([torch.full_like(y['batch'], i) for i, y in enumerate(x)])
+    offset, edges = 0, []
+    for i in range(len(x)):
+        edges.append(x[i]['edge_index'] + offset)
+        offset += nodes[i]
+    out['edge_index'] = torch.cat(edges, dim=1)
+    out['num_edges'] = out['edge_index'].size(1)
+    out['num_nodes'] = sum(nodes)
+    out['name'] = x[0]['name']
+    return out
+
+
+def timeit(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--nodes', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    positions = [torch.rand(args.nodes, 10, 2) for _ in range(args.batch_size)]
+    dataset = GraphDataset(node_attr={'pos': positions}, seq_len=9, build_graphs='pos',
+                           connectivity_radius=(10. / (args.nodes * torch.pi)) ** 0.5)
+    samples = [dataset[i] for i in range(args.batch_size)]
+    print(f'loop collate      {timeit(lambda: loop_collate(samples), args.repeats) * 1e3:8.2f} ms')
+    print(f'collate_fn        {timeit(lambda: GraphDataset.collate_fn(samples), args.repeats) * 1e3:8.2f} ms')
+    if torch.cuda.is_available():
+        t = timeit(lambda: GraphDataset.collate_fn(samples, pin_memory=True), args.repeats)
+        print(f'collate_fn pinned {t * 1e3:8.2f} ms')
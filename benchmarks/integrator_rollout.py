@@ -0,0 +1,62 @@
+"""
+Benchmark of System rollouts of a single integrator node (neural ODE system identification).
+
+Compares stepping through the node with the dictionary based rollout of System.forward against
+delegating the whole horizon to Integrator.rollout, for a training step (forward and backward) and for inference.
+
+    python benchmarks/integrator_rollout.py --nsteps 10 100 1000
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dynamics import integrators
+from neuromancer.modules import blocks
+from neuromancer.system import Node, System
+
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nsteps', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--integrator', default='RK4', choices=list(integrators.integrators))
+    parser.add_argument('--batch', type=int, default=64)
+    parser.add_argument('--nx', type=int, default=4)
+    parser.add_argument('--nu', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    fx = blocks.MLP(args.nx + args.nu, args.nx, hsizes=[32, 32])
+    model = integrators.integrators[args.integrator](fx, h=0.05)
+    stepped = System([Node(model, ['xn', 'U'], ['xn'], name='NODE')])
+    rollout = System([Node(model, ['xn', 'U'], ['xn'], name='NODE')], delegate_rollout=True)
+
+    print(f'{"nsteps":>8} {"mode":>6} {"step [s]":>10} {"rollout [s]":>12} {"speedup":>8} {"max err":>10}')
+    for nsteps in args.nsteps:
+        data = {'xn': torch.randn(args.batch, 1, args.nx), 'U': torch.randn(args.batch, nsteps, args.nu)}
+        stepped.nsteps = rollout.nsteps = nsteps
+
+        def train(system):
+            return lambda: system(data)['xn'].sum().backward()
+
+        def infer(system):
+            def run():
+                with torch.no_grad():
+                    system(data)
+            return run
+
+        with torch.no_grad():
+            err = (stepped(data)['xn'] - rollout(data)['xn']).abs().max().item()
+        for mode, bench in [('train', train), ('infer', infer)]:
+            t_step, t_rollout = timeit(bench(stepped), args.repeats), timeit(bench(rollout), args.repeats)
+            print(f'{nsteps:>8} {mode:>6} {t_step:>10.4f} {t_rollout:>12.4f} {t_step / t_rollout:>8.2f} {err:>10.2e}')
@@ -0,0 +1,93 @@
+"""
+Benchmark of non-autonomous rollouts with inputs linearly interpolated within integration steps.
+
+Compares online interpolation, which recomputes the slope of the input interval for every block evaluation
+of the integrator, against LinInterp_Horizon, which computes interval increments once for the horizon
+and the inputs of all integrator stages in a single operation.
+
+    python benchmarks/interpolated_rollout.py --integrator RK4 --nsteps 100 1000
+"""
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from neuromancer.dynamics import integrators
+from neuromancer.dynamics.interpolation import LinInterp_Horizon
+from neuromancer.modules import blocks
+
+
+class OnlineInterpolation(nn.Module):
+    """
+    Block wrapper interpolating the inputs of the current step at every evaluation
+    """
+    def __init__(self, block, h):
+        super().__init__()
+        self.block, self.h = block, h
+        self.in_features, self.out_features = block.in_features, block.out_features
+
+    def forward(self, x, tq, t, u):
+        slope = (u[:, 1] - u[:, 0]) / (t[:, 1] - t[:, 0])
+        return self.block(x, u[:, 0] + (tq - t[:, 0]) * slope)
+
+
+def online_rollout(model, x0, U, h):
+    """
+    Rollout passing the time of every stage to the online interpolation
+    """
+    t = (torch.arange(U.shape[1], dtype=U.dtype) * h)[None, :, None].expand(U.shape[0], -1, -1)
+    x, X = x0, []
+    for i in range(U.shape[1] - 1):
+        stage_inputs = [(t[:, i] + c * h, t[:, i:i + 2], U[:, i:i + 2]) for c in model.stage_offsets]
+        x = model.integrate_stages(x, stage_inputs)
+        X.append(x)
+    return torch.stack(X, dim=1)
+
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nsteps', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--integrator', default='RK4', choices=['Euler', 'Euler_Trap', 'RK2', 'RK4', 'RK4_Trap',
+                                                                'Luther', 'Runge_Kutta_Fehlberg'])
+    parser.add_argument('--batch', type=int, default=64)
+    parser.add_argument('--nx', type=int, default=4)
+    parser.add_argument('--nu', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    torch.manual_seed(0)
+    h = 0.05
+
+    fx = blocks.MLP(args.nx + args.nu, args.nx, hsizes=[32, 32])
+    cls = integrators.integrators[args.integrator]
+    online, cached = cls(OnlineInterpolation(fx, h), h=h), cls(fx, h=h)
+
+    print(f'{"nsteps":>8} {"mode":>6} {"online [s]":>11} {"horizon [s]":>12} {"speedup":>8} {"max err":>10}')
+    for nsteps in args.nsteps:
+        x0, U = torch.randn(args.batch, args.nx), torch.randn(args.batch, nsteps + 1, args.nu)
+
+        def train(run):
+            return lambda: run().sum().backward()
+
+        def infer(run):
+            def func():
+                with torch.no_grad():
+                    run()
+            return func
+
+        run_online = lambda: online_rollout(online, x0, U, h)
+        run_cached = lambda: cached.rollout(x0, LinInterp_Horizon(U, h=h), nsteps)
+        with torch.no_grad():
+            err = (run_online() - run_cached()).abs().max().item()
+        for mode, bench in [('train', train), ('infer', infer)]:
+            t_online, t_cached = timeit(bench(run_online), args.repeats), timeit(bench(run_cached), args.repeats)
+            print(f'{nsteps:>8} {mode:>6} {t_online:>11.4f} {t_cached:>12.4f} {t_online / t_cached:>8.2f} {err:>10.2e}')
@@ -0,0 +1,81 @@
+"""
+Benchmark of LinInterp_Offline queries.
+
+Compares queries of the interpolant of a single time series against the reference implementation
+for uniform sampling (index arithmetic with extrapolation fix-ups), and times batched queries of
+trajectories with irregular time bases in every interpolation mode.
+
+    python benchmarks/interpolation.py --nsteps 1000 --nqueries 1 100 1000
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dynamics.interpolation import LinInterp_Offline
+
+
+def reference_interpolation(t, u, tq):
+    """
+    Linear interpolation of a uniformly sampled time series as computed before searchsorted queries
+    """
+    dt = torch.mean(torch.diff(t, dim=0).to(torch.float64))
+    tq_ind = ((tq - t[0, 0]) / dt).flatten()
+    lower = torch.floor(tq_ind).to(torch.int64)
+    upper = torch.ceil(tq_ind).to(torch.int64)
+    ind_max = u.shape[0] - 1
+    if torch.amax(upper) > ind_max:
+        ind_extrap = torch.nonzero(upper > ind_max)
+        lower[ind_extrap] = ind_max - 1
+        upper[ind_extrap] = ind_max
+    if torch.amin(lower) < 0:
+        ind_extrap = torch.nonzero(lower < 0)
+        lower[ind_extrap] = 0
+        upper[ind_extrap] = 1
+    distance = (tq_ind - lower).unsqueeze(-1)
+    return (distance * (u[upper, :] - u[lower, :]) + u[lower, :]).float()
+
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nsteps', type=int, default=1000)
+    parser.add_argument('--nqueries', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--batch', type=int, default=64)
+    parser.add_argument('--nu', type=int, default=3)
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    t = (torch.arange(args.nsteps) * 0.125).unsqueeze(-1)
+    u = torch.randn(args.nsteps, args.nu)
+    interp = LinInterp_Offline(t, u)
+    print(f'single time series, {args.calls} calls')
+    print(f'{"nqueries":>9} {"reference [s]":>14} {"searchsorted [s]":>17} {"speedup":>8} {"max err":>10}')
+    for nq in args.nqueries:
+        tq = torch.rand(nq, 1) * args.nsteps * 0.14 - 1.
+        t_ref = timeit(lambda: [reference_interpolation(t, u, tq) for _ in range(args.calls)], args.repeats)
+        t_new = timeit(lambda: [interp(tq) for _ in range(args.calls)], args.repeats)
+        err = (reference_interpolation(t, u, tq) - interp(tq)).abs().max().item()
+        print(f'{nq:>9} {t_ref:>14.4f} {t_new:>17.4f} {t_ref / t_new:>8.2f} {err:>10.2e}')
+
+    t = torch.cumsum(torch.rand(args.batch, args.nsteps) * 0.2, dim=1)
+    u = torch.randn(args.batch, args.nsteps, args.nu)
+    print(f'\nbatch of {args.batch} irregular time bases, {args.calls} calls')
+    print(f'{"nqueries":>9} {"mode":>7} {"setup [s]":>10} {"query [s]":>10}')
+    for nq in args.nqueries:
+        tq = torch.rand(args.batch, nq) * args.nsteps * 0.1
+        for mode in ['linear', 'zoh', 'cubic']:
+            t_setup = timeit(lambda: LinInterp_Offline(t, u, mode=mode), args.repeats)
+            interp = LinInterp_Offline(t, u, mode=mode)
+            t_query = timeit(lambda: [interp(tq) for _ in range(args.calls)], args.repeats)
+            print(f'{nq:>9} {mode:>7} {t_setup:>10.4f} {t_query:>10.4f}')
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of GeneralNetworkedODE right hand side evaluations on building RC networks.
+
+Compares the pin by pin evaluation the network used previously against the compiled network,
+which makes one call per agent type and per interaction and accumulates with a single index_add.
+
+    python benchmarks/network_ode.py --rooms 100 500 --pins-per-room 4
+"""
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from neuromancer.dynamics import ode, physics
+
+
+def pin_by_pin(model, x):
+    dx = torch.cat([agent(x[:, list(agent_dict.values())]) for agent, agent_dict in zip(model.agents, model.map)], -1)
+    coupling = torch.zeros_like(x)
+    for interaction in model.couplings:
+        for pin in interaction.pins:
+            send, receive = model.map[pin[0]]['T'], model.map[pin[1]]['T']
+            contribution = interaction(x[:, [send, receive]])
+            coupling[:, [send]] += contribution
+            if interaction.symmetric:
+                coupling[:, [receive]] -= contribution
+    return (dx + coupling)[:, :model.outsize]
+
+
+def timeit(func, repeats):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rooms', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--pins-per-room', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    print(f'{"rooms":>8} {"pins":>8} {"pin by pin [ms]":>16} {"compiled [ms]":>14}')
+    for nrooms in args.rooms:
+        rooms = [physics.RCNode(C=nn.Parameter(torch.rand(1) + 1.), scaling=1e-5) for _ in range(nrooms)]
+        agents = rooms + [physics.SourceSink(), physics.SourceSink()]
+        npins = nrooms * args.pins_per_room
+        walls = torch.randint(nrooms, (npins, 2)).tolist()
+        couplings = [physics.DeltaTemp(R=nn.Parameter(torch.tensor(1.)), symmetric=True, pins=walls),
+                     physics.DeltaTemp(R=nn.Parameter(torch.tensor(1.)), pins=[[i, nrooms] for i in range(nrooms)]),
+                     physics.HVACConnection(pins=[[i, nrooms + 1] for i in range(nrooms)])]
+        model = ode.GeneralNetworkedODE(map=physics.map_from_agents(agents), agents=agents, couplings=couplings,
+                                        insize=nrooms + 2, outsize=nrooms)
+        x = torch.randn(args.batch, nrooms + 2, requires_grad=True)
+        t_loop = timeit(lambda: pin_by_pin(model, x).sum().backward(), args.repeats)
+        t_compiled = timeit(lambda: model(x).sum().backward(), args.repeats)
+        print(f'{nrooms:>8} {npins + 2 * nrooms:>8} {t_loop * 1e3:>16.1f} {t_compiled * 1e3:>14.1f}')
@@ -0,0 +1,56 @@
+"""
+Micro-benchmark of Problem.step with many small nodes.
+
+Compares the dictionary merging Problem.step against the compiled execution plans of Problem.compile_plan.
+
+    python benchmarks/problem_step.py --nnodes 10 50 100
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.constraint import variable
+from neuromancer.loss import PenaltyLoss
+from neuromancer.problem import Problem
+from neuromancer.system import Node
+
+
+def make_problem(nnodes, dim):
+    nodes = [Node(torch.nn.Linear(dim, dim), ['x'], ['z0'], name='node_0')]
+    for i in range(1, nnodes):
+        nodes.append(Node(lambda z, x: torch.tanh(z) + x, [f'z{i-1}', 'x'], [f'z{i}'], name=f'node_{i}'))
+    obj = (variable(f'z{nnodes-1}') ** 2).minimize(name='obj')
+    return Problem(nodes, PenaltyLoss([obj], []))
+
+
+def timeit(func, repeats, number):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nnodes', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--dim', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--number', type=int, default=100)
+    parser.add_argument('--backend', type=str, default=None, choices=[None, 'compile', 'trace'])
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    print(f'{"nnodes":>8} {"dict [ms]":>10} {"plan [ms]":>10} {"speedup":>8}')
+    for nnodes in args.nnodes:
+        problem = make_problem(nnodes, args.dim)
+        data = {'x': torch.randn(args.batch, args.dim), 'name': 'train'}
+        t_dict = timeit(lambda: problem(data), args.repeats, args.number)
+        problem.compile_plan(backend=args.backend)
+        problem(data)  # build the plan outside of the timed region
+        t_plan = timeit(lambda: problem(data), args.repeats, args.number)
+        print(f'{nnodes:>8} {1e3 * t_dict:>10.3f} {1e3 * t_plan:>10.3f} {t_dict / t_plan:>8.2f}')
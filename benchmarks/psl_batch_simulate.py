@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of batched PSL simulations.
+
+Compares a loop of single-trajectory simulate calls against simulate_batch, which integrates all
+trajectories in one solver call, and against simulate_batch on a process pool.
+
+    python benchmarks/psl_batch_simulate.py --system LorenzSystem --ntraj 10 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from neuromancer.psl.autonomous import systems as autosys
+from neuromancer.psl.nonautonomous import systems as nonautosys
+
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--system', type=str, default='LorenzSystem', choices=[*autosys, *nonautosys])
+    parser.add_argument('--backend', type=str, default='numpy', choices=['numpy', 'torch'])
+    parser.add_argument('--ntraj', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--nsim', type=int, default=200)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    system = {**autosys, **nonautosys}[args.system](backend=args.backend)
+    autonomous = args.system in autosys
+    print(f'{"ntraj":>8} {"loop [s]":>10} {"batch [s]":>10} {"pool [s]":>10}')
+    for ntraj in args.ntraj:
+        x0 = system.B.core.stack([system.get_x0() for _ in range(ntraj)])
+        kwargs = {'nsim': args.nsim} if autonomous else \
+            {'U': system.B.core.stack([system.get_U(args.nsim + 1) for _ in range(ntraj)])}
+        single = [{k: v if k == 'nsim' else v[i] for k, v in kwargs.items()} for i in range(ntraj)]
+        t_loop = timeit(lambda: [system.simulate(x0=x0[i], **single[i]) for i in range(ntraj)])
+        t_batch = timeit(lambda: system.simulate_batch(x0=x0, **kwargs))
+        t_pool = timeit(lambda: system.simulate_batch(x0=x0, processes=args.processes, **kwargs)) \
+            if args.backend == 'numpy' else np.nan
+        print(f'{ntraj:>8} {t_loop:>10.3f} {t_batch:>10.3f} {t_pool:>10.3f}')
@@ -0,0 +1,44 @@
+"""
+Micro-benchmark of fixed step integration of PSL systems.
+
+Compares simulate_batch with the adaptive solver of the backend against the fixed step rk4 and euler
+methods, reporting wall time and the maximum error relative to the adaptive reference.
+
+    python benchmarks/psl_fixed_step.py --system LorenzSystem VanDerPolControl --ntraj 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from neuromancer.psl.autonomous import systems as autosys
+from neuromancer.psl.nonautonomous import systems as nonautosys
+
+
+def timeit(func):
+    start = time.perf_counter()
+    out = func()
+    return time.perf_counter() - start, out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--system', type=str, nargs='+', default=['VanDerPol', 'LorenzControl'],
+                        choices=[*autosys, *nonautosys])
+    parser.add_argument('--backend', type=str, default='numpy', choices=['numpy', 'torch'])
+    parser.add_argument('--ntraj', type=int, default=100)
+    parser.add_argument('--nsim', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f'{"system":>20} {"method":>9} {"time [s]":>10} {"max error":>10}')
+    for name in args.system:
+        system = {**autosys, **nonautosys}[name](backend=args.backend)
+        x0 = system.B.core.stack([system.get_x0() for _ in range(args.ntraj)])
+        kwargs = {'nsim': args.nsim} if name in autosys else \
+            {'U': system.B.core.stack([system.get_U(args.nsim + 1) for _ in range(args.ntraj)])}
+        reference = None
+        for method in ['adaptive', 'rk4', 'euler']:
+            t, sim = timeit(lambda: system.simulate_batch(x0=x0, method=method, **kwargs))
+            X = np.asarray(sim['X'].detach() if args.backend == 'torch' else sim['X'])
+            reference = X if reference is None else reference
+            print(f'{name:>20} {method:>9} {t:>10.3f} {np.abs(X - reference).max():>10.2e}')
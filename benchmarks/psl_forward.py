@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of closed loop stepping of PSL non-autonomous systems.
+
+Compares one forward call per scenario against a single batched forward call, as used by System
+when the plant is evaluated in the loop with a learned policy.
+
+    python benchmarks/psl_forward.py --system TwoTank --batch 10 100 1000
+"""
+import argparse
+import time
+
+from neuromancer.psl.nonautonomous import systems
+
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--system', type=str, default='TwoTank', choices=list(systems))
+    parser.add_argument('--backend', type=str, default='numpy', choices=['numpy', 'torch'])
+    parser.add_argument('--batch', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--nsteps', type=int, default=10)
+    args = parser.parse_args()
+
+    system = systems[args.system](backend=args.backend)
+    core = system.B.core
+    print(f'{"batch":>8} {"method":>9} {"loop [s]":>10} {"batched [s]":>12}')
+    for nbatch in args.batch:
+        x0 = core.stack([system.get_x0() for _ in range(nbatch)])
+        U = core.stack([system.get_U(args.nsteps) for _ in range(nbatch)])
+
+        def rollout(method, batched):
+            x = x0
+            for k in range(args.nsteps):
+                x = system.forward(x, U[:, k], method=method) if batched else \
+                    system.B.cat([system.forward(x[i:i + 1], U[i:i + 1, k], method=method) for i in range(nbatch)])
+
+        for method in ['adaptive', 'rk4']:
+            t_loop = timeit(lambda: rollout(method, False))
+            t_batch = timeit(lambda: rollout(method, True))
+            print(f'{nbatch:>8} {method:>9} {t_loop:>10.3f} {t_batch:>12.3f}')
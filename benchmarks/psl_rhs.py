@@ -0,0 +1,51 @@
+"""
+Micro-benchmark of PSL non-autonomous right hand sides on the numpy backend.
+
+For every registered system compares a right hand side evaluation with the scipy interp1d control
+lookup used previously against the ZeroOrderHold lookup of EquationWrapper, and a loop of simulate
+calls against the vectorized simulate_batch.
+
+    python benchmarks/psl_rhs.py --ncalls 2000 --ntraj 32
+"""
+import argparse
+import time
+
+import numpy as np
+import scipy.interpolate
+
+from neuromancer.psl.base import EquationWrapper
+from neuromancer.psl.nonautonomous import systems
+
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--systems', type=str, nargs='+', default=list(systems), choices=list(systems))
+    parser.add_argument('--ncalls', type=int, default=2000)
+    parser.add_argument('--ntraj', type=int, default=32)
+    parser.add_argument('--nsim', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f'{"system":>24} {"interp1d [us]":>14} {"zoh [us]":>10} {"loop [s]":>10} {"batch [s]":>10}')
+    for name in args.systems:
+        system = systems[name](backend='numpy')
+        U = system.get_U(args.nsim + 1)
+        Time = np.arange(args.nsim + 1) * system.ts
+        ts = np.random.default_rng(0).uniform(0., Time[-1], args.ncalls)
+        x = system.x0
+
+        legacy = scipy.interpolate.interp1d(Time, U, kind='previous', axis=0, fill_value='extrapolate')
+        wrapper = EquationWrapper(Time, U, system.equations, system.B)
+        t_legacy = timeit(lambda: [system.equations(t, x, legacy(t)) for t in ts]) / args.ncalls * 1e6
+        t_zoh = timeit(lambda: [wrapper(t, x) for t in ts]) / args.ncalls * 1e6
+
+        x0 = np.stack([system.get_x0() for _ in range(args.ntraj)])
+        Us = np.stack([system.get_U(args.nsim + 1) for _ in range(args.ntraj)])
+        t_loop = timeit(lambda: [system.simulate(nsim=args.nsim, x0=x0[i], U=Us[i]) for i in range(args.ntraj)])
+        t_batch = timeit(lambda: system.simulate_batch(x0=x0, U=Us, nsim=args.nsim))
+        print(f'{name:>24} {t_legacy:>14.1f} {t_zoh:>10.1f} {t_loop:>10.3f} {t_batch:>10.3f}')
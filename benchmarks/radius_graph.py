@@ -0,0 +1,43 @@
+"""
+Micro-benchmark of graph construction for GraphDataset.
+
+Compares the dense cdist neighbor search with edge lists built in Python that build_graphs used
+previously against the batched cell list radius_graph.
+
+    python benchmarks/radius_graph.py --nodes 500 2000 --timesteps 20
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dataset import radius_graph
+
+
+def dense(x, r, loop):
+    dist = torch.cdist(x, x)
+    links = [torch.argwhere(d < r) for d in dist]
+    edges = [(i, j) for i in range(len(links)) for j in links[i] if i != j or loop]
+    return torch.tensor(edges, dtype=torch.long).permute(1, 0)
+
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, nargs='+', default=[500, 2000])
+    parser.add_argument('--timesteps', type=int, default=20)
+    parser.add_argument('--neighbors', type=float, default=10., help='Expected number of neighbors per node')
+    args = parser.parse_args()
+
+    print(f'{"nodes":>8} {"dense [s]":>10} {"cell list [s]":>14}')
+    for nodes in args.nodes:
+        x = torch.rand(args.timesteps, nodes, 2)
+        r = (args.neighbors / (nodes * torch.pi)) ** 0.5
+        t_dense = timeit(lambda: [dense(xi, r, True) for xi in x])
+        t_cells = timeit(lambda: radius_graph(x, r, loop=True))
+        print(f'{nodes:>8} {t_dense:>10.3f} {t_cells:>14.3f}')
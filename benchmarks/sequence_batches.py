@@ -0,0 +1,46 @@
+"""
+Micro-benchmark of SequenceDataset batching.
+
+Compares per-sample __getitem__ with default_collate against the batch-level access of
+SequenceDataset.get_batch served by SequenceBatchSampler.
+
+    python benchmarks/sequence_batches.py --nsim 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from neuromancer.dataset import SequenceDataset, SequenceBatchSampler
+
+
+def epoch(loader):
+    start = time.perf_counter()
+    for _ in loader:
+        pass
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nsim', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--nsteps', type=int, default=32)
+    parser.add_argument('--batch', type=int, default=256)
+    parser.add_argument('--shuffle', action='store_true')
+    parser.add_argument('--views', action='store_true', help='serve consecutive windows as views of the dataset')
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    print(f'{"nsim":>8} {"samples [s]":>12} {"batches [s]":>12} {"speedup":>8}')
+    for nsim in args.nsim:
+        data = {'X': np.random.randn(nsim, 8), 'U': np.random.randn(nsim, 2)}
+        dataset = SequenceDataset(data, nsteps=args.nsteps, moving_horizon=True,
+                                  batch_views=args.views)
+        per_sample = DataLoader(range(len(dataset)), batch_size=args.batch, shuffle=args.shuffle,
+                                collate_fn=lambda idx: dataset.collate_fn([dataset[i] for i in idx]))
+        batched = DataLoader(dataset, collate_fn=dataset.collate_fn,
+                             batch_sampler=SequenceBatchSampler(dataset, args.batch, shuffle=args.shuffle))
+        t_sample, t_batch = epoch(per_sample), epoch(batched)
+        print(f'{nsim:>8} {t_sample:>12.3f} {t_batch:>12.3f} {t_sample / t_batch:>8.1f}')
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark of fitting SINDy models by sequentially thresholded least squares.
+
+Samples trajectories of a random sparse polynomial system and reports the time of SINDy.fit with
+exact and finite difference derivatives along with the coefficient error and recovered support.
+
+    python benchmarks/sindy_fit.py --n-features 10 --max-degree 3
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dynamics.library import PolynomialLibrary
+from neuromancer.dynamics.ode import SINDy
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-features', type=int, default=10)
+    parser.add_argument('--max-degree', type=int, default=3)
+    parser.add_argument('--nbatch', type=int, default=200)
+    parser.add_argument('--nsteps', type=int, default=50)
+    parser.add_argument('--dt', type=float, default=0.002)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    library = PolynomialLibrary(args.n_features, max_degree=args.max_degree)
+    # linear decay of every state plus one random nonlinear term per state
+    true_coef = torch.zeros(library.shape)
+    true_coef[1:args.n_features + 1] = -torch.eye(args.n_features)
+    nonlinear = torch.randint(args.n_features + 1, library.shape[0], (args.n_features,))
+    true_coef[nonlinear, torch.arange(args.n_features)] = 0.5
+
+    x = [4 * torch.rand(args.nbatch, args.n_features) - 2]
+    for _ in range(args.nsteps - 1):
+        x.append(x[-1] + args.dt * library.evaluate(x[-1]) @ true_coef)
+    x = torch.stack(x, dim=1)
+    dx = (library.evaluate(x.reshape(-1, args.n_features)) @ true_coef).reshape(x.shape)
+
+    print(f'library terms {library.shape[0]}, samples {x.shape[0] * x.shape[1]}')
+    for name, kwargs in [('exact derivatives', {'dx': dx}), ('finite differences', {'t': args.dt})]:
+        model = SINDy(library, threshold=0.05)
+        start = time.perf_counter()
+        model.fit(x, **kwargs)
+        elapsed = time.perf_counter() - start
+        error = (model.coef - true_coef).abs().max().item()
+        support = torch.equal(model.coef != 0, true_coef != 0)
+        print(f'{name:>20}: {elapsed * 1e3:8.1f} ms, max coefficient error {error:.2e}, support recovered {support}')
@@ -0,0 +1,48 @@
+"""
+Micro-benchmark of SINDy function library evaluation.
+
+Compares the column by column evaluation of library terms used previously against the batched
+PolynomialLibrary and FourierLibrary evaluate.
+
+    python benchmarks/sindy_library.py --n-features 10 --max-degree 3 --batch 1000
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.dynamics.library import PolynomialLibrary, FourierLibrary
+
+
+def column_by_column(library, X):
+    output = torch.ones((X.shape[0], library.shape[0]))
+    for i, terms in enumerate(library.library):
+        for func in terms if isinstance(terms, tuple) else (terms,):
+            output[:, i] *= func(X)
+    return output
+
+
+def timeit(func, repeats):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-features', type=int, default=10)
+    parser.add_argument('--max-degree', type=int, default=3)
+    parser.add_argument('--max-freq', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    X = torch.randn(args.batch, args.n_features)
+    for library in [PolynomialLibrary(args.n_features, max_degree=args.max_degree),
+                    FourierLibrary(args.n_features, max_freq=args.max_freq)]:
+        t_loop = timeit(lambda: column_by_column(library, X), args.repeats)
+        t_batched = timeit(lambda: library.evaluate(X), args.repeats)
+        print(f'{type(library).__name__:>18} terms {library.shape[0]:>5} '
+              f'loop {t_loop * 1e3:8.2f} ms  batched {t_batched * 1e3:8.2f} ms')
@@ -0,0 +1,70 @@
+"""
+Benchmark of System.forward rollout cost over prediction horizon length.
+
+Compares the stacked rollout of System.forward against the reference rollout which
+concatenates the node outputs to the recorded trajectories at every time step with System.cat.
+
+    python benchmarks/system_rollout.py --nsteps 10 50 100 500 1000
+"""
+import argparse
+import time
+
+import torch
+
+from neuromancer.modules import blocks
+from neuromancer.system import Node, System
+
+
+def cat_rollout(system, input_dict, nsteps):
+    """
+    Reference closed-loop rollout with per-step System.cat
+    """
+    data = system.init(input_dict.copy())
+    for i in range(nsteps):
+        for node in system.nodes:
+            indata = {k: data[k][:, i] for k in node.input_keys}
+            data = system.cat(data, node(indata))
+    return data
+
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nsteps', type=int, nargs='+', default=[10, 50, 100, 500, 1000])
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--nx', type=int, default=10)
+    parser.add_argument('--nu', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    torch.manual_seed(0)
+
+    A = 0.1 * torch.randn(args.nx, args.nx)
+    B = torch.randn(args.nu, args.nx)
+    policy = blocks.MLP(args.nx, args.nu, hsizes=[32, 32])
+    nodes = [Node(policy, ['x'], ['u'], name='policy'),
+             Node(lambda x, u: x @ A + u @ B, ['x', 'u'], ['x'], name='dynamics')]
+    system = System(nodes)
+
+    print(f'{"nsteps":>8} {"cat [s]":>10} {"stack [s]":>10} {"speedup":>8} {"max err":>10}')
+    for nsteps in args.nsteps:
+        system.nsteps = nsteps
+        data = {'x': torch.randn(args.batch, 1, args.nx)}
+
+        def run_cat():
+            cat_rollout(system, data, nsteps)['x'].sum().backward()
+
+        def run_stack():
+            system(data)['x'].sum().backward()
+
+        t_cat, t_stack = timeit(run_cat, args.repeats), timeit(run_stack, args.repeats)
+        with torch.no_grad():
+            err = (cat_rollout(system, data, nsteps)['x'] - system(data)['x']).abs().max().item()
+        print(f'{nsteps:>8} {t_cat:>10.4f} {t_stack:>10.4f} {t_cat / t_stack:>8.2f} {err:>10.2e}')
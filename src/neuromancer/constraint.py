@@ -304,11 +304,12 @@ class Constraint(nn.Module):
         """
         return gradient(self.forward(input_dict)[self.key], input_dict[input_key])
 
-    def forward(self, input_dict):
+    def operands(self, input_dict):
         """
+        Evaluates the left and right hand sides of the constraint
 
         :param input_dict: (dict, {str: torch.Tensor}) Should contain keys corresponding to self.variable_names
-        :return: 0-dimensional torch.Tensor that can be cast as a floating point number
+        :return: (torch.Tensor, torch.Tensor) left and right hand side values
         """
         if isinstance(self.left, Variable):
             left = self.left(input_dict)
@@ -318,10 +319,27 @@ class Constraint(nn.Module):
             right = self.right(input_dict)
             if not isinstance(right, torch.Tensor):
                 right = torch.tensor(right)
+        return left, right
+
+    def output(self, loss, value, violation):
+        """
+        :param loss: 0-dimensional torch.Tensor, unweighted constraint violation loss
+        :param value: (torch.Tensor) constraint value
+        :param violation: (torch.Tensor) constraint violation
+        :return: (dict, {str: torch.Tensor}) weighted loss, value, and violation with associated output_keys
+        """
+        return {name: tensor for tensor, name
+                in zip([self.weight*loss, value, violation], self.output_keys)}
+
+    def forward(self, input_dict):
+        """
+
+        :param input_dict: (dict, {str: torch.Tensor}) Should contain keys corresponding to self.variable_names
+        :return: 0-dimensional torch.Tensor that can be cast as a floating point number
+        """
+        left, right = self.operands(input_dict)
         loss, value, violation = self.comparator(left, right)
-        output = {name: tensor for tensor, name
-                  in zip([self.weight*loss, value, violation], self.output_keys)}
-        return output
+        return self.output(loss, value, violation)
 
 
 class Variable(nn.Module):
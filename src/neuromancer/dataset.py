@@ -1,3 +1,5 @@
+from collections.abc import Sequence
+import hashlib
 import math
 import os
 from typing import Dict, Optional
@@ -7,7 +9,7 @@ import numpy as np
 import pandas as pd
 from scipy.io import loadmat
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, Sampler, get_worker_info
 from torch.utils.data.dataloader import default_collate
 import sys 
 
@@ -136,15 +138,20 @@ def _extract_var(data, regex):
 SUPPORTED_EXTENSIONS = {".csv", ".mat"}
 
 
-def read_file(file_or_dir):
-
+def _list_files(file_or_dir):
     if os.path.isdir(file_or_dir):
-        files = [
+        return sorted(
             os.path.join(file_or_dir, x)
             for x in os.listdir(file_or_dir)
             if os.path.splitext(x)[1].lower() in SUPPORTED_EXTENSIONS
-        ]
-        return [_read_file(x) for x in sorted(files)]
+        )
+    return [file_or_dir]
+
+
+def read_file(file_or_dir):
+
+    if os.path.isdir(file_or_dir):
+        return [_read_file(x) for x in _list_files(file_or_dir)]
 
     return _read_file(file_or_dir)
 
@@ -187,10 +194,77 @@ def _read_file(file_path):
         ]
 
 
+def _read_chunks(file_path, chunksize):
+    """Read data from MAT or CSV file in chunks of rows. CSV files are streamed, MAT files are loaded
+    one file at a time since the MAT format cannot be read partially.
+
+    :param file_path: (str) path to a MAT or CSV file to load.
+    :param chunksize: (int) number of rows per chunk.
+    :return: (generator) yields tuples of the experiment run ids of the rows (np.array or None) and a
+        data dictionary of the chunk.
+    """
+    file_type = file_path.split(".")[-1].lower()
+    if file_type == "mat":
+        f = loadmat(file_path)
+        data = {k: f.get(k.lower(), None) for k in ["Y", "X", "U", "D", "exp_id"]}
+        nrows = next(v for v in data.values() if v is not None).shape[0]
+        chunks = ({k: v[i:i + chunksize] for k, v in data.items() if v is not None}
+                  for i in range(0, nrows, chunksize))
+    elif file_type == "csv":
+        regexes = {"Y": "^y[0-9]+$", "X": "^x[0-9]+$", "U": "^u[0-9]+$", "D": "^d[0-9]+$", "exp_id": "^exp_id"}
+        chunks = ({k: v for k, v in ((k, _extract_var(df, r)) for k, r in regexes.items()) if v is not None}
+                  for df in pd.read_csv(file_path, chunksize=chunksize))
+    else:
+        raise ValueError(f"unsupported file type: {file_type}")
+
+    for chunk in chunks:
+        id_ = chunk.pop("exp_id", None)
+        assert chunk, f"no data variables found in {file_path}"
+        yield (None if id_ is None else id_.flatten()), chunk
+
+
 def batch_tensor(x: torch.Tensor, steps: int, mh: bool = False):
     return x.unfold(0, steps, 1 if mh else steps)
 
 
+def _memmap_data(data, variables, cache_dir):
+    """Write the concatenated variables of a list of data dictionaries to a float32 .npy file and
+    return it as a memory-mapped tensor. Files are named by a hash of the data so preprocessing only
+    runs once and later runs reuse the file.
+
+    :param data: (list[dict str: np.array]) data dictionaries of 2-d arrays with shape (T, Dk).
+    :param variables: (list str) variables to concatenate along the feature dimension.
+    :param cache_dir: (str) directory holding the memory-mapped files.
+    :return: (torch.Tensor) memory-mapped tensor of shape (sum of T, sum of Dk).
+    """
+    digest = hashlib.sha1()
+    for d in data:
+        for k in variables:
+            v = np.ascontiguousarray(d[k])
+            digest.update(f"{k}{v.shape}{v.dtype}".encode())
+            digest.update(v)
+    path = os.path.join(cache_dir, digest.hexdigest() + ".npy")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        nsim = sum(d[variables[0]].shape[0] for d in data)
+        dim = sum(data[0][k].shape[1] for k in variables)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(nsim, dim))
+        i = 0
+        for d in data:
+            j = 0
+            for k in variables:
+                n, m = d[k].shape
+                out[i:i + n, j:j + m] = d[k]
+                j += m
+            i += n
+        out.flush()
+        del out
+        os.replace(tmp, path)
+    # copy-on-write mapping: pages are read lazily and the file is never modified
+    return torch.from_numpy(np.load(path, mmap_mode="c"))
+
+
 def unbatch_tensor(x: torch.Tensor, mh: bool = False):
     return (
         torch.cat((x[:, :, :, 0], x[-1, :, :, 1:]), dim=0)
@@ -232,6 +306,8 @@ class SequenceDataset(Dataset):
             nsteps=1,
             moving_horizon=False,
             name="data",
+            cache_dir=None,
+            batch_views=False,
     ):
         """Dataset for handling sequential data and transforming it into the dictionary structure
         used by NeuroMANCER models.
@@ -242,6 +318,13 @@ class SequenceDataset(Dataset):
         :param moving_horizon: (bool) if True, generate batches using sliding window with stride 1;
             else use stride N.
         :param name: (str) name of dataset split.
+        :param cache_dir: (str) optional directory for on-disk storage. If given, the time series are
+            stored in a memory-mapped file in this directory and N-step windows are computed on the
+            fly as views, so `batched_data` of a single sequence is never held in memory.
+        :param batch_views: (bool) if True, batches of consecutive N-step sequences are served as
+            views of the dataset tensors without copying. In-place operations on such batches modify
+            the dataset, so this is only safe if models, normalizers and callbacks never modify
+            their inputs in place.
 
         .. note:: To generate train/dev/test datasets and DataLoaders for each, see the
             `get_sequence_dataloaders` function.
@@ -268,12 +351,17 @@ class SequenceDataset(Dataset):
             f"length of time series data must be greater than nsteps"
 
         self.nsteps = nsteps
+        self.batch_views = batch_views
 
         self.variables = list(keys)
-        self.full_data = torch.cat(
-            [torch.cat([torch.tensor(d[k], dtype=torch.float) for k in self.variables], dim=1) for d in data],
-            dim=0,
-        )
+        self.cache_dir = cache_dir
+        if cache_dir is None:
+            self.full_data = torch.cat(
+                [torch.cat([torch.tensor(d[k], dtype=torch.float) for k in self.variables], dim=1) for d in data],
+                dim=0,
+            )
+        else:
+            self.full_data = _memmap_data(data, self.variables, cache_dir)
         self.nsim = self.full_data.shape[0]
         self.dims = {k: (self.nsim, *data[0][k].shape[1:],) for k in self.variables}
 
@@ -292,31 +380,99 @@ class SequenceDataset(Dataset):
             "nsteps": nsteps,
         }
 
-        self.batched_data = torch.cat(
-            [batch_tensor(self.full_data[s, ...], nsteps, mh=moving_horizon) for s in self._sslices],
-            dim=0,
-        )
-        self.batched_data = self.batched_data.permute(0, 2, 1)
+        # _windows maps N-step batches to rows of _unfolded, None if _unfolded holds the batches
+        if cache_dir is None:
+            self._unfolded = torch.cat(
+                [batch_tensor(self.full_data[s, ...], nsteps, mh=moving_horizon) for s in self._sslices],
+                dim=0,
+            ).permute(0, 2, 1)
+            self._windows, self._window_slice = None, None
+        else:
+            self._unfolded = batch_tensor(self.full_data, nsteps, mh=True).permute(0, 2, 1)
+            self._windows = torch.cat(
+                [torch.arange(s.start, s.stop - nsteps + 1, 1 if moving_horizon else nsteps) for s in self._sslices]
+            )
+            # evenly spaced windows are served as a strided view instead of a gather
+            step = int(self._windows[1] - self._windows[0]) if len(self._windows) > 1 else 1
+            evenly_spaced = step > 0 and bool((self._windows.diff() == step).all())
+            self._window_slice = slice(int(self._windows[0]), int(self._windows[-1]) + 1, step) \
+                if evenly_spaced else None
+
+    @property
+    def batched_data(self):
+        """N-step batches of shape (nbatches, nsteps, dim). When stored on disk, evenly spaced windows, e.g. those
+        of a single sequence, are a view of the memory-mapped time series. Windows of multiple sequences are
+        gathered into a new in-memory tensor of the full (nbatches, nsteps, dim) size on every access."""
+        if self._windows is None:
+            return self._unfolded
+        if self._window_slice is not None:
+            return self._unfolded[self._window_slice]
+        return self._unfolded[self._windows]
+
+    def _rows(self, indices):
+        return indices if self._windows is None else self._windows[indices]
 
     def __len__(self):
         """Gives the number of N-step batches in the dataset."""
-        return len(self.batched_data) - 1
+        return len(self._unfolded if self._windows is None else self._windows) - 1
 
     def __getitem__(self, i):
         """Fetch a single N-step sequence from the dataset."""
+        past, future = self._unfolded[int(self._rows(i))], self._unfolded[int(self._rows(i + 1))]
         datapoint = {
             **{
-                k + "p": self.batched_data[i, :, self._vslices[k]]
+                k + "p": past[:, self._vslices[k]]
                 for k in self.variables
             },
             **{
-                k + "f": self.batched_data[i + 1, :, self._vslices[k]]
+                k + "f": future[:, self._vslices[k]]
                 for k in self.variables
             },
         }
         datapoint['index'] = i
         return datapoint
 
+    def __getitems__(self, indices):
+        """Fetch a whole batch of N-step sequences at once. PyTorch's DataLoader calls this in place
+        of per-sample `__getitem__` calls, see `get_batch`. The batch is wrapped in a sequence of
+        samples, so that DataLoaders collating with `default_collate` instead of `collate_fn` work too."""
+        return SequenceBatch(self.get_batch(indices))
+
+    def get_batch(self, indices):
+        """Fetch a batch of N-step sequences with a single indexing operation on the batched data.
+        Index sets are gathered into new tensors in one advanced indexing call. If the dataset was
+        created with `batch_views`, runs of evenly spaced windows are returned as strided views of
+        the dataset tensors without copying.
+
+        :param indices: (slice, list int, or torch.Tensor) indices of the N-step sequences.
+        :return: (dict str: torch.Tensor) collated batch, as produced by `collate_fn`.
+        """
+        if isinstance(indices, slice):
+            indices = torch.arange(*indices.indices(len(self)))
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        n = len(indices)
+        rows = self._rows(torch.stack([indices, indices + 1]))
+        # views share the storage of the whole dataset, which worker processes would copy into
+        # shared memory for every batch, so workers always gather
+        view = self.batch_views and n > 0 and get_worker_info() is None
+        if view:
+            # past and future windows are views iff rows[0] and rows[1, -1] form one arithmetic progression
+            chain = torch.cat([rows[0], rows[1, -1:]])
+            start, step = int(chain[0]), int(chain[1] - chain[0])
+            view = step > 0 and bool((indices.diff() == 1).all()) and bool((chain.diff() == step).all())
+        if view:
+            past = self._unfolded[start:start + step * n:step]
+            future = self._unfolded[start + step:start + step * (n + 1):step]
+        else:
+            past, future = self._unfolded[rows].unbind(0)
+        batch = {
+            **{k + "p": past[:, :, self._vslices[k]] for k in self.variables},
+            **{k + "f": future[:, :, self._vslices[k]] for k in self.variables},
+        }
+        batch['index'] = indices
+        batch['name'] = "nstep_" + self.name
+        return batch
+
     def _get_full_sequence_impl(self, start=0, end=None):
         """Returns the full sequence of data as a dictionary. Useful for open-loop evaluation.
         """
@@ -345,13 +501,14 @@ class SequenceDataset(Dataset):
         )
 
     def get_full_batch(self):
+        batched_data = self.batched_data
         return {
             **{
-                k + "p": self.batched_data[:-1, :, self._vslices[k]]
+                k + "p": batched_data[:-1, :, self._vslices[k]]
                 for k in self.variables
             },
             **{
-                k + "f": self.batched_data[1:, :, self._vslices[k]]
+                k + "f": batched_data[1:, :, self._vslices[k]]
                 for k in self.variables
             },
             "name": "nstep_" + self.name,
@@ -364,6 +521,9 @@ class SequenceDataset(Dataset):
 
         :param batch: (dict str: torch.Tensor) dataset sample.
         """
+        if isinstance(batch, SequenceBatch):
+            # already collated by __getitems__
+            return batch.batch
         batch = default_collate(batch)
         batch['name'] = "nstep_" + self.name
         return batch
@@ -383,11 +543,68 @@ class SequenceDataset(Dataset):
         )
 
 
+class SequenceBatch(Sequence):
+    def __init__(self, batch):
+        """Batch of N-step sequences fetched by `SequenceDataset.__getitems__`. `SequenceDataset.collate_fn`
+        returns the collated batch directly, while indexing yields the samples of `SequenceDataset.__getitem__`
+        for other collate functions.
+
+        :param batch: (dict str: torch.Tensor) collated batch, as produced by `SequenceDataset.get_batch`.
+        """
+        self.batch = batch
+
+    def __len__(self):
+        return len(self.batch['index'])
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        sample = {k: v[i] for k, v in self.batch.items() if k not in {'index', 'name'}}
+        sample['index'] = int(self.batch['index'][i])
+        return sample
+
+
+class SequenceBatchSampler(Sampler):
+    def __init__(self, data_source, batch_size, shuffle=False, drop_last=False, generator=None):
+        """Batch sampler for `SequenceDataset` which yields whole batches of indices instead of lists
+        of Python integers. Unshuffled batches are yielded as slices, which a dataset created with
+        `batch_views` serves as views of its batched data.
+
+        :param data_source: (SequenceDataset) dataset to sample from.
+        :param batch_size: (int) number of N-step sequences per batch.
+        :param shuffle: (bool) whether to draw a new random permutation of indices every epoch.
+        :param drop_last: (bool) whether to drop the last batch if it is smaller than batch_size.
+        :param generator: (torch.Generator) optional generator used for shuffling.
+        """
+        super().__init__()
+        self.data_source = data_source
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.generator = generator
+
+    def __iter__(self):
+        n = len(self.data_source)
+        if self.shuffle:
+            batches = torch.randperm(n, generator=self.generator).split(self.batch_size)
+        else:
+            batches = [slice(i, min(i + self.batch_size, n)) for i in range(0, n, self.batch_size)]
+        for i, batch in enumerate(batches):
+            if self.drop_last and i == n // self.batch_size:
+                break
+            yield batch
+
+    def __len__(self):
+        n = len(self.data_source)
+        return n // self.batch_size if self.drop_last else math.ceil(n / self.batch_size)
+
+
 class StaticDataset(Dataset):
     def __init__(
             self,
             data,
             name="data",
+            cache_dir=None,
     ):
         """Dataset for handling static data and transforming it into the dictionary structure
         used by NeuroMANCER models.
@@ -395,6 +612,8 @@ class StaticDataset(Dataset):
         :param data: (dict str: np.array) dictionary mapping variable names to tensors of shape
             (N, Dk), where N is the number of samples and Dk is dimensionality of variable k.
         :param name: (str) name of dataset split.
+        :param cache_dir: (str) optional directory for on-disk storage. If given, the samples are
+            stored in a memory-mapped file in this directory instead of in memory.
 
         .. warning:: This dataset class requires the use of a special collate function that must be
             provided to PyTorch's DataLoader class; see the `collate_fn` method of this class.
@@ -405,7 +624,11 @@ class StaticDataset(Dataset):
         self.name = name
 
         self.variables = list(data.keys())
-        self.full_data = torch.cat([torch.tensor(data[k], dtype=torch.float) for k in self.variables], dim=1)
+        self.cache_dir = cache_dir
+        if cache_dir is None:
+            self.full_data = torch.cat([torch.tensor(data[k], dtype=torch.float) for k in self.variables], dim=1)
+        else:
+            self.full_data = _memmap_data([data], self.variables, cache_dir)
 
         self.nsamples = self.full_data.shape[0]
         self.dims = {k: (self.nsamples, *data[k].shape[1:],) for k in self.variables}
@@ -463,6 +686,74 @@ class StaticDataset(Dataset):
         )
 
 
+def _radius_graph_dense(x, r, loop):
+    """Brute force neighbor search over all pairs of nodes, used when the grid would overflow."""
+    dist = torch.cdist(x, x)
+    adj = dist < r
+    if not loop:
+        adj &= ~torch.eye(x.shape[-2], dtype=torch.bool, device=x.device)
+    g, i, j = torch.nonzero(adj, as_tuple=True)
+    return g, i, j
+
+
+def radius_graph(x, r, loop=False):
+    """Edges between all nodes closer than r, found with a cell list: nodes are hashed to a grid of
+    cells of width r and only pairs in neighboring cells are compared. Memory and time scale with the
+    number of candidate pairs instead of the square of the number of nodes, and all graphs of a batch
+    are built together.
+
+    :param x: (torch.Tensor) node positions of shape (nodes, dims), or (graphs, nodes, dims) for a batch of graphs.
+    :param r: (float) connectivity radius.
+    :param loop: (bool) include self loops.
+    :return: (torch.Tensor) edge index of shape (2, edges) sorted by source and target node, or a
+        list of one edge index per graph for batched input.
+    """
+    batched = x.ndim == 3
+    x = x if batched else x[None]
+    ngraphs, nodes, dims = x.shape
+    if x.numel() == 0:
+        edges = torch.zeros(2, 0, dtype=torch.long, device=x.device)
+        return [edges] * ngraphs if batched else edges
+    cells = torch.floor(x / r).long().reshape(-1, dims)
+    cells = cells - cells.min(0).values + 1
+    extent = cells.max(0).values + 2
+    # ravel (graph, cell) to one key per node, padded by one cell on each side for the neighbor offsets
+    strides = torch.cumprod(torch.cat([extent.new_ones(1), extent]), 0)
+    if ngraphs * strides[-1].item() < 2 ** 62:
+        graph = torch.arange(ngraphs, device=x.device).repeat_interleave(nodes)
+        keys = (cells * strides[:-1]).sum(1) + graph * strides[-1]
+        order = torch.argsort(keys)
+        cell_keys, counts = torch.unique_consecutive(keys[order], return_counts=True)
+        starts = torch.cumsum(counts, 0) - counts
+
+        offsets = torch.cartesian_prod(*[torch.tensor([-1, 0, 1], device=x.device)] * dims).reshape(-1, dims)
+        neighbor_keys = (keys[:, None] + (offsets * strides[:-1]).sum(1)).reshape(-1)
+        cell = torch.searchsorted(cell_keys, neighbor_keys).clamp(max=len(cell_keys) - 1)
+        found = cell_keys[cell] == neighbor_keys
+        source = torch.arange(len(keys), device=x.device).repeat_interleave(len(offsets))[found]
+        cell = cell[found]
+        # every node of each neighboring cell is a candidate target
+        n = counts[cell]
+        first = torch.cumsum(n, 0) - n
+        position = torch.arange(int(n.sum()), device=x.device) - first.repeat_interleave(n) + starts[cell].repeat_interleave(n)
+        source, target = source.repeat_interleave(n), order[position]
+
+        flat = x.reshape(-1, dims)
+        keep = ((flat[source] - flat[target]) ** 2).sum(-1) < r ** 2
+        if not loop:
+            keep &= source != target
+        source, target = source[keep], target[keep]
+        sort = torch.argsort(source * nodes + target % nodes)
+        source, target = source[sort], target[sort]
+        g, i, j = source // nodes, source % nodes, target % nodes
+    else:
+        g, i, j = _radius_graph_dense(x, r, loop)
+    edges = torch.stack([i, j])
+    if not batched:
+        return edges
+    return list(torch.split(edges, torch.bincount(g, minlength=ngraphs).tolist(), dim=1))
+
+
 class GraphDataset(Dataset):
     def __init__(
             self,
@@ -477,7 +768,8 @@ class GraphDataset(Dataset):
             build_graphs: str = None,
             connectivity_radius: float = 0.015,
             graph_self_loops=True,
-            name: str = "data"
+            name: str = "data",
+            cache_dir: Optional[str] = None
     ):
         """[A Neuromancer Dataset to handle graph data.]
 
@@ -493,6 +785,7 @@ class GraphDataset(Dataset):
         :param connectivity_radius: Maximum distance to connect nodes when building graphs.
         :param graph_self_loops: [bool], If True, include self loops when building graphs.
         :param name: [str], Name of dataset. Defaults to "data"
+        :param cache_dir: [str], Optional directory where built graphs are cached, keyed by a hash of the feature and graph settings.
         :param **kwargs, Torch Dataset kwargs
         """
         super(GraphDataset, self).__init__()
@@ -508,6 +801,7 @@ class GraphDataset(Dataset):
         self.seq_horizon = seq_horizon
         self.seq_stride = seq_stride
         self.connectivity_radius = connectivity_radius
+        self.cache_dir = cache_dir
         self.graphs = graphs if (graphs or not build_graphs) else self.build_graphs(
             build_graphs,
             self_loops=graph_self_loops
@@ -516,41 +810,51 @@ class GraphDataset(Dataset):
         self.make_map()
 
     def build_graphs(self, feature, self_loops):
-        """
-        try:
-            from torch_geometric.nn import radius_graph
-        except:
-        """
-
-        def radius_graph(x, r, loop):
-            dist = torch.cdist(x, x)
-            links = [torch.argwhere(d < r) for d in dist]
-            edges = [(i, j) for i in range(len(links)) for j in links[i] if i != j or loop]
-            if len(edges) == 0:
-                return torch.zeros(2, 0, dtype=torch.long)
-            return torch.tensor(edges, dtype=torch.long).permute(1, 0)
+        """Connect nodes within connectivity_radius of each other, per experiment for categorical features
+        and per sequence endpoint for sequential features. All timesteps of an experiment are built in one
+        batched neighbor search. With a cache_dir, graphs are loaded from disk when available.
 
+        :param feature: [str], Name of the node feature holding node positions
+        :param self_loops: [bool], If True, include self loops
+        :return: [dict int/(int, int) : tensor], graphs keyed by experiment index (and timestep)
+        """
         data = self.node_attr.get(feature)
         assert data is not None, "Feature to build graphs not found in node_attr."
 
+        if self.cache_dir is not None:
+            digest = hashlib.sha1()
+            settings = (self.connectivity_radius, self_loops, self.seq_len, self.seq_stride)
+            digest.update(repr(settings).encode())
+            for d in data:
+                d = np.ascontiguousarray(torch.as_tensor(d).numpy(force=True))
+                digest.update(f"{d.shape}{d.dtype}".encode())
+                digest.update(d)
+            path = os.path.join(self.cache_dir, f"graphs_{digest.hexdigest()}.pt")
+            if os.path.exists(path):
+                return torch.load(path)
+
         graphs = {}
         # If building graph based on catagorical feature
         if data[0].ndim == 2:
             for i in range(len(data)):
-                edge_index = radius_graph(data[i],
-                                          self.connectivity_radius,
-                                          loop=self_loops)
-                graphs[i] = edge_index
+                graphs[i] = radius_graph(data[i], self.connectivity_radius, loop=self_loops)
         # If building graph based on sequential feature
         if data[0].ndim == 3:
             for i in range(len(data)):
                 timesteps = data[i].size(1)
                 inds = np.arange(self.seq_len - 1, timesteps, self.seq_stride)
-                for pos in inds:
-                    edge_index = radius_graph(data[i][:, pos],
-                                              self.connectivity_radius,
-                                              loop=self_loops)
-                    graphs[(i, pos + 1)] = edge_index
+                if len(inds) == 0:
+                    continue
+                edge_indices = radius_graph(data[i][:, inds].transpose(0, 1), self.connectivity_radius,
+                                            loop=self_loops)
+                for pos, edge_index in zip(inds, edge_indices):
+                    graphs[(i, int(pos) + 1)] = edge_index
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            torch.save(graphs, tmp)
+            os.replace(tmp, path)
         return graphs
 
     def shuffle(self):
@@ -612,41 +916,106 @@ class GraphDataset(Dataset):
         return sample
 
     @staticmethod
-    def collate_fn(x):
-        """Batch collation for dictionaries of samples generated by this dataset. This wraps the
-        default PyTorch batch collation function and does some light post-processing to transpose
-        the data for NeuroMANCER models and add a "name" field.
+    def collate_fn(x, pin_memory=False):
+        """Batch collation for dictionaries of samples generated by this dataset. Features are
+        concatenated along the node/edge dimension into preallocated tensors, node offsets of
+        'edge_index' come from a cumulative sum of node counts, and the 'batch' vector assigning nodes
+        to samples is built with repeat_interleave. Samples are not modified.
 
         :param batch: (list of dict str: torch.Tensor) dataset sample. Requires key 'edge_index'
+        :param pin_memory: (bool) allocate outputs in page-locked memory for asynchronous transfer to
+            the GPU, e.g. with functools.partial(GraphDataset.collate_fn, pin_memory=True). Ignored
+            when CUDA is not available.
         """
+        pin_memory = pin_memory and torch.cuda.is_available()
+
+        def cat(tensors, dim):
+            shape = list(tensors[0].shape)
+            shape[dim] = sum(t.shape[dim] for t in tensors)
+            out = torch.empty(shape, dtype=tensors[0].dtype, pin_memory=pin_memory)
+            return torch.cat(tensors, dim=dim, out=out)
+
         out = {}
-        keys = list(x[0].keys())
-
-        for s in ['edge_index', 'name', 'batch', 'num_nodes', 'num_edges']:
-            if s in keys:
-                keys.remove(s)
-        for key in keys:
-            out[key] = torch.cat([y[key] for y in x], dim=0)
-
-        # Handle node and batch index incrementing
-        nodes = [y['num_nodes'] for y in x]
-        batches = [y['batch'] for y in x]
-        for i in range(1, len(batches)):
-            batches[i].fill_(i)
-        out['batch'] = torch.cat(batches, dim=0)
-        if 'edge_index' in x[0].keys():
-            offset = 0
-            edges = []
-            for i in range(len(x)):
-                edges.append(x[i]['edge_index'] + offset)
-                offset += nodes[i]
-            out['edge_index'] = torch.cat(edges, dim=1)
-            out['num_edges'] = out['edge_index'].size(1)
-        out['num_nodes'] = sum(nodes)
+        special = {'edge_index', 'name', 'batch', 'num_nodes', 'num_edges'}
+        for key in x[0]:
+            if key not in special:
+                out[key] = cat([y[key] for y in x], dim=0)
+
+        nodes = torch.tensor([y['num_nodes'] for y in x], dtype=torch.long)
+        out['batch'] = torch.arange(len(x)).repeat_interleave(nodes)
+        if 'edge_index' in x[0]:
+            edges = np.cumsum([0] + [y['edge_index'].size(1) for y in x])
+            offsets = (torch.cumsum(nodes, 0) - nodes).tolist()
+            edge_index = torch.empty((2, int(edges[-1])), dtype=torch.long, pin_memory=pin_memory)
+            # shift node indices while copying each sample into its slice of the output
+            for y, start, end, offset in zip(x, edges[:-1], edges[1:], offsets):
+                torch.add(y['edge_index'], offset, out=edge_index[:, start:end])
+            out['edge_index'] = edge_index
+            out['num_edges'] = edge_index.size(1)
+        if pin_memory:
+            out['batch'] = out['batch'].pin_memory()
+        out['num_nodes'] = int(nodes.sum())
         out['name'] = x[0]['name']
         return out
 
 
+class RunningStats:
+    """Column-wise minimum, maximum, mean, and variance of a stream of 2-d arrays. Statistics of
+    separate streams, e.g. different files, can be combined with `merge`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.min = self.max = self.mean = self.m2 = None
+
+    def update(self, M):
+        """
+        :param M: (2-d np.array) chunk of data with samples along the first axis.
+        """
+        M = np.asarray(M)
+        if len(M) == 0:
+            return self
+        other = RunningStats()
+        other.count = len(M)
+        other.min, other.max, other.mean = M.min(axis=0), M.max(axis=0), M.mean(axis=0)
+        other.m2 = ((M - other.mean) ** 2).sum(axis=0)
+        return self.merge(other)
+
+    def merge(self, other):
+        """Combine with the statistics of another stream using the parallel variance update of Chan et al.
+
+        :param other: (RunningStats) statistics to merge into this one.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.min, self.max, self.mean, self.m2 = other.count, other.min, other.max, other.mean, other.m2
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / count
+        self.min, self.max = np.minimum(self.min, other.min), np.maximum(self.max, other.max)
+        self.count = count
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def norm_stats(self, norm_type):
+        """Statistics in the order expected by the normalization functions in `norm_fns`.
+
+        :param norm_type: (str) type of normalization; can be "zero-one", "one-one", or "zscore".
+        :return: (tuple np.array) mean and standard deviation for "zscore", else minimum and maximum.
+        """
+        return (self.mean, self.std) if norm_type == "zscore" else (self.min, self.max)
+
+
 def normalize_data(data, norm_type, stats=None):
     """Normalize data, optionally using arbitrary statistics (e.g. computed from train split).
 
@@ -662,29 +1031,100 @@ def normalize_data(data, norm_type, stats=None):
     if not multisequence:
         data = [data]
 
+    keys = data[0].keys()
     if stats is None:
-        norm_fn = lambda x, _: norm_fns[norm_type](x)
-    else:
-        norm_fn = lambda x, k: norm_fns[norm_type](
-            x,
-            stats[k + "_min"].reshape(1, -1),
-            stats[k + "_max"].reshape(1, -1),
-        )
+        # merge per-sequence statistics instead of concatenating all sequences
+        running = {k: RunningStats() for k in keys}
+        for d in data:
+            for k in keys:
+                running[k].update(d[k])
+        stat0, stat1 = zip(*[running[k].norm_stats(norm_type) for k in keys])
+        stats = {
+            **{k + "_min": v for k, v in zip(keys, stat0)},
+            **{k + "_max": v for k, v in zip(keys, stat1)},
+        }
+
+    norm_fn = lambda x, k: norm_fns[norm_type](
+        x,
+        stats[k + "_min"].reshape(1, -1),
+        stats[k + "_max"].reshape(1, -1),
+    )[0]
+    data = [{k: norm_fn(d[k], k) for k in keys} for d in data]
+
+    return data if multisequence else data[0], stats
 
-    keys = data[0].keys()
-    slices = _get_sequence_time_slices(data)
-    data = {k: np.concatenate([v[k] for v in data], axis=0) for k in keys}
 
-    norm_data = [norm_fn(v, k) for k, v in data.items()]
-    norm_data, stat0, stat1 = zip(*norm_data)
+def normalize_files(file_or_dir, norm_type, out_dir, chunksize=100000):
+    """Streaming counterpart of `read_file` followed by `normalize_data`. Files are read in chunks of
+    rows twice: once to compute normalization statistics merged across all files, and once to write
+    the normalized data to memory-mapped .npy shards in `out_dir`, one directory per sequence. Peak
+    memory is bounded by the chunk size rather than the size of the data.
 
+    :param file_or_dir: (str) path to a MAT or CSV file or a directory of such files.
+    :param norm_type: (str) type of normalization; see function `normalize_data` for more info.
+    :param out_dir: (str) directory for the normalized shards.
+    :param chunksize: (int) number of rows read at a time.
+    :return: (dict str: np.memmap or list[dict str: np.memmap], dict str: np.array) normalized data
+        in the layout returned by `read_file`, flattened to a list of sequences for multiple files or
+        experiment runs, and the normalization statistics as returned by `normalize_data`.
+    """
+    files = _list_files(file_or_dir)
+
+    # first pass: statistics and number of rows per sequence
+    running, shapes = {}, {}
+    for file in files:
+        for id_, chunk in _read_chunks(file, chunksize):
+            ids, counts = (np.array([None]), [len(next(iter(chunk.values())))]) if id_ is None \
+                else np.unique(id_, return_counts=True)
+            for i, n in zip(ids, counts):
+                shape = shapes.setdefault((file, i), {k: [0, v.shape[1]] for k, v in chunk.items()})
+                for k in chunk:
+                    shape[k][0] += int(n)
+            for k, v in chunk.items():
+                running.setdefault(k, RunningStats()).update(v)
+    stat0, stat1 = zip(*[v.norm_stats(norm_type) for v in running.values()])
     stats = {
-        **{k + "_min": v for k, v in zip(data.keys(), stat0)},
-        **{k + "_max": v for k, v in zip(data.keys(), stat1)},
+        **{k + "_min": v for k, v in zip(running, stat0)},
+        **{k + "_max": v for k, v in zip(running, stat1)},
     }
-    data = [{k: v[sl, ...] for k, v in zip(data.keys(), norm_data)} for sl in slices]
 
-    return data if multisequence else data[0], stats
+    # second pass: write normalized shards
+    shards, names = {}, set()
+    for (file, i), shape in shapes.items():
+        # shards are named by the path relative to file_or_dir including the extension, so a.csv and a.mat differ
+        rel = os.path.relpath(file, file_or_dir) if os.path.isdir(file_or_dir) else os.path.basename(file)
+        name = rel.replace(os.sep, "_") + ("" if i is None else f"_{i}")
+        if name in names:
+            raise ValueError(f"Normalized shards of {file} would overwrite other shards in {os.path.join(out_dir, name)}")
+        names.add(name)
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        shards[(file, i)] = {
+            k: np.lib.format.open_memmap(os.path.join(out_dir, name, f"{k}.npy"), mode="w+",
+                                         dtype=np.float32, shape=tuple(v))
+            for k, v in shape.items()
+        }
+    for file in files:
+        offsets = {i: 0 for f, i in shards if f == file}
+        for id_, chunk in _read_chunks(file, chunksize):
+            norm_chunk = {
+                k: norm_fns[norm_type](v, stats[k + "_min"].reshape(1, -1), stats[k + "_max"].reshape(1, -1))[0]
+                for k, v in chunk.items()
+            }
+            for i in offsets:
+                rows = slice(None) if id_ is None else id_ == i
+                n = len(next(iter(chunk.values()))) if id_ is None else int(rows.sum())
+                for k, v in norm_chunk.items():
+                    shards[(file, i)][k][offsets[i]:offsets[i] + n] = v[rows]
+                offsets[i] += n
+    for shard in shards.values():
+        for v in shard.values():
+            v.flush()
+
+    data = [
+        {k: np.load(v.filename, mmap_mode="r") for k, v in shard.items()}
+        for shard in shards.values()
+    ]
+    return data if len(data) > 1 or os.path.isdir(file_or_dir) else data[0], stats
 
 
 def split_sequence_data(data, nsteps, moving_horizon=False, split_ratio=None):
@@ -840,7 +1280,7 @@ denorm_fns = {
 }
 
 
-def get_static_dataloaders(data, norm_type=None, split_ratio=None, num_workers=0, batch_size=32):
+def get_static_dataloaders(data, norm_type=None, split_ratio=None, num_workers=0, batch_size=32, cache_dir=None):
     """This will generate dataloaders for a given dictionary of data.
     Dataloaders are hard-coded for full-batch training to match NeuroMANCER's training setup.
 
@@ -850,6 +1290,7 @@ def get_static_dataloaders(data, norm_type=None, split_ratio=None, num_workers=0
     :param norm_type: (str) type of normalization; see function `normalize_data` for more info.
     :param split_ratio: (list float) percentage of data in train and development splits; see
         function `split_sequence_data` for more info.get_static_dataloaders
+    :param cache_dir: (str) optional directory for memory-mapped storage; see `StaticDataset`.
     """
 
     if norm_type is not None:
@@ -859,14 +1300,17 @@ def get_static_dataloaders(data, norm_type=None, split_ratio=None, num_workers=0
     train_data = StaticDataset(
         train_data,
         name="train",
+        cache_dir=cache_dir,
     )
     dev_data = StaticDataset(
         dev_data,
         name="dev",
+        cache_dir=cache_dir,
     )
     test_data = StaticDataset(
         test_data,
         name="test",
+        cache_dir=cache_dir,
     )
 
     train_data = DataLoader(
@@ -896,7 +1340,7 @@ def get_static_dataloaders(data, norm_type=None, split_ratio=None, num_workers=0
 
 def get_sequence_dataloaders(
     data, nsteps, moving_horizon=False, norm_type=None, split_ratio=None,
-        num_workers=0, batch_size=None):
+        num_workers=0, batch_size=None, cache_dir=None):
     """
     This function will generate dataloaders and open-loop sequence dictionaries for a given dictionary of
     data. Dataloaders are hard-coded for full-batch training to match NeuroMANCER's original
@@ -914,6 +1358,8 @@ def get_sequence_dataloaders(
             0 means that the data will be loaded in the main process. (default: 0)
     :param batch_size: (int, optional) how many samples per batch to load
             (default: full-batch via len(data)).
+    :param cache_dir: (str, optional) directory for memory-mapped storage of the time series; see
+            `SequenceDataset`. (default: None, data is kept in memory)
     """
     if norm_type is not None:
         data, _ = normalize_data(data, norm_type)
@@ -930,18 +1376,21 @@ def get_sequence_dataloaders(
         nsteps=nsteps,
         moving_horizon=moving_horizon,
         name="train",
+        cache_dir=cache_dir,
     )
     dev_data = SequenceDataset(
         dev_data,
         nsteps=nsteps,
         moving_horizon=moving_horizon,
         name="dev",
+        cache_dir=cache_dir,
     )
     test_data = SequenceDataset(
         test_data,
         nsteps=nsteps,
         moving_horizon=moving_horizon,
         name="test",
+        cache_dir=cache_dir,
     )
     # get full sequence datasets
     # with dimensions [1, nsteps*batches, nx]
@@ -952,22 +1401,25 @@ def get_sequence_dataloaders(
     # instantiate Pytorch dataloaders
     train_data = DataLoader(
         train_data,
-        batch_size=batch_size if batch_size is not None else len(train_data),
-        shuffle=False,
+        batch_sampler=SequenceBatchSampler(
+            train_data, batch_size if batch_size is not None else len(train_data)
+        ),
         collate_fn=train_data.collate_fn,
         num_workers=num_workers,
     )
     dev_data = DataLoader(
         dev_data,
-        batch_size=batch_size if batch_size is not None else len(dev_data),
-        shuffle=False,
+        batch_sampler=SequenceBatchSampler(
+            dev_data, batch_size if batch_size is not None else len(dev_data)
+        ),
         collate_fn=dev_data.collate_fn,
         num_workers=num_workers,
     )
     test_data = DataLoader(
         test_data,
-        batch_size=batch_size if batch_size is not None else len(test_data),
-        shuffle=False,
+        batch_sampler=SequenceBatchSampler(
+            test_data, batch_size if batch_size is not None else len(test_data)
+        ),
         collate_fn=test_data.collate_fn,
         num_workers=num_workers,
     )
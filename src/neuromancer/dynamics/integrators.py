@@ -1,17 +1,22 @@
 """
 Single-step integrators for first-order nonautomonomous ODEs
 """
+import functools
 import warnings
 import torch
 import torch.nn as nn
+from torch.utils.checkpoint import checkpoint
 
 from torchdiffeq import odeint_adjoint as odeint
 import torchdiffeq
 import torchsde
 from abc import ABC, abstractmethod
 
+from neuromancer.dynamics.interpolation import LinInterp_Horizon
+
 
 class Integrator(nn.Module, ABC):
+    single_step = True  # integrate maps a 2D state to the 2D state one step ahead, which rollout builds on
 
     def __init__(self, block, interp_u=None, h=1.0):
         """
@@ -28,6 +33,8 @@ class Integrator(nn.Module, ABC):
         if interp_u is not None:
             warnings.warn('interp_u argument is deprecated, it has no effect, and will be removed in the next release.', FutureWarning)
 
+    stage_offsets = None  # fractions of the step at which integrate_stages evaluates the block, in order of evaluation
+
     @abstractmethod
     def integrate(self, x, *args):
         pass
@@ -39,28 +46,108 @@ class Integrator(nn.Module, ABC):
         """
         return self.integrate(x, *args)
 
+    def rollout(self, x0, u_seq=None, nsteps=None):
+        """
+        Integrates a whole horizon of nsteps steps from x0 in a single call.
+        Step i advances the state with the exogenous inputs at time index i, as nsteps calls
+        of forward would. Inputs given as LinInterp_Horizon are interpolated at the stage offsets of
+        every block evaluation, or held at their step values by integrators without stage offsets.
+        Without gradient tracking the states are written into a preallocated output tensor,
+        otherwise they are stacked once at the end of the rollout.
+
+        :param x0: (torch.Tensor, shape=[batchsize, SysDim]) Initial state
+        :param u_seq: (torch.Tensor, shape=[batchsize, nsteps, InDim], LinInterp_Horizon or list of those) Optional
+                      exogenous inputs passed to the block after the state
+        :param nsteps: (int) Number of steps, inferred from u_seq if None
+        :return: (torch.Tensor, shape=[batchsize, nsteps, SysDim]) States at time steps 1, ..., nsteps
+        """
+        u_seq, nsteps = rollout_inputs(u_seq, nsteps)
+        if nsteps == 0:
+            return x0[:, None][:, :0]
+        interpolated = [isinstance(u, LinInterp_Horizon) for u in u_seq]
+        if any(interpolated) and self.stage_offsets is not None:
+            # per step, the inputs of every stage: interpolated once for the whole horizon, or held over the step
+            nstages = len(self.stage_offsets)
+            per_input = [u.stages(self.stage_offsets, nsteps).permute(2, 0, 1, 3).unbind(0) if interp
+                         else [[v] * nstages for v in u[:, :nsteps].unbind(1)]
+                         for u, interp in zip(u_seq, interpolated)]
+            u_steps = [list(zip(*stage_inputs)) for stage_inputs in zip(*per_input)]
+            advance = self.integrate_stages
+        else:
+            u_seq = [u.u if interp else u for u, interp in zip(u_seq, interpolated)]
+            u_steps = list(zip(*[u[:, :nsteps].unbind(1) for u in u_seq])) or [()] * nsteps
+            advance = lambda x, args: self.integrate(x, *args)
+        x = x0
+        if torch.is_grad_enabled():
+            X = []
+            for args in u_steps:
+                x = advance(x, args)
+                X.append(x)
+            return torch.stack(X, dim=1)
+        X = x0.new_empty(x0.shape[0], nsteps, *x0.shape[1:])
+        for i, args in enumerate(u_steps):
+            x = advance(x, args)
+            X[:, i] = x
+        return X
+
     def reg_error(self):
         return sum([k.reg_error() for k in self.children() if hasattr(k, "reg_error")])
 
 
+def rollout_inputs(u_seq, nsteps):
+    """
+    :param u_seq: (None, torch.Tensor, LinInterp_Horizon or list of those) exogenous inputs of a rollout
+    :param nsteps: (int) Number of steps, inferred from the first input if None
+    :return: (list, int) list of inputs and number of steps
+    """
+    if u_seq is None:
+        u_seq = []
+    elif not isinstance(u_seq, (list, tuple)):
+        u_seq = [u_seq]
+    if nsteps is None:
+        assert len(u_seq) > 0, 'Number of rollout steps of an autonomous system must be given.'
+        nsteps = u_seq[0].nsteps if isinstance(u_seq[0], LinInterp_Horizon) else u_seq[0].shape[1]
+    return list(u_seq), nsteps
+
+
 def rms_norm(tensor):
     return tensor.pow(2).mean().sqrt()
 
 
 def make_norm(state):
-    state_size = state.numel()
+    return _adjoint_norm(state.numel())
+
+
+@functools.lru_cache(maxsize=32)
+def _adjoint_norm(state_size):
+    """
+    Norm of the augmented adjoint state over the state and its adjoint, ignoring parameter adjoints.
+    Cached per state size so that integration steps do not build a new closure.
+    """
     def norm(aug_state):
-        y = aug_state[1:1 + state_size]
-        adj_y = aug_state[1 + state_size:1 + 2 * state_size]
+        if isinstance(aug_state, tuple):  # (t, y, adj_y, *adj_params) in torchdiffeq >= 0.2
+            y, adj_y = aug_state[1], aug_state[2]
+        else:
+            y = aug_state[1:1 + state_size]
+            adj_y = aug_state[1 + state_size:1 + 2 * state_size]
         return max(rms_norm(y), rms_norm(adj_y))
     return norm
 
 
+fixed_grid_methods = {'euler', 'midpoint', 'heun2', 'heun3', 'rk4'}
+adaptive_methods = {'dopri8', 'dopri5', 'bosh3', 'fehlberg2', 'adaptive_heun'}
+
+
 class DiffEqIntegrator(Integrator):
     """
+    Integrator using the ODE solvers of torchdiffeq. Gradients are computed with one of three modes:
 
+    + 'adjoint': adjoint sensitivity method with memory independent of the number of solver steps
+    + 'direct': backpropagation through the solver operations, fastest for short horizons
+    + 'checkpoint': backpropagation through segments of checkpoint_steps steps which are recomputed
+      in the backward pass, storing only the states at segment boundaries for long horizons
     """
-    def __init__(self, block, interp_u=None, h=0.001, method='euler'):
+    def __init__(self, block, interp_u=None, h=0.001, method='euler', mode='adjoint', checkpoint_steps=10):
         """
 
         :param block:(nn.Module) A state transition model.
@@ -68,21 +155,104 @@ class DiffEqIntegrator(Integrator):
         :param h: (float) integration step size
         :param method: (str) Can be dopri8, dopri5, bosh3, fehlberg2, adaptive_heun, euler,
         midpoint, rk4, explicit_adams, implicit_adams, explicit_adams, implicit_adams, fixed_adams
+        :param mode: (str) Can be 'adjoint', 'direct' or 'checkpoint'
+        :param checkpoint_steps: (int) Number of steps per recomputed segment of a rollout in 'checkpoint' mode
         """
         super().__init__(block, interp_u=interp_u, h=h)
-        self.method = method
+        assert mode in ['adjoint', 'direct', 'checkpoint'], \
+            f'Unknown gradient mode {mode}, expected "adjoint", "direct" or "checkpoint".'
+        self.method, self.mode, self.checkpoint_steps = method, mode, checkpoint_steps
         self.adjoint_params = torchdiffeq._impl.adjoint.find_parameters(self.block)
+        self.register_buffer('time_grid', torch.tensor([0.0, h]), persistent=False)
+
+    def timepoints(self, nsteps):
+        """
+        :param nsteps: (int) Number of integration steps
+        :return: (torch.Tensor, shape=[nsteps + 1]) Output times 0, h, ..., nsteps*h from the cached time grid buffer
+        """
+        if self.time_grid.shape[0] < nsteps + 1:
+            self.time_grid = torch.arange(nsteps + 1, dtype=self.time_grid.dtype, device=self.time_grid.device) * self.h
+        return self.time_grid[:nsteps + 1]
+
+    def solve(self, rhs_fun, x, t, inputs=(), options=None):
+        """
+        Solves the ODE on output times t with the gradient mode of the integrator
+
+        :param rhs_fun: (Callable(t, x)) right hand side of the ODE
+        :param x: (torch.Tensor, shape=[batchsize, SysDim]) Initial state
+        :param t: (torch.Tensor, shape=[ntimes]) Output times
+        :param inputs: (tuple of torch.Tensor) Tensors rhs_fun depends on besides the block parameters,
+                       whose gradients the adjoint method has to compute
+        :param options: (dict) Solver options
+        :return: (torch.Tensor, shape=[ntimes, batchsize, SysDim]) Solution at the output times
+        """
+        if self.mode == 'adjoint':
+            adjoint_params = tuple(self.adjoint_params) + tuple(u for u in inputs if u.requires_grad)
+            return odeint(rhs_fun, x, t, method=self.method, options=options,
+                          adjoint_params=adjoint_params,
+                          adjoint_options=dict(options or {}, norm=make_norm(x)))
+        if self.mode == 'checkpoint' and torch.is_grad_enabled():
+            return checkpoint(torchdiffeq.odeint, rhs_fun, x, t, method=self.method, options=options,
+                              use_reentrant=False)
+        return torchdiffeq.odeint(rhs_fun, x, t, method=self.method, options=options)
 
     def integrate(self, x, *args):
-        t_0 = 0.0
-        timepoints = torch.tensor([t_0, t_0 + self.h])
         rhs_fun = lambda t, x: self.block(x, *args)
-        solution = odeint(rhs_fun, x, timepoints, method=self.method,
-                          adjoint_params=self.adjoint_params,
-                          adjoint_options=dict(norm=make_norm(x)))
-        x_t = solution[-1]
-        return x_t
-    
+        return self.solve(rhs_fun, x, self.timepoints(1), args)[-1]
+
+    def rollout(self, x0, u_seq=None, nsteps=None):
+        """
+        Integrates the whole horizon with a single solver call whose output times are the time steps.
+        Exogenous input tensors are held constant over each step. Fixed grid solvers evaluate the block exactly as
+        nsteps calls of forward would. Adaptive solvers restart at the step boundaries where the inputs jump.
+        Multistep solvers, and adaptive solvers in 'adjoint' mode, step through the horizon with Integrator.rollout.
+        Inputs given as LinInterp_Horizon, sampled with the step h of the integrator, are interpolated at the
+        times of the block evaluations. In 'checkpoint' mode the horizon is solved in recomputed segments
+        of checkpoint_steps steps.
+
+        :param x0: (torch.Tensor, shape=[batchsize, SysDim]) Initial state
+        :param u_seq: (torch.Tensor, shape=[batchsize, nsteps, InDim], LinInterp_Horizon or list of those) Optional
+                      exogenous inputs passed to the block after the state
+        :param nsteps: (int) Number of steps, inferred from u_seq if None
+        :return: (torch.Tensor, shape=[batchsize, nsteps, SysDim]) States at time steps 1, ..., nsteps
+        """
+        u_seq, nsteps = rollout_inputs(u_seq, nsteps)
+        if nsteps == 0:
+            return x0[:, None][:, :0]
+        t = self.timepoints(nsteps)
+        options = None
+        interpolated = [isinstance(u, LinInterp_Horizon) for u in u_seq]
+        if not all(interpolated):
+            if self.method in fixed_grid_methods:
+                options = dict(perturb=True)
+            elif self.method in adaptive_methods and self.mode != 'adjoint':
+                options = dict(jump_t=t[1:-1])
+            else:
+                # the backward solves of the adjoint method start at step boundaries without perturbation,
+                # so adaptive solvers would evaluate them with the inputs of the wrong step
+                return super().rollout(x0, u_seq, nsteps)
+        u_seq = [u if interp else u[:, :nsteps] for u, interp in zip(u_seq, interpolated)]
+        inputs = [v for u, interp in zip(u_seq, interpolated) for v in ([u.u, u.du] if interp else [u])]
+
+        def rhs_fun(time, x):
+            if all(interpolated):
+                return self.block(x, *[u(time) for u in u_seq])
+            # inputs of the step containing time, steps are left closed and perturbed solvers
+            # evaluate the step boundaries just inside the step
+            i = (torch.searchsorted(t, time.reshape(1), right=True) - 1).clamp(0, nsteps - 1)
+            return self.block(x, *[u(time) if interp else u.index_select(1, i)[:, 0]
+                                   for u, interp in zip(u_seq, interpolated)])
+
+        if self.mode == 'checkpoint':
+            X, x = [], x0
+            for start in range(0, nsteps, self.checkpoint_steps):
+                solution = self.solve(rhs_fun, x, t[start:start + self.checkpoint_steps + 1], inputs, options)[1:]
+                X.append(solution)
+                x = solution[-1]
+            return torch.cat(X).transpose(0, 1)
+        return self.solve(rhs_fun, x0, t, inputs, options)[1:].transpose(0, 1)
+
+
 class BasicSDEIntegrator(Integrator): 
     """
     Integrator (from TorchSDE) for basic/explicit SDE case where drift (f) and diffusion (g) terms are defined 
@@ -92,6 +262,8 @@ class BasicSDEIntegrator(Integrator):
     Currently only supports Euler integration. Choice of integration method is dependent 
     on integral type (Ito/Stratanovich) and drift/diffusion terms
     """
+    single_step = False
+
     def __init__(self, block): 
         """
         :param block: (nn.Module) The BasicSDE block
@@ -114,6 +286,8 @@ class LatentSDEIntegrator(Integrator):
     In this case we also set logqp to True such that log ratio penalty is also returned. 
     PLease see: https://github.com/google-research/torchsde/blob/master/torchsde/_core/sdeint.py
     """
+    single_step = False
+
     def __init__(self, block,  dt=1e-2, method='euler', adjoint=False):
         """
         :param block:(nn.Module) The LatentSDE_Encoder block
@@ -141,7 +315,36 @@ class LatentSDEIntegrator(Integrator):
         return zs, z0, log_ratio, xs, qz0_mean, qz0_logstd
 
 
-class Euler(Integrator):
+class ExplicitIntegrator(Integrator):
+    """
+    Base class of explicit integrators whose single step is written in terms of block evaluations at
+    the fractions stage_offsets of the step, so that rollouts can interpolate inputs at every evaluation.
+    """
+
+    def integrate(self, x, *args):
+        """
+        Single integration step with the exogenous inputs args held constant over the step
+        """
+        if self.stage_offsets is None:
+            raise ValueError(f'{type(self).__name__} does not define stage_offsets, integrate must be overridden.')
+        return self.integrate_stages(x, [args] * len(self.stage_offsets))
+
+    @abstractmethod
+    def integrate_stages(self, x, u):
+        """
+        Single integration step of explicit Runge-Kutta type integrators with inputs given per block evaluation
+
+        :param x: (torch.Tensor, shape=[batchsize, SysDim]) state at time t
+        :param u: (list of tuples of torch.Tensor) exogenous inputs of every block evaluation, where the k-th
+                  evaluation of the block is at time t + stage_offsets[k]*h
+        :return x_{t+1}: (torch.Tensor, shape=[batchsize, SysDim])
+        """
+        pass
+
+
+class Euler(ExplicitIntegrator):
+    stage_offsets = (0.,)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
 
@@ -150,13 +353,15 @@ class Euler(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, x, *args):
+    def integrate_stages(self, x, u):
         h = self.h
-        k1 = self.block(*[x, *args])        # k1 = f(x_i, t_i)
+        k1 = self.block(x, *u[0])        # k1 = f(x_i, t_i)
         return x + h*k1
 
 
-class Euler_Trap(Integrator):
+class Euler_Trap(ExplicitIntegrator):
+    stage_offsets = (0., 0., 1.)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
         Forward Euler (explicit). Trapezoidal rule (implicit).
@@ -166,18 +371,20 @@ class Euler_Trap(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, x, *args):
+    def integrate_stages(self, x, u):
         """
 
         :param x: (torch.Tensor, shape=[batchsize, SysDim])
         :return x_{t+1}: (torch.Tensor, shape=[batchsize, SysDim])
         """
-        pred = x + self.h * self.block(x, *args)
-        corr = x + 0.5 * self.h * (self.block(x, *args) + self.block(pred, *args))
+        pred = x + self.h * self.block(x, *u[0])
+        corr = x + 0.5 * self.h * (self.block(x, *u[1]) + self.block(pred, *u[2]))
         return corr
 
 
-class RK2(Integrator):
+class RK2(ExplicitIntegrator):
+    stage_offsets = (0., 0.5)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
 
@@ -186,14 +393,16 @@ class RK2(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, x, *args):
+    def integrate_stages(self, x, u):
         h = self.h
-        k1 = self.block(x, *args)                    # k1 = f(x_i, t_i)
-        k2 = self.block(x + h*k1/2.0, *args)         # k2 = f(x_i + 0.5*h*k1, t_i + 0.5*h)
+        k1 = self.block(x, *u[0])                    # k1 = f(x_i, t_i)
+        k2 = self.block(x + h*k1/2.0, *u[1])         # k2 = f(x_i + 0.5*h*k1, t_i + 0.5*h)
         return x + h*k2
 
 
-class RK4(Integrator):
+class RK4(ExplicitIntegrator):
+    stage_offsets = (0., 0.5, 0.5, 1.)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
 
@@ -202,21 +411,23 @@ class RK4(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, x, *args):
+    def integrate_stages(self, x, u):
         h = self.h
-        k1 = self.block(x, *args)                    # k1 = f(x_i, t_i)
-        k2 = self.block(x + h*k1/2.0, *args)         # k2 = f(x_i + 0.5*h*k1, t_i + 0.5*h)
-        k3 = self.block(x + h*k2/2.0, *args)         # k3 = f(x_i + 0.5*h*k2, t_i + 0.5*h)
-        k4 = self.block(x + h*k3, *args)             # k4 = f(y_i + h*k3, t_i + h)
+        k1 = self.block(x, *u[0])                    # k1 = f(x_i, t_i)
+        k2 = self.block(x + h*k1/2.0, *u[1])         # k2 = f(x_i + 0.5*h*k1, t_i + 0.5*h)
+        k3 = self.block(x + h*k2/2.0, *u[2])         # k3 = f(x_i + 0.5*h*k2, t_i + 0.5*h)
+        k4 = self.block(x + h*k3, *u[3])             # k4 = f(y_i + h*k3, t_i + h)
         return x + h*(k1/6.0 + k2/3.0 + k3/3.0 + k4/6.0)
 
 
-class RK4_Trap(Integrator):
+class RK4_Trap(ExplicitIntegrator):
     """
     predictor-corrector integrator for dx = f(x)
     predictor: explicit RK4
     corrector: implicit trapezoidal rule
     """
+    stage_offsets = (0., 0.5, 0.5, 1., 0., 1.)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
 
@@ -225,17 +436,19 @@ class RK4_Trap(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, x, *args):
-        k1 = self.block(x, *args)                     # k1 = f(x_i, t_i)
-        k2 = self.block(x + self.h*k1/2.0, *args)     # k2 = f(x_i + 0.5*h*k1, t_i + 0.5*h)
-        k3 = self.block(x + self.h*k2/2.0, *args)     # k3 = f(x_i + 0.5*h*k2, t_i + 0.5*h)
-        k4 = self.block(x + self.h*k3, *args)         # k4 = f(y_i + h*k3, t_i + h)
+    def integrate_stages(self, x, u):
+        k1 = self.block(x, *u[0])                     # k1 = f(x_i, t_i)
+        k2 = self.block(x + self.h*k1/2.0, *u[1])     # k2 = f(x_i + 0.5*h*k1, t_i + 0.5*h)
+        k3 = self.block(x + self.h*k2/2.0, *u[2])     # k3 = f(x_i + 0.5*h*k2, t_i + 0.5*h)
+        k4 = self.block(x + self.h*k3, *u[3])         # k4 = f(y_i + h*k3, t_i + h)
         pred = x + self.h*(k1/6.0 + k2/3.0 + k3/3.0 + k4/6.0)
-        corr = x + 0.5*self.h*(self.block(x, *args) + self.block(pred, *args) )
+        corr = x + 0.5*self.h*(self.block(x, *u[4]) + self.block(pred, *u[5]) )
         return corr
 
 
-class Luther(Integrator):
+class Luther(ExplicitIntegrator):
+    stage_offsets = (0., 1., 0.5, 2/3, (7 - 21**0.5)/14, (7 + 21**0.5)/14, 1.)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
 
@@ -244,64 +457,176 @@ class Luther(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, x, *args):
+    def integrate_stages(self, x, u):
         q = 21**0.5     # constant
         h = self.h         
-        k1 = self.block(x, *args)                    # k1 = f(x_i, t_i)
-        k2 = self.block(x + h*k1, *args)
-        k3 = self.block(x + h*(3/8*k1 + 1/8*k2), *args)
-        k4 = self.block(x + h*(8/27*k1 + 2/27*k2 + 8/27*k3), *args)
+        k1 = self.block(x, *u[0])                    # k1 = f(x_i, t_i)
+        k2 = self.block(x + h*k1, *u[1])
+        k3 = self.block(x + h*(3/8*k1 + 1/8*k2), *u[2])
+        k4 = self.block(x + h*(8/27*k1 + 2/27*k2 + 8/27*k3), *u[3])
         k5 = self.block(x + h*((-21 + 9*q)/392*k1 +
                                           (-56 + 8*q)/392*k2 + (336 - 48*q)/392*k3 +
-                                          (-63 + 3*q)/392*k4), *args)
+                                          (-63 + 3*q)/392*k4), *u[4])
         k6 = self.block(x + h*((-1155 - 255*q)/1960*k1 +
                                           (-280-40*q)/1960*k2 - 320*q/1960*k3 +
                                           (63 + 363*q)/1960*k4 +
-                                        (2352 + 392*q)/1960*k5), *args)
+                                        (2352 + 392*q)/1960*k5), *u[5])
         k7 = self.block(x + h*((330 + 105*q)/180*k1 + 120/180*k2 +
                                           (-200 + 280*q)/180*k3 + (126 - 189*q)/180*k4 +
-                                          (-686 - 126*q)/180*k5 + (490 - 70*q)/180*k6), *args)
+                                          (-686 - 126*q)/180*k5 + (490 - 70*q)/180*k6), *u[6])
         return x + h*(1/20*k1 + 16/45*k3 + 49/180*k5 + 49/180*k6 + 1/20*k7)
 
 
-class Runge_Kutta_Fehlberg(Integrator):
+class Runge_Kutta_Fehlberg(ExplicitIntegrator):
     """
     The Runge–Kutta–Fehlberg method has two methods of orders 5 and 4. Therefore, we can calculate the local truncation error to
     determine if current time step size is suitable or not.
     # https://en.wikipedia.org/wiki/Runge%E2%80%93Kutta_methods#Adaptive_Runge%E2%80%93Kutta_methods
+
+    With adaptive=True every step of size h is integrated with substeps whose sizes are controlled per batch element
+    by the local error estimate, with a PI step size controller. Rejected substeps are masked out, so each trajectory
+    takes only the substeps its error tolerance requires. The controller is not differentiated, while the accepted
+    states remain differentiable with respect to the block parameters and inputs. When gradients are enabled,
+    accepted substeps are evaluated a second time for the graph, with rejected elements masked out.
+    The local error estimates of the accepted substeps of every step are summed in local_error.
     """
 
-    def __init__(self, block, interp_u=None, h=1.0):
+    stage_offsets = (0., 1/4, 3/8, 12/13, 1., 1/2)
+    sync_interval = 8  # substeps between checks whether all adaptive steps are complete
+
+    def __init__(self, block, interp_u=None, h=1.0, adaptive=False, rtol=1e-6, atol=1e-8, max_substeps=100,
+                 safety=0.9, pi_gains=(0.7, 0.4)):
         """
 
         :param block: (nn.Module) A state transition model.
         :param h: (float) integration step size
+        :param adaptive: (bool) Whether to integrate each step with error controlled substeps
+        :param rtol: (float) Relative tolerance of the local error of adaptive substeps
+        :param atol: (float) Absolute tolerance of the local error of adaptive substeps
+        :param max_substeps: (int) Budget of substep attempts per step. The last attempt completes the step regardless of its error
+        :param safety: (float) Safety factor of the step size controller
+        :param pi_gains: (tuple of float) Integral and proportional gains of the step size controller, divided by the
+                         order 5 of the error estimate
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
         self.local_error = []
+        self.adaptive, self.rtol, self.atol = adaptive, rtol, atol
+        self.max_substeps, self.safety, self.pi_gains = max_substeps, safety, pi_gains
+        if adaptive:
+            self.stage_offsets = None  # substeps hold the inputs of the step
 
-    def integrate(self, x, *args):
+    def fehlberg(self, x, h, u):
         """
-
         :param x: (torch.Tensor, shape=[batchsize, SysDim])
-        :return x_{t+1}: (torch.Tensor, shape=[batchsize, SysDim])
-        """
-        h = self.h
-        k1 = self.block(x, *args)
-        k2 = self.block(x + h*k1/4, *args)
-        k3 = self.block(x + 3 * h * k1 / 32 + 9 * h * k2 / 32, *args)
-        k4 = self.block(x + h * k1 * 1932 / 2197 - 7200 / 2197 * h * k2 + 7296 / 2197 * h * k3, *args)
-        k5 = self.block(x + h * k1 * 439 / 216 - 8 * h * k2 + 3680 / 513 * h * k3 - 845 / 4104 * h * k4, *args)
+        :param h: (float or torch.Tensor, shape=[batchsize, 1]) step size
+        :param u: (list of tuples of torch.Tensor) exogenous inputs of every block evaluation
+        :return: (torch.Tensor, torch.Tensor) 5th and 4th order estimates of x_{t+h}
+        """
+        k1 = self.block(x, *u[0])
+        k2 = self.block(x + h*k1/4, *u[1])
+        k3 = self.block(x + 3 * h * k1 / 32 + 9 * h * k2 / 32, *u[2])
+        k4 = self.block(x + h * k1 * 1932 / 2197 - 7200 / 2197 * h * k2 + 7296 / 2197 * h * k3, *u[3])
+        k5 = self.block(x + h * k1 * 439 / 216 - 8 * h * k2 + 3680 / 513 * h * k3 - 845 / 4104 * h * k4, *u[4])
         k6 = self.block(x - 8 / 27 * h * k1 + 2 * h * k2 - 3544 / 2565 * h * k3 +
-                                   1859 / 4104 * h * k4 - 11 / 40 * h * k5, *args)
+                                   1859 / 4104 * h * k4 - 11 / 40 * h * k5, *u[5])
         x_t1_high = x + h * (
                     k1 * 16 / 135 + k3 * 6656 / 12825 + k4 * 28561 / 56430 - 9 / 50 * k5 + k6 * 2 / 55)  # high order
         x_t1_low = x + h * (k1 * 25 / 216 + k3 * 1408 / 2565 + k4 * 2197 / 4104 - 1 / 5 * k5)  # low order
+        return x_t1_high, x_t1_low
+
+    def integrate_stages(self, x, u):
+        """
+
+        :param x: (torch.Tensor, shape=[batchsize, SysDim])
+        :return x_{t+1}: (torch.Tensor, shape=[batchsize, SysDim])
+        """
+        x_t1_high, x_t1_low = self.fehlberg(x, self.h, u)
         self.local_error.append(x_t1_high - x_t1_low)
         return x_t1_high
 
+    def integrate(self, x, *args):
+        if not self.adaptive:
+            return super().integrate(x, *args)
+        return self.adaptive_step(x, args)[0]
+
+    def adaptive_step(self, x, args, dt=None):
+        """
+        Integrates a step of size h with error controlled substeps per batch element
+
+        :param x: (torch.Tensor, shape=[batchsize, SysDim])
+        :param args: (tuple of torch.Tensor) exogenous inputs held over the step
+        :param dt: (torch.Tensor, shape=[batchsize, 1]) initial substep sizes, h if None
+        :return: (torch.Tensor, torch.Tensor) x_{t+1} and the substep sizes proposed for the next step
+        """
+        shape = (x.shape[0],) + (1,) * (x.ndim - 1)
+        h = torch.as_tensor(self.h, dtype=x.dtype, device=x.device)
+        tau = x.new_zeros(shape)  # time elapsed within the step
+        dt = torch.full_like(tau, float(self.h)) if dt is None else dt
+        err_prev = torch.ones_like(tau)
+        ki, kp = self.pi_gains[0] / 5, self.pi_gains[1] / 5
+        u = [args] * len(type(self).stage_offsets)
+        error = torch.zeros_like(x)
+        for i in range(self.max_substeps):
+            with torch.no_grad():
+                active = tau < h
+                remaining = h - tau
+                last = torch.ones_like(active) if i == self.max_substeps - 1 else dt >= remaining
+                step = torch.where(last, remaining, dt)
+                x_high, x_low = self.fehlberg(x, step, u)
+                scale = self.atol + self.rtol * torch.maximum(x.abs(), x_high.abs())
+                err = ((x_high - x_low) / scale).pow(2).flatten(1).mean(1).sqrt().reshape(shape)
+                # non-finite errors are rejected with the largest shrink, finished elements do not enter the powers
+                err = torch.where(torch.isfinite(err), err, 1e10).clamp_min(1e-10)
+                err = torch.where(active, err, 1.)
+                accept = active & ((err <= 1) | (i == self.max_substeps - 1))
+                # PI control after accepted substeps, integral control after rejected ones
+                grow = (self.safety * err ** -ki * err_prev ** kp).clamp(0.2, 5.)
+                shrink = (self.safety * err ** -0.2).clamp(0.2, 1.)
+                # substeps shortened to the end of the step do not reduce the step size proposed for the next one
+                proposal = torch.where(last & (step < dt), torch.maximum(step * grow, dt), step * grow)
+                dt = torch.where(accept, proposal, torch.where(active, step * shrink, dt))
+                err_prev = torch.where(accept, err, err_prev)
+                tau = torch.where(accept, torch.where(last, h, tau + step), tau)
+            if torch.is_grad_enabled():
+                # recompute the substep with rejected elements masked to a zero step, so that their trial
+                # steps, which may overflow for stiff dynamics, do not give nan gradients
+                x_high, x_low = self.fehlberg(x, torch.where(accept, step, 0.), u)
+            error = error + torch.where(accept, x_high - x_low, 0.)
+            x = torch.where(accept, x_high, x)
+            # checking for completion synchronizes with the device, so it is only done every few substeps
+            if (i + 1) % self.sync_interval == 0 and not bool((tau < h).any()):
+                break
+        self.local_error.append(error)
+        return x, dt
+
+    def rollout(self, x0, u_seq=None, nsteps=None):
+        """
+        Integrates a whole horizon of nsteps steps from x0. Adaptive integrators carry the substep sizes of every
+        batch element over from one step to the next.
+
+        :param x0: (torch.Tensor, shape=[batchsize, SysDim]) Initial state
+        :param u_seq: (torch.Tensor, shape=[batchsize, nsteps, InDim], LinInterp_Horizon or list of those) Optional
+                      exogenous inputs passed to the block after the state
+        :param nsteps: (int) Number of steps, inferred from u_seq if None
+        :return: (torch.Tensor, shape=[batchsize, nsteps, SysDim]) States at time steps 1, ..., nsteps
+        """
+        if not self.adaptive:
+            return super().rollout(x0, u_seq, nsteps)
+        u_seq, nsteps = rollout_inputs(u_seq, nsteps)
+        if nsteps == 0:
+            return x0[:, None][:, :0]
+        u_seq = [u.u if isinstance(u, LinInterp_Horizon) else u for u in u_seq]
+        u_steps = list(zip(*[u[:, :nsteps].unbind(1) for u in u_seq])) or [()] * nsteps
+        x, dt, X = x0, None, []
+        for args in u_steps:
+            x, dt = self.adaptive_step(x, args, dt)
+            X.append(x)
+        return torch.stack(X, dim=1)
+
 
 class MultiStep_PredictorCorrector(Integrator):
+    single_step = False  # integrates a window of the last four states
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
         :param block: (nn.Module) A state transition model.
@@ -337,7 +662,9 @@ class MultiStep_PredictorCorrector(Integrator):
         return x4_corr  # (overlapse moving windows #, state dim) -> 2D tensor
 
 
-class LeapFrog(Integrator):
+class LeapFrog(ExplicitIntegrator):
+    stage_offsets = (0., 1., 0.)
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
         Leapfrog integration for ddx = f(x)
@@ -347,7 +674,7 @@ class LeapFrog(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, X, *args):
+    def integrate_stages(self, X, u):
         """
         :param X: (torch.Tensor, shape=[batchsize, 2*SysDim]) where X[:, :SysDim] = x_t and X[:, SysDim:] = \dot{x}_t
         :return X_{t+1}: (torch.Tensor, shape=[batchsize, 2*SysDim]) where X_{t+1}[:, :SysDim] = x_{t+1} and X_{t+1}[:, SysDim:] = \dot{x}_{t+1}
@@ -355,13 +682,15 @@ class LeapFrog(Integrator):
         SysDim = X.shape[-1]//2
         x = X[:, :SysDim]  # x at t = i*h
         dx = X[:, SysDim:2*SysDim]  # dx at t = i*h
-        x_1 = x + dx*self.h + 0.5*self.block(x, *args)*self.h**2  # x at t = (i + 1)*h
-        ddx_1 = self.block(x_1, *args)  # ddx at t = (i + 1)*h.
-        dx_1 = dx + 0.5*(self.block(x, *args) + ddx_1)*self.h  # dx at t = (i + 1)*h
+        x_1 = x + dx*self.h + 0.5*self.block(x, *u[0])*self.h**2  # x at t = (i + 1)*h
+        ddx_1 = self.block(x_1, *u[1])  # ddx at t = (i + 1)*h.
+        dx_1 = dx + 0.5*(self.block(x, *u[2]) + ddx_1)*self.h  # dx at t = (i + 1)*h
         return torch.cat([x_1, dx_1], dim=-1)
 
 
-class Yoshida4(Integrator):
+class Yoshida4(ExplicitIntegrator):
+    stage_offsets = (1/(4 - 2*2**(1/3)), 0.5, 1 - 1/(4 - 2*2**(1/3)))
+
     def __init__(self, block, interp_u=None, h=1.0):
         """
         4th order Yoshida integrator for ddx = f(x). One step under the 4th order Yoshida integrator requires four intermediary steps. 
@@ -371,7 +700,7 @@ class Yoshida4(Integrator):
         """
         super().__init__(block=block, interp_u=interp_u, h=h)
 
-    def integrate(self, X, *args):
+    def integrate_stages(self, X, u):
         """
         :param X: (torch.Tensor, shape=[batchsize, 2*SysDim]) where X[:, :SysDim] = x_t and X[:, SysDim:] = \dot{x}_t
         :return X_{t+1}: (torch.Tensor, shape=[batchsize, 2*SysDim]) where X_{t+1}[:, :SysDim] = x_{t+1} and X_{t+1}[:, SysDim:] = \dot{x}_{t+1}
@@ -391,13 +720,13 @@ class Yoshida4(Integrator):
         d2 = w0
         # intermediate step 1
         x_1 = x + c1*dx*self.h
-        dx_1 = dx + d1*self.block(x_1, *args)*self.h
+        dx_1 = dx + d1*self.block(x_1, *u[0])*self.h
         # intermediate step 2
         x_2 = x_1 + c2*dx_1*self.h
-        dx_2 = dx_1 + d2*self.block(x_2, *args)*self.h
+        dx_2 = dx_1 + d2*self.block(x_2, *u[1])*self.h
         # intermediate step 3
         x_3 = x_2 + c3*dx_2*self.h
-        dx_3 = dx_2 + d3*self.block(x_3, *args)*self.h
+        dx_3 = dx_2 + d3*self.block(x_3, *u[2])*self.h
         # intermediate step 4
         x_4 = x_3 + c4*dx_3*self.h
         dx_4 = dx_3
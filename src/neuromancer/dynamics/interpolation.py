@@ -16,51 +16,151 @@ class Interpolation(ABC):
 
 class LinInterp_Offline(Interpolation):
 
-    def __init__(self, t, u):
+    def __init__(self, t, u, mode='linear'):
         """
-        Offline interpolation for time series with fixed sampling rate
+        Offline interpolation for time series with uniform or non-uniform sampling. Interval coefficients are
+        computed once, and queries locate their intervals with torch.searchsorted without host synchronization.
+        Queries outside of the time base extrapolate the first or last interval, and hold the end values in 'zoh' mode.
 
-        :param t: torch.Tensor (# of timesteps, 1) time vector with fixed sampling rate and ascending order
-        :param u: torch.Tensor (# of timesteps, state dim)
+        :param t: torch.Tensor (# of timesteps, 1) or (# of timesteps,) time vector in ascending order,
+                  or (batch, # of timesteps, 1) or (batch, # of timesteps) time vectors of a batch of trajectories
+        :param u: torch.Tensor (# of timesteps, state dim) or (batch, # of timesteps, state dim)
+        :param mode: (str) 'linear', 'zoh' (zero-order hold) or 'cubic' (natural cubic spline)
         """
         super().__init__()
-        assert len(list(t.size())) == 2, 't should be a 2D torch tensor' 
-        assert len(list(u.size())) == 2, 'u should be a 2D torch tensor'
-        assert torch.diff(t).any() >= 0, 't should be ascending order'
-        self.t = t
-        self.u = u
-        # check timestep size in self.t is identical or not
+        assert mode in ['linear', 'zoh', 'cubic'], f'Unknown interpolation mode {mode}, expected "linear", "zoh" or "cubic".'
+        assert u.ndim in [2, 3], 'u should be a 2D or 3D torch tensor'
+        assert t.ndim in [1, 2, 3], 't should be a 1D, 2D or 3D torch tensor'
+        self.mode = mode
+        self.batched = u.ndim == 3 or t.ndim == 3 or (t.ndim == 2 and t.shape[-1] != 1)
+        if t.ndim == 3 or (t.ndim == 2 and not self.batched):
+            t = t[..., 0]
+        # time bases (1 or batch, # of timesteps) and values (1 or batch, # of timesteps, state dim)
+        self.t = t.reshape(-1, t.shape[-1]).contiguous()
+        self.u = u if u.ndim == 3 else u[None]
+        if not self.t.is_floating_point():
+            self.t = self.t.to(torch.get_default_dtype())
+        if not self.u.is_floating_point():
+            self.u = self.u.to(torch.get_default_dtype())
+        assert self.t.shape[-1] == self.u.shape[1], 't and u should have the same number of timesteps'
+        self.u = self.u.expand(max(self.t.shape[0], self.u.shape[0]), -1, -1)
+        assert bool((torch.diff(self.t) >= 0).all()), 't should be ascending order'
+        self.nsteps = self.t.shape[-1]
+        # coefficients of each interval side by side, gathered with a single call per query
+        self.coefficients = torch.cat(self._coefficients(), dim=-1)
+
+    def _coefficients(self):
+        """
+        :return: (list of torch.Tensor) Polynomial coefficients (1 or batch, # of intervals, state dim) of
+                 every interval, in ascending powers of the time elapsed since the start of the interval
+        """
+        if self.mode == 'zoh':
+            return [self.u]
+        if self.nsteps == 1:
+            return [self.u, torch.zeros_like(self.u)]
+        h = torch.diff(self.t).to(self.u.dtype)[..., None]
+        du = torch.diff(self.u, dim=1)
+        slopes = du / h
+        if self.mode == 'linear':
+            return [self.u[:, :-1], slopes]
+        # second derivatives of the natural spline from the tridiagonal system, by the Thomas algorithm
+        rhs = 6 * torch.diff(slopes, dim=1)
+        diag = 2 * (h[:, :-1] + h[:, 1:])
+        m = [torch.zeros_like(self.u[:, 0])]
+        c, d = [], []
+        for i in range(self.nsteps - 2):
+            lower = h[:, i] if i > 0 else torch.zeros_like(h[:, i])
+            denom = diag[:, i] - lower * (c[-1] if c else 0)
+            c.append(h[:, i + 1] / denom)
+            d.append((rhs[:, i] - lower * (d[-1] if d else 0)) / denom)
+        inner = []
+        for i in reversed(range(self.nsteps - 2)):
+            inner.append(d[i] - c[i] * (inner[-1] if inner else 0))
+        m = torch.stack(m + inner[::-1] + m, dim=1)
+        return [self.u[:, :-1],
+                slopes - h * (2 * m[:, :-1] + m[:, 1:]) / 6,
+                m[:, :-1] / 2,
+                torch.diff(m, dim=1) / (6 * h)]
+
+    def interpolation(self, tq, t=None, u=None):
+        """
+        :param tq: torch.Tensor (# of queries, 1) or (# of queries,) query times of an interpolant of a single
+                    time series. For a batch, (batch, # of queries, 1) or (batch, # of queries) query times per
+                    trajectory, or a scalar query time shared by all trajectories.
+                    The unit of tq is actual temporal unit, e.g. second, not index.
+        :return: torch.Tensor (# of queries, state dim) for a single time series,
+                 (batch, # of queries, state dim) or (batch, state dim) for a scalar query time of a batch
+        """
+        tq = torch.as_tensor(tq, device=self.t.device)
+        if self.batched:
+            shape = (-1, self.u.shape[-1]) if tq.ndim == 0 else (*tq.shape[:2], self.u.shape[-1])
+            tq = tq.reshape(1, 1) if tq.ndim == 0 else tq.reshape(tq.shape[0], -1)
+        else:
+            shape = (*tq.shape[:1], self.u.shape[-1])
+            tq = tq.reshape(1, -1)
+        tq = tq.to(self.t.dtype)
         if self.t.shape[0] == 1:
-            dt_all = torch.zeros(1, 1)
+            index = torch.searchsorted(self.t, tq.reshape(1, -1), right=True).reshape(tq.shape)
         else:
-            dt_all = torch.diff(self.t, dim=0).to(torch.float64)
-        self.dt_mean = torch.mean(dt_all)*torch.ones_like(dt_all)
+            index = torch.searchsorted(self.t, tq.expand(self.t.shape[0], -1).contiguous(), right=True)
+        nu, nbatch = self.u.shape[-1], self.coefficients.shape[0]
+        index = (index - 1).clamp(0, self.coefficients.shape[1] - 1).expand(nbatch, -1)
+        coefficients = torch.gather(self.coefficients, 1, index[..., None].expand(-1, -1, self.coefficients.shape[-1]))
+        if self.mode == 'zoh':
+            return coefficients.reshape(shape)
+        dt = (tq - torch.gather(self.t.expand(nbatch, -1), 1, index)).to(self.u.dtype)[..., None]
+        coefficients = coefficients.split(nu, dim=-1)
+        uq = coefficients[-1]
+        for c in coefficients[-2::-1]:
+            uq = c + dt * uq
+        return uq.reshape(shape)
+
+
+class LinInterp_Horizon(Interpolation):
+
+    def __init__(self, u, h=1.0):
+        """
+        Linear interpolation of exogenous inputs sampled at the time steps of a rollout. Interval increments
+        are computed once for the whole horizon, so that multi-stage integrators query inputs by step index and
+        stage offset instead of interpolating the same interval at every stage. Construct it per rollout,
+        like the data it interpolates.
+
+        :param u: torch.Tensor (batch, # of timesteps, state dim) inputs at times 0, h, 2h, ...
+                  The last sample is held after the last timestep.
+        :param h: (float) time step of the samples
+        """
+        super().__init__()
+        assert u.ndim == 3, 'u should be a 3D torch tensor'
+        self.u, self.h = u, h
+        self.du = torch.diff(u, dim=1, append=u[:, -1:])
+        self.nsteps = u.shape[1]
+
+    def step(self, i, offset=0.):
+        """
+        :param i: (int) step index
+        :param offset: (float) fraction of the step h
+        :return: torch.Tensor (batch, state dim) inputs at time (i + offset)*h
+        """
+        return torch.add(self.u[:, i], self.du[:, i], alpha=offset)
+
+    def stages(self, offsets, nsteps=None):
+        """
+        :param offsets: (tuple of float) fractions of the step h, e.g. stage_offsets of an integrator
+        :param nsteps: (int) number of steps, all timesteps if None
+        :return: torch.Tensor (# of offsets, batch, nsteps, state dim) inputs at times (i + offset)*h of every step i
+        """
+        u, du = self.u[:, :nsteps], self.du[:, :nsteps]
+        c = torch.tensor(offsets, dtype=u.dtype, device=u.device)[:, None, None, None]
+        return u + c * du
 
     def interpolation(self, tq, t=None, u=None):
         """
-        :param tq: torch.Tensor (# of timesteps, 1),
-                    The unit of tq is actual temporal unit, e.g. second, not index.
-        :return: torch.Tensor (# of timesteps, state dim)
-        """
-        # if self.t is uniformly sampled.
-        tq_ind = ((tq - self.t[0, 0])/(self.dt_mean[0, 0])).flatten()
-        lower_bound = torch.Tensor.int(torch.floor(tq_ind)).to(torch.int64)
-        upper_bound = torch.Tensor.int(torch.ceil(tq_ind)).to(torch.int64)
-        # check if the max of tq is greater than that of self.t
-        ind_max = self.u.shape[0] - 1
-        if torch.amax(upper_bound) > ind_max:
-            ind_extrap = torch.nonzero(upper_bound > ind_max)
-            lower_bound[ind_extrap] = ind_max - 1
-            upper_bound[ind_extrap] = ind_max
-        # check if the min of tq is smaller than that of self.t
-        ind_min = 0
-        if torch.amin(lower_bound) < ind_min:
-            ind_extrap = torch.nonzero(lower_bound < ind_min)
-            lower_bound[ind_extrap] = ind_min
-            upper_bound[ind_extrap] = ind_min + 1
-        distance = (tq_ind - lower_bound).unsqueeze(-1)
-        uq = distance*(self.u[upper_bound, :] - self.u[lower_bound, :]) + self.u[lower_bound, :]
-        return uq.float()
+        :param tq: scalar time, the unit of tq is actual temporal unit, e.g. second, not index.
+        :return: torch.Tensor (batch, state dim)
+        """
+        s = torch.as_tensor(tq, dtype=self.u.dtype, device=self.u.device).reshape(1) / self.h
+        i = s.floor().long().clamp(0, self.nsteps - 1)
+        return (self.u.index_select(1, i) + (s - i) * self.du.index_select(1, i))[:, 0]
 
 
 class LinInterp_Online(Interpolation):
@@ -35,12 +35,8 @@ class FunctionLibrary:
         :return: (torch.Tensor, shape=[[# of rows of X, number of functions) the 
                        functions evaluated at every single time step of the data
         """
-        output = torch.zeros(size=(x.shape[0], self.shape[0]))
-
-        for i in range(self.shape[0]):
-            output[:, i] = self.library[i](x)
-
-        return output
+        columns = [torch.as_tensor(f(x), device=x.device).expand(x.shape[0]) for f in self.library]
+        return torch.stack(columns, dim=-1).to(torch.get_default_dtype())
 
     def __str__(self):
         """
@@ -71,6 +67,15 @@ class PolynomialLibrary(FunctionLibrary):
         self.max_degree = max_degree
         lib, function_names = self.__create_library(n_features)
         super().__init__(lib, n_features, function_names)
+        # every term of degree d is a term of degree d-1 times one feature: for each degree keep the
+        # index of that lower degree term and of the feature, so evaluation is one product per degree
+        combos = [[()]]
+        self.indices = []
+        for degree in range(1, max_degree + 1):
+            combos.append(list(itertools.combinations_with_replacement(range(n_features), degree)))
+            position = {c: i for i, c in enumerate(combos[-2])}
+            self.indices.append((torch.tensor([position[c[:-1]] for c in combos[-1]], dtype=torch.long),
+                                 torch.tensor([c[-1] for c in combos[-1]], dtype=torch.long)))
 
     def __create_library(self, n_features):
         """
@@ -122,12 +127,10 @@ class PolynomialLibrary(FunctionLibrary):
         :param X: (torch.Tensor) the two-dimensional dataset to put through the library
         :return: (torch.Tensor, [# of rows of X, number of functions]) the library evaluated at X
         """
-        output = torch.ones((X.shape[0], self.shape[0]))
-        for i in range(self.shape[0]):
-            for func in self.library[i]:
-                output[:, i] *= func(X)
-
-        return output
+        terms = [torch.ones_like(X[:, :1])]
+        for lower, feature in self.indices:
+            terms.append(terms[-1].index_select(1, lower.to(X.device)) * X.index_select(1, feature.to(X.device)))
+        return torch.cat(terms, dim=-1).to(torch.get_default_dtype())
 
 
 class FourierLibrary(FunctionLibrary):
@@ -149,6 +152,7 @@ class FourierLibrary(FunctionLibrary):
         self.include_cos = include_cos
         lib, function_names = self.__create_library(n_features)
         super().__init__(lib, n_features, function_names)
+        self.frequencies = torch.arange(1, max_freq + 1)
 
     def __create_library(self, n_features):
         """
@@ -178,3 +182,15 @@ class FourierLibrary(FunctionLibrary):
         function_names = sum(sin_names, []) + sum(cos_names, [])
 
         return library, function_names
+
+    def evaluate(self, X):
+        """
+        :param X: (torch.Tensor) the two-dimensional dataset to put through the library
+        :return: (torch.Tensor, [# of rows of X, number of functions]) the library evaluated at X
+        """
+        # arguments ordered by feature, then frequency
+        args = (X[:, :, None] * self.frequencies.to(X)).reshape(X.shape[0], -1)
+        terms = ([torch.sin(args)] if self.include_sin else []) + ([torch.cos(args)] if self.include_cos else [])
+        if not terms:
+            return torch.zeros((X.shape[0], 0), device=X.device)
+        return torch.cat(terms, dim=-1).to(torch.get_default_dtype())
@@ -105,6 +105,49 @@ class GeneralNetworkedODE(ODESystem):
         self.inductive_bias = inductive_bias
  
         assert len(self.map) == len(self.agents)
+        self.compile_network()
+
+    def compile_network(self):
+        """
+        Gather the state indices of all agents of the same type and the pins of every interaction into
+        index tensors, so that a right hand side evaluation makes one vectorized call per agent type
+        and per interaction and accumulates all interactions with a single index_add.
+        Call again after changing the map, agents, or pins.
+
+        The index tensors are registered as non-persistent buffers, so that module.to(device) moves
+        them once instead of every right hand side evaluation copying them to the device of x.
+        _agent_groups and _pins hold the names of these buffers.
+        """
+        for name, _ in list(self.named_buffers(recurse=False)):
+            if name.startswith(('_agent_index_', '_send_', '_receive_')) or name in ('_agent_order', '_pin_index'):
+                delattr(self, name)
+        device = next(self.parameters(), torch.empty(0)).device
+
+        def index(name, values):
+            self.register_buffer(name, torch.as_tensor(values, dtype=torch.long, device=device), persistent=False)
+            return name
+
+        groups, positions, position = {}, [], 0
+        for idx, (agent, agent_dict) in enumerate(zip(self.agents, self.map)):
+            groups.setdefault(type(agent), []).append(idx)
+            positions.append(list(range(position, position + len(agent_dict))))
+            position += len(agent_dict)
+        self._agent_groups = [(cls, [self.agents[i] for i in idxs],
+                               index(f'_agent_index_{k}', [s for i in idxs for s in self.map[i].values()]))
+                              for k, (cls, idxs) in enumerate(groups.items())]
+        # intrinsic contributions are concatenated in agent order
+        order = [p for _, idxs in groups.items() for i in idxs for p in positions[i]]
+        index('_agent_order', torch.argsort(torch.tensor(order, dtype=torch.long)))
+
+        self._pins, senders, receivers = [], [], []
+        for k, physics in enumerate(self.couplings):
+            send = [self.map[int(pin[0])][physics.feature_name] for pin in physics.pins]
+            receive = [self.map[int(pin[1])][physics.feature_name] for pin in physics.pins]
+            self._pins.append((index(f'_send_{k}', send), index(f'_receive_{k}', receive)))
+            senders += send
+            if physics.symmetric:
+                receivers += receive
+        index('_pin_index', senders + receivers)
 
     def ode_equations(self, x, *args):
         """
@@ -129,12 +172,13 @@ class GeneralNetworkedODE(ODESystem):
         """
         Calculate and return the contribution from all agents' intrinsic physics
         """
-        dx = torch.tensor([])  # initialize empty to avoid indexing tedium
+        if not self._agent_groups:
+            return torch.tensor([])
         features = torch.cat([x, *args], dim=-1)
-        # loop over agents and calculate contribution from intrinsic physics
-        for idx, agent_dict in enumerate(self.map):
-            dx = torch.cat((dx, self.agents[idx](features[:, list(agent_dict.values())])), -1)
-        return dx
+        # one call per agent type, then restore the order of the agents
+        dx = torch.cat([cls.group_intrinsic(agents, features[:, getattr(self, idx)])
+                        for cls, agents, idx in self._agent_groups], -1)
+        return dx[:, self._agent_order]
 
     def coupling_physics(self, x, *args):
         """
@@ -144,17 +188,69 @@ class GeneralNetworkedODE(ODESystem):
         """
         dx = torch.zeros_like(x)
         features = torch.cat([x, *args], dim=-1)
-        # first loop over coupling physics listed in self.couplings
-        for physics in self.couplings:
-            # for each physics in self.couplings, loop over the pins and add contribution to dx
-            for pin in physics.pins:
-                send = self.map[pin[0]][physics.feature_name]
-                receive = self.map[pin[1]][physics.feature_name]
-                contribution = physics(features[:, [send, receive]])
-                dx[:, [send]] += contribution
-                if physics.symmetric:
-                    dx[:, [receive]] -= contribution
-        return dx   
+        sent, received = [], []
+        # evaluate each physics in self.couplings once for all of its pins
+        for physics, (send, receive) in zip(self.couplings, self._pins):
+            send, receive = getattr(self, send), getattr(self, receive)
+            if len(send) == 0:
+                continue
+            pairs = torch.stack([features[:, send], features[:, receive]], dim=-1).reshape(-1, 2)
+            contribution = physics(pairs).reshape(x.shape[0], len(send))
+            sent.append(contribution)
+            if physics.symmetric:
+                received.append(-contribution)
+        if not sent:
+            return dx
+        # senders of all physics followed by receivers of symmetric physics, matching self._pin_index
+        return dx.index_add(1, self._pin_index, torch.cat(sent + received, -1))
+
+
+def finite_difference(x, t=None):
+    """
+    Second order accurate finite difference estimate of time derivatives of sampled trajectories,
+    using central differences in the interior and one sided differences at the ends.
+
+    :param x: (torch.Tensor, shape=[nsteps, nx] or [nbatch, nsteps, nx]) sampled trajectories
+    :param t: (torch.Tensor, shape=[nsteps] or float) sample times or sampling interval. Defaults to 1.
+    :return: (torch.Tensor) derivatives with the shape of x
+    """
+    if t is None or isinstance(t, (int, float)):
+        spacing = 1. if t is None else float(t)
+    else:
+        t = torch.as_tensor(t, dtype=x.dtype, device=x.device)
+        spacing = t.item() if t.ndim == 0 else (t,)
+    return torch.gradient(x, spacing=spacing, dim=-2, edge_order=2)[0]
+
+
+def stlsq(theta, dx, threshold, alpha=0., max_iter=10):
+    """
+    Sequentially thresholded least squares. Alternates ridge regression of dx on the active library
+    terms with removal of terms whose coefficients are smaller than threshold, until the active
+    set no longer changes. The regressions of all states are solved together as one batched
+    linear system, with inactive terms pinned to zero.
+
+    :param theta: (torch.Tensor, shape=[nsamples, nterms]) library evaluated at the samples
+    :param dx: (torch.Tensor, shape=[nsamples, nx]) time derivatives at the samples
+    :param threshold: (float) coefficients with smaller magnitude are set to zero
+    :param alpha: (float) ridge regularization
+    :param max_iter: (int) maximum number of thresholding iterations
+    :return: (torch.Tensor, shape=[nterms, nx]) sparse coefficients
+    """
+    theta, dx = theta.double(), dx.double()
+    nterms = theta.shape[1]
+    gram, rhs = theta.T @ theta, (theta.T @ dx).T
+    eye = torch.eye(nterms, dtype=theta.dtype, device=theta.device)
+    active = torch.ones(dx.shape[1], nterms, dtype=torch.bool, device=theta.device)
+    for _ in range(max_iter):
+        mask = active.to(theta.dtype)
+        # rows and columns of inactive terms are replaced by the identity
+        A = mask[:, :, None] * gram * mask[:, None, :] + torch.diag_embed(1. - mask) + alpha * eye
+        coef = torch.linalg.solve(A, (mask * rhs)[..., None])[..., 0]
+        updated = active & (coef.abs() >= threshold)
+        if torch.equal(updated, active):
+            break
+        active = updated
+    return (coef * active).T
 
 
 class SINDy(ODESystem):
@@ -191,6 +287,29 @@ class SINDy(ODESystem):
         output = torch.matmul(lib_eval, self.coef)
         return output
 
+    def fit(self, x, dx=None, t=None, threshold=None, alpha=0., max_iter=10):
+        """
+        Fit the coefficients directly by sequentially thresholded least squares (STLSQ) regression of
+        time derivatives on the library, e.g. as a closed form solution or a warm start for training.
+
+        :param x: (torch.Tensor, shape=[nsteps, nx] or [nbatch, nsteps, nx]) sampled trajectories
+        :param dx: (torch.Tensor) time derivatives with the shape of x. Estimated from x and t by
+            finite differences if not given.
+        :param t: (torch.Tensor, shape=[nsteps] or float) sample times or sampling interval for the
+            derivative estimate. Defaults to 1.
+        :param threshold: (float) sparsity threshold, defaults to self.threshold
+        :param alpha: (float) ridge regularization
+        :param max_iter: (int) maximum number of thresholding iterations
+        :return: self, with coef set to the fitted coefficients
+        """
+        dx = finite_difference(x, t) if dx is None else dx
+        x, dx = x.reshape(-1, x.shape[-1]), dx.reshape(-1, dx.shape[-1])
+        threshold = self.threshold if threshold is None else threshold
+        with torch.no_grad():
+            coef = stlsq(self.library.evaluate(x), dx, threshold, alpha=alpha, max_iter=max_iter)
+            self.coef.copy_(coef)
+        return self
+
 
     def __str__(self):
         """
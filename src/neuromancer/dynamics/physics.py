@@ -24,6 +24,18 @@ class Agent(nn.Module, ABC):
         assert len(self.state_names) == x.shape[1]
         return self.intrinsic(x)
 
+    @classmethod
+    def group_intrinsic(cls, agents, x):
+        """
+        Intrinsic physics of several agents of this class in one call. Children whose intrinsic physics
+        vectorize over agents override this, by default each agent is evaluated separately.
+
+        :param agents: list of agents of this class
+        :param x: states of the agents side by side, in the order of agents
+        """
+        sizes = [len(agent.state_names) for agent in agents]
+        return torch.cat([agent(xi) for agent, xi in zip(agents, torch.split(x, sizes, dim=-1))], -1)
+
 ### Children:
 
 class RCNode(Agent):
@@ -48,6 +60,14 @@ class RCNode(Agent):
     def intrinsic(self, x):
         return torch.max(torch.tensor(1e-6),self.C)*self.scaling*x
 
+    @classmethod
+    def group_intrinsic(cls, agents, x):
+        if cls.intrinsic is not RCNode.intrinsic:
+            return super().group_intrinsic(agents, x)
+        C = torch.cat([torch.as_tensor(agent.C).reshape(-1).expand(len(agent.state_names)) for agent in agents])
+        scaling = torch.tensor([agent.scaling for agent in agents for _ in agent.state_names], device=x.device)
+        return torch.max(torch.tensor(1e-6), C)*scaling*x
+
 class SourceSink(Agent):
     """
     Generic Source / Sink agent. Useful for 'dummy' agents to which one can attach external signals.
@@ -63,6 +83,12 @@ class SourceSink(Agent):
     def intrinsic(self, x):
         return torch.zeros_like(x)
 
+    @classmethod
+    def group_intrinsic(cls, agents, x):
+        if cls.intrinsic is not SourceSink.intrinsic:
+            return super().group_intrinsic(agents, x)
+        return torch.zeros_like(x)
+
 ####################### COUPLING DEFINITIONS AND SPECIFICATIONS ####################
 
 class Interaction(nn.Module, ABC):
@@ -19,7 +19,7 @@ import torch.nn as nn
 import numpy as np
 import torch.nn.functional as F
 
-from neuromancer.constraint import Constraint
+from neuromancer.constraint import Constraint, LT, GT, Eq
 
 
 class AggregateLoss(nn.Module, ABC):
@@ -47,6 +47,7 @@ class AggregateLoss(nn.Module, ABC):
                             'C_violations', 'C_values', 'C_eq_violations',
                             'C_ineq_violations', 'C_eq_values', 'C_ineq_values']
         self._check_keys()
+        self.layouts = {}
 
     def _check_keys(self):
         keys = set()
@@ -68,7 +69,7 @@ class AggregateLoss(nn.Module, ABC):
             output = objective(input_dict)
             if isinstance(output, torch.Tensor):
                 output = {objective.output_keys[0]: output}
-            output_dict = {**output_dict, **output}
+            output_dict.update(output)
             loss += output_dict[objective.output_keys[0]]
         output_dict['objective_loss'] = loss
         return output_dict
@@ -81,32 +82,81 @@ class AggregateLoss(nn.Module, ABC):
         output_dict = {}
         C_values = []
         C_violations = []
-        eq_flags = []
-        for c in self.constraints:
-            # get loss, values, and violations of constraint via its forward pass
-            output = c(input_dict)
-            output_dict = {**output_dict, **output}
+        sizes = []
+        for c, output in zip(self.constraints, self.evaluate_constraints(input_dict)):
+            output_dict.update(output)
             loss += output[c.output_keys[0]]
             cvalue = output[c.output_keys[1]]
             cviolation = output[c.output_keys[2]]
-            nr_constr = math.prod(cvalue.shape[1:])
-            eq_flags += nr_constr*[str(c.comparator) == 'eq']
+            sizes.append(math.prod(cvalue.shape[1:]))
             C_values.append(cvalue.reshape(cvalue.shape[0], -1))
             C_violations.append(cviolation.reshape(cviolation.shape[0], -1))
         if self.constraints:
-            equalities_flags = np.array(eq_flags)
             # get aggregated constraints
             C_violations = torch.cat(C_violations, dim=-1)
             C_values = torch.cat(C_values, dim=-1)
+            eq_index, ineq_index = self.constraint_layout(tuple(sizes), C_values.device)
             output_dict['C_violations'] = C_violations
             output_dict['C_values'] = C_values
-            output_dict['C_eq_violations'] = C_violations[:, equalities_flags]
-            output_dict['C_ineq_violations'] = C_violations[:, ~equalities_flags]
-            output_dict['C_eq_values'] = C_values[:, equalities_flags]
-            output_dict['C_ineq_values'] = C_values[:, ~equalities_flags]
+            output_dict['C_eq_violations'] = C_violations.index_select(1, eq_index)
+            output_dict['C_ineq_violations'] = C_violations.index_select(1, ineq_index)
+            output_dict['C_eq_values'] = C_values.index_select(1, eq_index)
+            output_dict['C_ineq_values'] = C_values.index_select(1, ineq_index)
         output_dict['penalty_loss'] = loss
         return output_dict
 
+    def constraint_layout(self, sizes, device):
+        """
+        Column indices of equality and inequality constraints in the aggregated constraint tensors.
+        Cached per number of constraint rows and comparator type of each constraint and device, so that
+        replacing constraints by others with the same sizes but different comparators builds a new layout.
+
+        :param sizes: (tuple (int)) Number of constraint rows per sample for each constraint
+        :param device: (torch.device) Device of the aggregated constraint tensors
+        :return: (torch.Tensor, torch.Tensor) Index tensors of equality and inequality constraint columns
+        """
+        eq = tuple(str(c.comparator) == 'eq' for c in self.constraints)
+        key = (sizes, eq, device)
+        if key not in self.layouts:
+            eq_flags = torch.cat([torch.full((n,), flag, dtype=torch.bool) for flag, n in zip(eq, sizes)])
+            self.layouts[key] = (torch.nonzero(eq_flags).flatten().to(device),
+                                 torch.nonzero(~eq_flags).flatten().to(device))
+        return self.layouts[key]
+
+    def evaluate_constraints(self, input_dict):
+        """
+        Evaluates all constraints. Constraints with built-in comparators (LT, GT, Eq) sharing the comparator type,
+        norm, operand shapes, dtypes and devices are evaluated with a single comparator call on stacked operands.
+
+        :param input_dict: (dict {str: torch.Tensor}) Values from forward pass calculations
+        :return: (list (dict {str: torch.Tensor})) Output dictionary of each constraint
+        """
+        outputs = [None] * len(self.constraints)
+        groups = {}
+        for i, c in enumerate(self.constraints):
+            if type(c).forward is Constraint.forward and type(c.comparator) in (LT, GT, Eq) \
+                    and c.comparator.norm in (1, 2):
+                left, right = c.operands(input_dict)
+                key = (type(c.comparator), c.comparator.norm, torch.broadcast_shapes(left.shape, right.shape),
+                       left.dtype, right.dtype, left.device, right.device)
+                groups.setdefault(key, []).append((i, left, right))
+            else:
+                outputs[i] = self.constraints[i](input_dict)
+        for (_, _, shape, *_), group in groups.items():
+            if len(group) == 1:
+                i, left, right = group[0]
+                c = self.constraints[i]
+                outputs[i] = c.output(*c.comparator(left, right))
+                continue
+            comparator = self.constraints[group[0][0]].comparator
+            left = torch.stack([left.expand(shape) for _, left, _ in group])
+            right = torch.stack([right.expand(shape) for _, _, right in group])
+            _, value, violation = comparator(left, right)
+            losses = violation.reshape(len(group), -1).mean(dim=1)
+            for k, (i, _, _) in enumerate(group):
+                outputs[i] = self.constraints[i].output(losses[k], value[k], violation[k])
+        return outputs
+
     @abstractmethod
     def forward(self, input_dict):
         pass
@@ -13,6 +13,7 @@ from inspect import signature
 import torch
 import torch.nn as nn
 
+from neuromancer.system import ExecutionPlan, System
 
 
 class LitProblem(pl.LightningModule):
@@ -175,6 +176,7 @@ class Problem(nn.Module):
         self.check_overwrite = check_overwrite
         self._check_keys()
         self.problem_graph = self.graph()
+        self.plans = None
 
     def _check_keys(self):
         keys = set()
@@ -202,6 +204,8 @@ class Problem(nn.Module):
         return {f'{data["name"]}_{k}': v for k, v in output_dict.items()}
 
     def step(self, input_dict: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        if self.plans is not None:
+            return self.get_plan(input_dict)(input_dict)
         for node in self.nodes:
             output_dict = node(input_dict)
             if isinstance(output_dict, torch.Tensor):
@@ -209,6 +213,37 @@ class Problem(nn.Module):
             input_dict = {**input_dict, **output_dict}
         return input_dict
 
+    def compile_plan(self, backend=None, **kwargs):
+        """
+        Switches Problem.step to flat execution plans which resolve the input and output keys of every node
+        once into tensor slots instead of merging data dictionaries after every node.
+        A plan is built on the first step for each distinct set of data keys. Nested Systems are compiled as well.
+        Should be called again if the nodes of the problem are modified.
+
+        :param backend: (str) None for the eager plan, 'compile' for torch.compile or 'trace' for torch.jit.trace
+        :param kwargs: Keyword arguments passed to torch.compile or torch.jit.trace
+        :return: self
+        """
+        self.plans = {}
+        self.plan_backend, self.plan_kwargs = backend, kwargs
+        for node in self.nodes:
+            if isinstance(node, System):
+                node.compile_plan(backend='compile' if backend == 'compile' else None, **kwargs)
+        return self
+
+    def get_plan(self, data: Dict[str, torch.Tensor]) -> ExecutionPlan:
+        """
+        :param data: (dict {str: Tensor}) Input data of Problem.step
+        :return: (ExecutionPlan) Cached execution plan for the keys of data
+        """
+        keys = tuple(data)
+        if keys not in self.plans:
+            plan = ExecutionPlan(self.nodes, keys)
+            if self.plan_backend is not None:
+                plan.export(self.plan_backend, data, **self.plan_kwargs)
+            self.plans[keys] = plan
+        return self.plans[keys]
+
     def graph(self, include_objectives=True):
         self._check_unique_names()
         graph = pydot.Dot("problem", graph_type="digraph", splines="spline", rankdir="LR")
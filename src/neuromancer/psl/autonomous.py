@@ -20,6 +20,8 @@ class UniversalOscillator(ODE_Autonomous):
     * https://en.wikipedia.org/wiki/Harmonic_oscillator
     * https://sam-dolan.staff.shef.ac.uk/mas212/notebooks/ODE_Example.html
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1.0, 0.0]}
@@ -39,6 +41,8 @@ class Pendulum(ODE_Autonomous):
     """
     `Simple pendulum <https://docs.scipy.org/doc/scipy/reference/generated/scipy.integrate.odeint.html>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0., 1.],}
@@ -58,6 +62,8 @@ class DoublePendulum(ODE_Autonomous):
     """
     `Double Pendulum <https://scipython.com/blog/the-double-pendulum/>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [3. * self.B.core.pi / 7., 0., 3. * self.B.core.pi / 4., 0.],}
@@ -96,6 +102,8 @@ class LorenzSystem(ODE_Autonomous):
     * https://scipython.com/blog/the-lorenz-attractor/
     * https://matplotlib.org/3.1.0/gallery/mplot3d/lorenz_attractor.html
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1.0, 1.0, 1.0]}
@@ -122,6 +130,8 @@ class VanDerPol(ODE_Autonomous):
     * https://en.wikipedia.org/wiki/Van_der_Pol_oscillator
     * http://kitchingroup.cheme.cmu.edu/blog/2013/02/02/Solving-a-second-order-ode/
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1., 2.]}
@@ -143,6 +153,8 @@ class ThomasAttractor(ODE_Autonomous):
 
     * https://en.wikipedia.org/wiki/Thomas%27_cyclically_symmetric_attractor
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1., -1., 1.]}
@@ -163,6 +175,8 @@ class RosslerAttractor(ODE_Autonomous):
     """
     `Rössler attractor <https://en.wikipedia.org/wiki/R%C3%B6ssler_attractor>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0., 0., 0.]}
@@ -186,6 +200,8 @@ class LotkaVolterra(ODE_Autonomous):
     `Lotka–Volterra equations <https://en.wikipedia.org/wiki/Lotka%E2%80%93Volterra_equations>`_
     Also known as the predator–prey equations
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [5., 100.]}
@@ -208,6 +224,8 @@ class Brusselator1D(ODE_Autonomous):
     """
     `Brusselator <https://en.wikipedia.org/wiki/Brusselator>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1., 1.]}
@@ -231,6 +249,8 @@ class ChuaCircuit(ODE_Autonomous):
     * https://en.wikipedia.org/wiki/Chua%27s_circuit
     * https://www.chuacircuits.com/matlabsim.php
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0.7, 0.0, 0.0],}
@@ -255,6 +275,8 @@ class Duffing(ODE_Autonomous):
     """
     `Duffing equation <https://en.wikipedia.org/wiki/Duffing_equation>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1.0, 0.0]}
@@ -282,6 +304,8 @@ class Autoignition(ODE_Autonomous):
       "Multiscale physics of rotating detonation waves: Autosolitons and modulational instabilities,"
       Physical Review E, 2021
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1., 0.7],}
@@ -3,7 +3,7 @@ Base classes for dynamic systems.
 
 """
 
-import requests, functools, os
+import requests, functools, os, concurrent.futures
 from abc import ABC, abstractmethod
 import scipy, torch, torchdiffeq, numpy
 import numpy as np
@@ -40,6 +40,21 @@ def grad(tensor, requires_grad):
     return tensor
 
 
+def tensor(data, dtype=None, **kwargs):
+    """
+    torch.tensor which stacks sequences of batched tensors, e.g. the right hand sides of equations
+    evaluated for a batch of states, instead of failing on them.
+
+    :param data: (Tensor, ndarray, or nested sequence of numerics)
+    :param dtype: (torch.dtype) Optional data type of the output
+    """
+    if isinstance(data, (list, tuple)) and len(data) > 0 \
+            and all(isinstance(d, torch.Tensor) and d.ndim > 0 for d in data):
+        data = torch.stack(data)
+        return data if dtype is None else data.to(dtype)
+    return torch.tensor(data, dtype=dtype, **kwargs)
+
+
 class Backend:
     numpy_backend = {'odeint': functools.partial(scipy.integrate.odeint, tfirst=True),
                      'cat': numpy.concatenate,
@@ -49,7 +64,7 @@ class Backend:
                      }
     torch_backend = {'odeint': torchdiffeq.odeint,
                      'cat': torch.cat,
-                     'cast': torch.tensor,
+                     'cast': tensor,
                      'core': torch,
                      'grad': grad,
                      }
@@ -64,6 +79,44 @@ class Backend:
         for k, v in Backend.backends[backend].items():
             setattr(self, k, v)
 
+    def __reduce__(self):
+        # modules and functions are not picklable, rebuild from the backend name e.g. for process pools
+        return Backend, (self.backend,)
+
+
+class ZeroOrderHold:
+    """
+    Piecewise constant lookup of control actions by time point. Equivalent to
+    scipy.interpolate.interp1d(Time, U, kind='previous', axis=axis, fill_value='extrapolate') but returns
+    views of U in its own backend and replaces the search with index arithmetic on uniform time grids.
+    """
+
+    def __init__(self, Time, U, axis=0):
+        """
+
+        :param Time: (1-D array of timepoints)
+        :param U: (array or tensor of control actions with time along axis)
+        :param axis: (int) Time axis of U
+        """
+        Time = numpy.asarray(Time.numpy(force=True) if isinstance(Time, torch.Tensor) else Time, dtype=numpy.float64)
+        self.U = U.movedim(axis, 0) if isinstance(U, torch.Tensor) else numpy.moveaxis(numpy.asarray(U), axis, 0)
+        self.Time = Time
+        self.t0 = Time[0]
+        dt = numpy.diff(Time)
+        self.dt = dt[0] if len(dt) > 0 and dt[0] > 0 and numpy.allclose(dt, dt[0]) else None
+
+    def index(self, t):
+        t = float(t)
+        if self.dt is not None:
+            # tolerance keeps t == Time[k] from rounding down to k - 1
+            k = int(numpy.floor((t - self.t0) / self.dt + 1e-9))
+        else:
+            k = int(numpy.searchsorted(self.Time, t, side='right')) - 1
+        return min(max(k, 0), len(self.Time) - 1)
+
+    def __call__(self, t):
+        return self.U[self.index(t)]
+
 
 class EquationWrapper:
     """
@@ -78,15 +131,60 @@ class EquationWrapper:
         :param U: (2-D array of control actions)
         :param equations: (Callable) Function with signature (t, x, u)
         """
-        if backend.backend == 'numpy':
-            self.ufunc = scipy.interpolate.interp1d(Time, U, kind='previous', axis=0, fill_value='extrapolate')
-        elif backend.backend == 'torch':
-            self.ufunc = scipy.interpolate.interp1d(Time, numpy.array(U.numpy(force=True)), kind='previous', axis=0, fill_value='extrapolate')
+        self.ufunc = ZeroOrderHold(Time, U if backend.backend == 'torch' else numpy.asarray(U))
         self.equations = equations
         self.B = backend
 
     def __call__(self, t, x):
-        return self.equations(t, x, self.B.cast(self.ufunc(t)))
+        return self.equations(t, x, self.ufunc(t))
+
+
+def fixed_step_odeint(func, x0, Time, method='rk4', hold=None):
+    """
+    Explicit fixed step integration taking exactly one step per interval of the time grid, for numpy
+    arrays and torch tensors. Without step size control or dense output there is no per step solver
+    overhead, and batched right hand sides are integrated fully vectorized. Accuracy depends on the
+    grid spacing, so stiff systems such as HindmarshRose need the adaptive solvers or a finer grid.
+
+    :param func: (Callable) Right hand side with signature (t, x), or (t, x, u) if hold is given
+    :param x0: (ndarray or Tensor) Initial conditions
+    :param Time: (1D array or Tensor) Time grid
+    :param method: (str) 'rk4' for the classic fourth order Runge-Kutta method or 'euler'
+    :param hold: (Callable) Optional map from step index k to the control actions held constant over
+        [Time[k], Time[k+1]), matching the zero order hold of the adaptive solvers
+    :return: States at the time points with shape (len(Time), *x0.shape)
+    """
+    assert method in ('rk4', 'euler'), f'Unknown fixed step method {method}, use rk4 or euler'
+    core = torch if isinstance(x0, torch.Tensor) else numpy
+    cast = tensor if core is torch else numpy.asarray
+
+    def f(t, x, k):
+        dx = func(t, x) if hold is None else func(t, x, hold(k))
+        dx = dx if isinstance(dx, (numpy.ndarray, torch.Tensor)) else cast(dx)
+        return dx.reshape(x.shape)
+
+    X = [x0]
+    x = x0
+    for k in range(len(Time) - 1):
+        # numpy right hand sides may return a reused buffer, so every stage allocates its result
+        t, h = Time[k], Time[k + 1] - Time[k]
+        dx = f(t, x, k)
+        if method == 'euler':
+            x = x + h * dx
+        else:
+            incr = dx / 6
+            dx = f(t + h / 2, x + h / 2 * dx, k)
+            incr = incr + dx / 3
+            dx = f(t + h / 2, x + h / 2 * dx, k)
+            incr = incr + dx / 3
+            dx = f(t + h, x + h * dx, k)
+            x = x + h * (incr + dx / 6)
+        X.append(x)
+    return core.stack(X)
+
+
+def _simulate(system, kwargs):
+    return system.simulate(**kwargs)
 
 
 def cast_backend(method):
@@ -108,6 +206,11 @@ def cast_backend(method):
 
 
 class EmulatorBase(ABC, torch.nn.Module):
+    # Systems whose equations broadcast over a trailing batch dimension, i.e. accept x of shape (nx, ntraj)
+    # (and u of shape (nu, ntraj)) and return derivatives of shape (nx, ntraj), set this to True so batched
+    # simulations evaluate the equations once per solver call instead of once per trajectory.
+    vectorized = False
+
     def __init__(self, exclude_norms=['Time'], backend='numpy', requires_grad=False,
                  seed: Union[int,np.random._generator.Generator]=59, set_stats=True):
         """
@@ -291,6 +394,63 @@ class EmulatorBase(ABC, torch.nn.Module):
         else:
             plt.show()
 
+    def batch_equations(self, ntraj, ufunc=None):
+        """
+        Right hand side of a batch of ntraj trajectories integrated together as one flat system of
+        ntraj * nx states, so that a batched simulation is a single solver call.
+
+        :param ntraj: (int) Number of trajectories
+        :param ufunc: (Callable) Optional map from time to control actions of shape (ntraj, nu)
+        :return: (Callable) Function with signature (t, x) for odeint, which also accepts control
+            actions of shape (ntraj, nu) directly as (t, x, U) for fixed_step_odeint
+        """
+        # numpy right hand sides are written into a preallocated buffer, which odeint copies out of
+        # before the next call. The torch backend allocates to keep the autograd graph intact.
+        buffer = None
+
+        def rhs(t, x, U=None):
+            nonlocal buffer
+            X = x.reshape(ntraj, -1)
+            U = ufunc(t) if U is None and ufunc is not None else U
+            if self.B.core is numpy:
+                if buffer is None or buffer.dtype != x.dtype:
+                    buffer = numpy.empty(X.shape, dtype=x.dtype)
+                if self.vectorized:
+                    args = (t, X.T) if U is None else (t, X.T, U.T)
+                    buffer.T[...] = self.equations(*args)
+                else:
+                    for i in range(ntraj):
+                        buffer[i] = self.equations(t, X[i]) if U is None else self.equations(t, X[i], U[i])
+                return buffer.reshape(-1)
+            cast = lambda v: v.to(x.dtype) if isinstance(v, torch.Tensor) else self.B.cast(v, dtype=x.dtype)
+            U = None if U is None else cast(U)
+            if self.vectorized:
+                args = (t, X.T) if U is None else (t, X.T, U.T)
+                dx = cast(self.equations(*args)).T
+            else:
+                rows = [self.equations(t, X[i]) if U is None else self.equations(t, X[i], U[i])
+                        for i in range(ntraj)]
+                dx = self.B.core.stack([cast(r) for r in rows])
+            return dx.reshape(-1)
+        return rhs
+
+    def simulate_pool(self, processes, x0, **kwargs):
+        """
+        Simulate trajectories with individual solver calls spread over a process pool.
+
+        :param processes: (int) Number of worker processes
+        :param x0: (2D array) Stacked initial conditions with shape (ntraj, nx)
+        :param kwargs: Stacked per-trajectory (e.g. U with shape (ntraj, nsim+1, nu)) and shared simulate arguments
+        :return: (dict {str: array}) Simulations stacked along the leading trajectory dimension
+        """
+        batched = {k: v for k, v in kwargs.items() if k in ('U', 'D')}
+        shared = {k: v for k, v in kwargs.items() if k not in batched}
+        jobs = [{'x0': x0[i], **{k: v[i] for k, v in batched.items()}, **shared} for i in range(len(x0))]
+        with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+            chunksize = -(-len(jobs) // (processes or os.cpu_count() or 1))
+            sims = list(pool.map(functools.partial(_simulate, self), jobs, chunksize=chunksize))
+        return {k: sims[0][k] if k == 'Time' else numpy.stack([sim[k] for sim in sims]) for k in sims[0]}
+
     def save_random_state(self):
         """ Save random state for later use """
         self.rng_state = self.rng.bit_generator.state
@@ -332,34 +492,42 @@ class ODE_NonAutonomous(EmulatorBase):
         pass
 
     @cast_backend
-    def forward(self, x, u):
+    def forward(self, x, u, method='adaptive'):
         """
-        For compatibility with the System class for open/closed loop simulations
-
-        :param x: 2d Matrix (1, nx) # for torch backend generalize to (batchsize, nx)
-        :param t: (1, 1)
-        :param u: (1, nu)
-        :return: x_next (1, nx)
+        For compatibility with the System class for open/closed loop simulations. Steps a batch of states
+        forward by one sampling interval with the control actions held constant over the step.
+
+        :param x: 2d Matrix (batchsize, nx)
+        :param u: (batchsize, nu)
+        :param method: (str) Integration method, 'adaptive' for the adaptive solver of the backend, or the
+            fixed step 'rk4' or 'euler' methods
+        :return: x_next (batchsize, nx)
         """
-        U = self.B.cat([u, u], axis=0)
+        nbatch = x.shape[0] if len(x.shape) > 1 else 1
+        u = u.reshape(nbatch, -1)
         Time = self.B.core.arange(0, 2) * self.ts
-        equation = EquationWrapper(Time, U, self.equations, self.B)
-        if self.B.core is torch:
-            xdot = self.B.odeint(equation, x.flatten(), Time, options={"grid_points": Time, "eps": 1e-6})
+        equation = self.batch_equations(nbatch, lambda t: u)
+        if method != 'adaptive':
+            X = fixed_step_odeint(equation, x.reshape(-1), Time, method, hold=lambda k: u)
         else:
-            xdot = self.B.odeint(equation, x.flatten(), Time)
-        return xdot[-1].reshape(1, -1)
+            X = self.B.odeint(equation, x.reshape(-1), Time)
+        return X[-1].reshape(nbatch, -1)
 
     @cast_backend
-    def simulate(self, nsim=None, Time=None, ts=None, x0=None, U=None):
+    def simulate(self, nsim=None, Time=None, ts=None, x0=None, U=None, method='adaptive'):
         """
         :param nsim: (int) Number of steps for open loop response
         :param Time: (Sequence of float) Optional timesteps to integrate over.
         :param ts: (float) step size, sampling time
         :param x0: (float) state initial conditions
+        :param method: (str) Integration method, 'adaptive' for the adaptive solver of the backend, or the
+            fixed step 'rk4' or 'euler' methods taking one step per sampling interval
         :return: Dictionary containing  X, Y, U
         """
         Time, ts, x0, U = self.get_simulation_args(nsim, Time, ts, x0, U)
+        if method != 'adaptive':
+            X = fixed_step_odeint(self.equations, x0, Time, method, hold=lambda k: U[k])
+            return {'Y': X[1:], 'X': X[1:], 'U': U[1:], 'Time': Time[1:]}
         equation = EquationWrapper(Time, U, self.equations, self.B)
         if self.B.core is torch:
             X = self.B.odeint(equation, x0, Time, options={"grid_points": Time, "eps": 1e-6})
@@ -367,6 +535,45 @@ class ODE_NonAutonomous(EmulatorBase):
             X = self.B.odeint(equation, x0, Time)
         return {'Y': X[1:], 'X': X[1:], 'U': U[1:], 'Time': Time[1:]}
 
+    @cast_backend
+    def simulate_batch(self, x0=None, U=None, ntraj=1, nsim=None, Time=None, ts=None, processes=None,
+                       method='adaptive'):
+        """
+        Simulate a batch of trajectories. By default all trajectories are integrated together in a single
+        solver call, with the torch backend batching over the leading dimension of one torchdiffeq call.
+
+        :param x0: (2D array) Stacked initial conditions with shape (ntraj, nx). Sampled if not given.
+        :param U: (3D array) Stacked control actions with shape (ntraj, nsim+1, nu). Sampled if not given.
+        :param ntraj: (int) Number of trajectories, only used when neither x0 nor U is given
+        :param nsim: (int) Number of steps for open loop response
+        :param Time: (Sequence of float) Optional timesteps to integrate over.
+        :param ts: (float) step size, sampling time
+        :param processes: (int) Numpy backend only, integrate trajectories individually on a process pool
+            instead, which reproduces simulate exactly and supports equations that are not vectorized.
+        :param method: (str) Integration method, 'adaptive' for the adaptive solver of the backend, or the
+            fixed step 'rk4' or 'euler' methods taking one step per sampling interval
+        :return: Dictionary containing X, Y, U with shapes (ntraj, nsim, n) and Time with shape (nsim,)
+        """
+        ntraj = len(x0) if x0 is not None else len(U) if U is not None else ntraj
+        if nsim is None:
+            nsim = len(Time) - 1 if Time is not None else U.shape[1] - 1 if U is not None else self.nsim
+        x0 = self.B.core.stack([self.get_x0() for _ in range(ntraj)]) if x0 is None else self.B.cast(x0)
+        U = self.B.core.stack([self.get_U(nsim + 1) for _ in range(ntraj)]) if U is None else self.B.cast(U)
+        if processes is not None:
+            assert self.B.core is numpy, 'Process pool simulation requires the numpy backend'
+            return self.simulate_pool(processes, x0, U=U, nsim=nsim, Time=Time, ts=ts, method=method)
+        Time, ts, _, _ = self.get_simulation_args(nsim, Time, ts, x0[0], U[0])
+        ufunc = ZeroOrderHold(Time, U, axis=1)
+        equation = self.batch_equations(ntraj, ufunc)
+        if method != 'adaptive':
+            X = fixed_step_odeint(equation, x0.reshape(-1), Time, method, hold=lambda k: U[:, k])
+        elif self.B.core is torch:
+            X = self.B.odeint(equation, x0.reshape(-1), Time, options={"grid_points": Time, "eps": 1e-6})
+        else:
+            X = self.B.odeint(equation, x0.reshape(-1), Time)
+        X = self.B.core.swapaxes(X.reshape(len(Time), ntraj, -1), 0, 1)
+        return {'Y': X[:, 1:], 'X': X[:, 1:], 'U': U[:, 1:], 'Time': Time[1:]}
+
     @cast_backend
     def get_U(self, nsim, umin=None, umax=None, signal=None, **signal_kwargs):
         """
@@ -414,7 +621,7 @@ class ODE_Autonomous(EmulatorBase):
         return xdot[-1].reshape(1, -1)
 
     @cast_backend
-    def simulate(self, nsim=None, Time=None, ts=None, x0=None):
+    def simulate(self, nsim=None, Time=None, ts=None, x0=None, method='adaptive'):
 
         """
         :param nsim: (int) Number of steps for open loop response
@@ -422,6 +629,8 @@ class ODE_Autonomous(EmulatorBase):
         :param ts: (float) step size, sampling time
         :param Time: (Sequence of float) Optional timesteps to integrate over.
         :param x0: (float) state initial conditions
+        :param method: (str) Integration method, 'adaptive' for the adaptive solver of the backend, or the
+            fixed step 'rk4' or 'euler' methods taking one step per sampling interval
         :return: The response matrices, i.e. X
         """
         nsim = nsim if nsim is not None else self.nsim
@@ -429,9 +638,44 @@ class ODE_Autonomous(EmulatorBase):
         x0 = x0 if x0 is not None else self.x0
         Time = Time if Time is not None else self.B.core.arange(0, nsim+1) * ts
         assert x0.shape[0] % self.nx0 == 0, "Mismatch in x0 size"
-        X = self.B.odeint(self.equations, x0, Time)
+        if method != 'adaptive':
+            X = fixed_step_odeint(self.equations, x0, Time, method)
+        else:
+            X = self.B.odeint(self.equations, x0, Time)
         return {'Y': X[1:], 'X': X[1:], 'Time': Time[1:]}
 
+    @cast_backend
+    def simulate_batch(self, x0=None, ntraj=1, nsim=None, Time=None, ts=None, processes=None,
+                       method='adaptive'):
+        """
+        Simulate a batch of trajectories. By default all trajectories are integrated together in a single
+        solver call, with the torch backend batching over the leading dimension of one torchdiffeq call.
+
+        :param x0: (2D array) Stacked initial conditions with shape (ntraj, nx). Sampled if not given.
+        :param ntraj: (int) Number of trajectories, only used when x0 is not given
+        :param nsim: (int) Number of steps for open loop response
+        :param Time: (Sequence of float) Optional timesteps to integrate over.
+        :param ts: (float) step size, sampling time
+        :param processes: (int) Numpy backend only, integrate trajectories individually on a process pool
+            instead, which reproduces simulate exactly and supports equations that are not vectorized.
+        :param method: (str) Integration method, 'adaptive' for the adaptive solver of the backend, or the
+            fixed step 'rk4' or 'euler' methods taking one step per sampling interval
+        :return: Dictionary containing X, Y with shapes (ntraj, nsim, nx) and Time with shape (nsim,)
+        """
+        x0 = self.B.core.stack([self.get_x0() for _ in range(ntraj)]) if x0 is None else self.B.cast(x0)
+        nsim = nsim if nsim is not None else self.nsim
+        ts = ts if ts is not None else self.ts
+        if processes is not None:
+            assert self.B.core is numpy, 'Process pool simulation requires the numpy backend'
+            return self.simulate_pool(processes, x0, nsim=nsim, Time=Time, ts=ts, method=method)
+        Time = Time if Time is not None else self.B.core.arange(0, nsim+1) * ts
+        if method != 'adaptive':
+            X = fixed_step_odeint(self.batch_equations(len(x0)), x0.reshape(-1), Time, method)
+        else:
+            X = self.B.odeint(self.batch_equations(len(x0)), x0.reshape(-1), Time)
+        X = self.B.core.swapaxes(X.reshape(len(Time), len(x0), -1), 0, 1)
+        return {'Y': X[:, 1:], 'X': X[:, 1:], 'Time': Time[1:]}
+
 
 
 
@@ -1,11 +1,101 @@
+import hashlib
 import os
-from scipy.io import loadmat
+from scipy.io import loadmat, whosmat
 import numpy as np
 from neuromancer.psl.base import ODE_NonAutonomous, cast_backend, download
 from neuromancer.psl.signals import periodic, noise, step
 import functools
 
 
+@functools.lru_cache(maxsize=None)
+def _load_parameters(path, mtime):
+    names = [name for name, _, _ in whosmat(path) if name != 'disturb']
+    return loadmat(path, variable_names=names)
+
+
+def cache_dir():
+    """
+    Directory of the converted disturbance series, NEUROMANCER_CACHE_DIR if set and ~/.cache/neuromancer otherwise.
+    """
+    return os.environ.get('NEUROMANCER_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'neuromancer'))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_disturbances(path, mtime):
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    cache = os.path.join(cache_dir(), f'{name}_{key}_disturb.npy')
+    if not os.path.exists(cache) or os.path.getmtime(cache) < mtime:
+        disturb = loadmat(path, variable_names=['disturb'])['disturb']
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            tmp = f'{cache}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, disturb)
+            os.replace(tmp, cache)
+        except OSError:
+            return disturb
+    return np.load(cache, mmap_mode='c')
+
+
+def load_parameters(path):
+    """
+    Parameters of a building model file except for the disturbance series. Files are read once per
+    process and cached by path and modification time, so the returned dict is shared and should
+    not be modified.
+
+    :param path: (str) Path to the .mat model file
+    :return: (dict {str: np.array})
+    """
+    return _load_parameters(path, os.path.getmtime(path))
+
+
+def load_disturbances(path):
+    """
+    Disturbance series of a building model file in the dtype stored in the file. The series is
+    converted once to a .npy file in cache_dir() and memory-mapped from there, falling back to an
+    in-memory array when the cache directory is not writable. Cached by path and modification time
+    like load_parameters.
+
+    :param path: (str) Path to the .mat model file
+    :return: (np.array) Disturbances with shape (nsim, nd)
+    """
+    return _load_disturbances(path, os.path.getmtime(path))
+
+
+def linear_scan(A, b, x0, parallel=False, cat=np.concatenate):
+    """
+    States of the affine recursion x_{k+1} = A x_k + b_k over a whole horizon, batched over leading dimensions.
+
+    The sequential version steps through time with one batched product per step and is the reference.
+    The parallel version is a Hillis-Steele prefix scan: after folding x0 into b_0, level j adds
+    A^(2^j) x_{k-2^j} to every x_k, so the horizon takes log2(nsim) matrix products over all time
+    steps at once instead of nsim sequential ones. It trades a factor log2(nsim) more flops for
+    far fewer (and larger) operations and is intended for stable A, as rounding errors are
+    propagated by powers of A.
+
+    :param A: (2D array or tensor) State matrix with shape (nx, nx)
+    :param b: (array or tensor) Inputs with shape (..., nsim, nx)
+    :param x0: (array or tensor) Initial states with shape (..., nx)
+    :param parallel: (bool) Use the prefix scan instead of the sequential reference
+    :param cat: (Callable) Concatenation function of the backend
+    :return: (array or tensor) States x_1, ..., x_nsim with shape (..., nsim, nx)
+    """
+    AT = A.T
+    X = cat([(x0 @ AT)[..., None, :] + b[..., :1, :], b[..., 1:, :]], axis=-2)
+    nsim = X.shape[-2]
+    if parallel:
+        shift, P = 1, AT
+        while shift < nsim:
+            X = cat([X[..., :shift, :], X[..., shift:, :] + X[..., :-shift, :] @ P], axis=-2)
+            shift, P = 2 * shift, P @ P
+        return X
+    states = [X[..., 0, :]]
+    for k in range(1, nsim):
+        states.append(states[-1] @ AT + X[..., k, :])
+    return cat([x[..., None, :] for x in states], axis=-2)
+
+
 class BuildingEnvelope(ODE_NonAutonomous):
     """
     building envelope heat transfer model
@@ -34,7 +124,7 @@ class BuildingEnvelope(ODE_NonAutonomous):
                               constants (don't vary from system to system),
                               Meta-data (physical units, system type, etc.)
         """
-        p = loadmat(self.path)
+        p = load_parameters(self.path)
         self.p = p
         nx = p['Ad'].shape[0]
         x0 = p['x0'].reshape(nx).astype(np.float32) if self.system == 'SimpleSingleZone' else np.zeros(nx, dtype=np.float32)
@@ -48,9 +138,8 @@ class BuildingEnvelope(ODE_NonAutonomous):
         self.n_dT = p['dT_max'].shape[0]
         variables = {'x0': x0,
                      'U': self.get_U(self.nsim + 1), # control actions
-                     'D': p['disturb'][self.nsim + 1],
-                     '_D': p['disturb'],
-                     'D_obs': p['disturb'][self.nsim + 1][self.d_idx],
+                     'D': load_disturbances(self.path)[self.nsim + 1],
+                     'D_obs': load_disturbances(self.path)[self.nsim + 1][self.d_idx],
                      }
         constants = {'ts': 0.01,
                      # Heat flow equation constants
@@ -73,6 +162,15 @@ class BuildingEnvelope(ODE_NonAutonomous):
         meta = {'type': p['type'], 'HC_system': p['HC_system']}
         return variables, constants, parameters, meta
 
+    @property
+    def _D(self):
+        """
+        Full disturbance series in the dtype of the model file, memory-mapped and loaded lazily on first access.
+        Windows returned by get_D and get_D_obs are cast to float32 like the other variables.
+        """
+        D = load_disturbances(self.path)
+        return D if self.B.core is np else self.B.core.from_numpy(D)
+
     @property
     def umax(self):
         """
@@ -175,7 +273,7 @@ class BuildingEnvelope(ODE_NonAutonomous):
         Time = self.B.core.arange(0, nsim + 1) * self.ts
         return nsim, x0, U, D, Time
 
-    def simulate(self, nsim=None, U=None, D=None, x0=None, *args, **kwargs):
+    def simulate(self, nsim=None, U=None, D=None, x0=None, *args, parallel=False, **kwargs):
         """
         Simulate at a minimum needs the number of simulation steps. You can optionally supply U, D, and x0
         with or without nsim. If supplying U and D need to supply an extra time step of data.
@@ -184,19 +282,51 @@ class BuildingEnvelope(ODE_NonAutonomous):
         :param U: (2D array or tensor)
         :param D:
         :param x0:
+        :param parallel: (bool) Solve the linear dynamics with a parallel prefix scan, see linear_scan
         :return:
         """
         nsim, x, U, D, Time = self.get_simulation_args(nsim, x0, U, D)
-        X, Y = [], []
-        for k in range(nsim):
-            x, y = self.equations(x, U[k, :], D[k, :])
-            X.append(x)
-            Y.append(y - self.y_ss)
+        X, Y = self._simulate(x, U[:nsim], D[:nsim], parallel)
         Dhidden = D[1:]
         Dout = D[1:, self.d_idx]
-        out = {'X': self.B.core.stack(X), 'Y': self.B.core.stack(Y), 'U': U[1:], 'D': Dout, 'Dhidden': Dhidden, 'Time': Time[1:]}
+        out = {'X': X, 'Y': Y, 'U': U[1:], 'D': Dout, 'Dhidden': Dhidden, 'Time': Time[1:]}
         return out
 
+    def simulate_batch(self, x0=None, U=None, D=None, ntraj=1, nsim=None, parallel=False):
+        """
+        Simulate a batch of scenarios. The heat flow inputs of all scenarios and time steps are
+        computed in one vectorized call and the linear dynamics are stepped for all scenarios at once.
+
+        :param x0: (2D array) Stacked initial conditions with shape (ntraj, nx). Sampled if not given.
+        :param U: (3D array) Stacked control actions with shape (ntraj, nsim+1, nu). Sampled if not given.
+        :param D: (3D array) Stacked disturbances with shape (ntraj, nsim+1, nd). Sampled if not given.
+        :param ntraj: (int) Number of scenarios, only used when none of x0, U and D is given
+        :param nsim: (int) Number of simulation steps
+        :param parallel: (bool) Solve the linear dynamics with a parallel prefix scan, see linear_scan
+        :return: Dictionary containing X, Y, U, D, Dhidden with shapes (ntraj, nsim, n) and Time with shape (nsim,)
+        """
+        given = [v for v in (x0, U, D) if v is not None]
+        ntraj = len(given[0]) if given else ntraj
+        if nsim is None:
+            nsim = U.shape[1] - 1 if U is not None else D.shape[1] - 1 if D is not None else self.nsim
+        x0 = self.B.core.stack([self.get_x0() for _ in range(ntraj)]) if x0 is None else x0
+        U = self.B.core.stack([self.get_U(nsim + 1) for _ in range(ntraj)]) if U is None else U
+        D = self.B.core.stack([self.get_D(nsim + 1) for _ in range(ntraj)]) if D is None else D
+        Time = self.B.core.arange(0, nsim + 1) * self.ts
+        X, Y = self._simulate(x0, U[:, :nsim], D[:, :nsim], parallel)
+        return {'X': X, 'Y': Y, 'U': U[:, 1:], 'D': D[:, 1:, self.d_idx], 'Dhidden': D[:, 1:], 'Time': Time[1:]}
+
+    def _simulate(self, x0, U, D, parallel):
+        """
+        States and observations of the horizon following x0 under control actions U and disturbances D
+        with time along the second to last axis.
+        """
+        q = self.B.core.moveaxis(self.get_q(self.B.core.moveaxis(U, -1, 0)), 0, -1)
+        b = q @ self.Beta.T + D @ self.E.T + self.G.ravel()
+        X = linear_scan(self.A, b, x0, parallel=parallel, cat=self.B.cat)
+        Y = X @ self.C.T + self.F.ravel() - self.y_ss
+        return X, Y
+
 
 class LinearBuildingEnvelope(BuildingEnvelope):
 
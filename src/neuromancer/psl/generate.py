@@ -0,0 +1,145 @@
+"""
+Parallel dataset generation for PSL systems with an on-disk cache.
+
+Simulations are fanned out over a process pool. Every trajectory draws its initial condition and
+signals from its own random generator spawned from a single seed, so generated datasets do not
+depend on the number of processes. Both the statistics simulation run when constructing a system
+and generated datasets are cached on disk, keyed by system name, parameters, signal type and seed.
+"""
+
+import concurrent.futures, hashlib, json, os, pickle
+import numpy as np
+from neuromancer.psl.base import ODE_NonAutonomous
+from neuromancer.psl.signals import signals
+
+
+def _system_class(name):
+    from neuromancer.psl import systems
+    return systems[name]
+
+
+def _digest(*objects):
+    """
+    Hash of json serializable objects and arrays, used to name cache files.
+    """
+    digest = hashlib.sha1()
+    for obj in objects:
+        if isinstance(obj, dict):
+            for k in sorted(obj):
+                digest.update(k.encode())
+                digest.update(_digest(obj[k]).encode())
+        elif hasattr(obj, 'shape'):
+            array = np.ascontiguousarray(obj.numpy(force=True) if hasattr(obj, 'numpy') else obj)
+            digest.update(f'{array.shape}{array.dtype}'.encode())
+            digest.update(array)
+        else:
+            digest.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def make_system(name, seed=59, backend='numpy', cache_dir=None, **kwargs):
+    """
+    Instantiate a PSL system, loading the simulation used by set_stats from cache_dir when available.
+
+    :param name: (str) Key of the system in psl.systems
+    :param seed: (int) Random seed of the system
+    :param backend: (str) Can be 'torch' or 'numpy'
+    :param cache_dir: (str) Optional directory for the cached statistics simulation
+    :param kwargs: Further keyword arguments of the system constructor
+    :return: (EmulatorBase) System with stats set
+    """
+    system = _system_class(name)(seed=seed, backend=backend, set_stats=False, **kwargs)
+    if cache_dir is None:
+        system.set_stats()
+        return system
+    key = _digest(name, seed, backend, kwargs, system._params, system.variables, system.constants)
+    path = os.path.join(cache_dir, f'{name}_stats_{key}.pkl')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+        system.set_stats(sim={k: system.B.cast(v) for k, v in cached['sim'].items()})
+        system.restore_random_state(cached['rng_state'])
+    else:
+        system.set_stats()
+        cached = {'sim': {k: np.asarray(v) for k, v in system.stats_data.items()},
+                  'rng_state': system.rng.bit_generator.state}
+        _atomic_write(path, lambda f: pickle.dump(cached, f))
+    return system
+
+
+def _atomic_write(path, write):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+_worker_system = None
+
+
+def _init_worker(system):
+    global _worker_system
+    _worker_system = system
+
+
+def _simulate_trajectories(seeds, nsim, signal, signal_kwargs):
+    """
+    Simulate one trajectory per seed with the system of this worker.
+    """
+    system = _worker_system
+    sims = []
+    for seed in seeds:
+        system.rng = np.random.default_rng(seed)
+        kwargs = {'nsim': nsim, 'x0': system.get_x0()}
+        if isinstance(system, ODE_NonAutonomous):
+            kwargs['U'] = system.get_U(nsim + 1) if signal is None else \
+                system.get_U(nsim + 1, signal=signals[signal], **signal_kwargs)
+            if hasattr(system, 'get_D'):
+                kwargs['D'] = system.get_D(nsim + 1)
+        sims.append({k: np.asarray(v) for k, v in system.simulate(**kwargs).items()})
+    return sims
+
+
+def generate_dataset(name, ntraj, nsim, signal=None, seed=0, processes=None, cache_dir=None,
+                     signal_kwargs=None, system_kwargs=None):
+    """
+    Generate a dataset of ntraj simulations of a PSL system with the numpy backend.
+
+    :param name: (str) Key of the system in psl.systems
+    :param ntraj: (int) Number of trajectories
+    :param nsim: (int) Number of simulation steps per trajectory
+    :param signal: (str) Optional key of psl.signals.signals used to sample control actions of
+        non-autonomous systems. By default each system samples its own control actions.
+    :param seed: (int) Seed from which the random generators of the trajectories are spawned
+    :param processes: (int) Number of worker processes. Simulates in the calling process if None.
+    :param cache_dir: (str) Optional directory for cached statistics simulations and datasets
+    :param signal_kwargs: (dict) Keyword arguments of the signal
+    :param system_kwargs: (dict) Keyword arguments of the system constructor, e.g. seed of the
+        statistics simulation or building model
+    :return: (dict {str: np.array}) Trajectories stacked with shape (ntraj, nsim, n), and Time with shape (nsim,)
+    """
+    signal_kwargs, system_kwargs = signal_kwargs or {}, system_kwargs or {}
+    if cache_dir is not None:
+        key = _digest(name, ntraj, nsim, signal, seed, signal_kwargs, system_kwargs)
+        path = os.path.join(cache_dir, f'{name}_{key}.npz')
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return dict(data)
+
+    system = make_system(name, cache_dir=cache_dir, **system_kwargs)
+    seeds = np.random.SeedSequence(seed).spawn(ntraj)
+    if processes is None:
+        _init_worker(system)
+        sims = _simulate_trajectories(seeds, nsim, signal, signal_kwargs)
+    else:
+        chunks = [list(c) for c in np.array_split(np.array(seeds, dtype=object), processes) if len(c)]
+        with concurrent.futures.ProcessPoolExecutor(processes, initializer=_init_worker,
+                                                    initargs=(system,)) as pool:
+            futures = [pool.submit(_simulate_trajectories, c, nsim, signal, signal_kwargs) for c in chunks]
+            sims = [sim for future in futures for sim in future.result()]
+    data = {k: sims[0][k] if k == 'Time' else np.stack([sim[k] for sim in sims]) for k in sims[0]}
+
+    if cache_dir is not None:
+        _atomic_write(path, lambda f: np.savez(f, **data))
+    return data
@@ -10,6 +10,7 @@ import inspect, sys
 
 
 class LorenzControl(ODE):
+    vectorized = True
 
     @property
     def params(self):
@@ -56,6 +57,8 @@ class SEIR_population(ODE):
     * Infectious (i): population fraction that is infected and can infect others
     * Recovered (r): population fraction recovered from infection and is immune from further infection
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1 - 1./10000. - 0. - 0., 1./10000., 0., 0.],}  # [s0, e0, i0, r0]
@@ -111,6 +114,8 @@ class Tank(ODE):
     Single Tank model
     `Original code obtained from APMonitor <https://apmonitor.com/pdc/index.php/Main/TankLevel>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': np.array([0.]),}
@@ -144,7 +149,7 @@ class Tank(ODE):
         c = u[0]
         valve = u[1]
         dx_dt = (c / (self.rho*self.A)) * valve
-        return dx_dt
+        return [dx_dt]
 
 
 class TwoTank(ODE):
@@ -152,6 +157,8 @@ class TwoTank(ODE):
     Two Tank model.
     `Original code obtained from APMonitor <https://apmonitor.com/do/index.php/Main/LevelControl>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0., 0.],}
@@ -195,10 +202,8 @@ class TwoTank(ODE):
         valve = self.B.core.clip(u[1], 0, 1)
         dhdt1 = self.c1 * (1.0 - valve) * pump - self.c2 * self.B.core.sqrt(h1)
         dhdt2 = self.c1 * valve * pump + self.c2 * self.B.core.sqrt(h1) - self.c2 * self.B.core.sqrt(h2)
-        if h1 >= 1.0 and dhdt1 > 0.0:
-            dhdt1 = 0
-        if h2 >= 1.0 and dhdt2 > 0.0:
-            dhdt2 = 0
+        dhdt1 = self.B.core.where((h1 >= 1.0) & (dhdt1 > 0.0), 0., dhdt1)
+        dhdt2 = self.B.core.where((h2 >= 1.0) & (dhdt2 > 0.0), 0., dhdt2)
         dhdt = [dhdt1, dhdt2]
         return dhdt
 
@@ -208,6 +213,8 @@ class CSTR(ODE):
     Continuous Stirred Tank Reactor model
     `Original code obtained from APMonitor <http://apmonitor.com/do/index.php/Main/NonlinearControl>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0.87725294608097, 324.475443431599],}  # [Ca, T] Steady State Initial Condition for the Uncontrolled Inputs}
@@ -257,7 +264,7 @@ class CSTR(ODE):
             * Concentration of A in CSTR (mol/m^3)
             * Temperature in CSTR (K)
         """
-        Tc = u  # Temperature of cooling jacket (K)
+        Tc = u[0]  # Temperature of cooling jacket (K)
         Ca = x[0]  # Concentration of A in CSTR (mol/m^3)
         T = x[1]  # Temperature in CSTR (K)
         rA = self.k0 * self.B.core.exp(-self.EoverR / T) * Ca  # reaction rate
@@ -276,6 +283,8 @@ class InvPendulum(ODE):
     * input: u = input torque
 
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0.5, 0.]}
@@ -297,8 +306,8 @@ class InvPendulum(ODE):
     @cast_backend
     def equations(self, t, x, u):
         y = [x[1],
-             (self.m * self.g * self.L * np.sin(x[0]) - self.b * x[1]) / (self.m * self.L ** 2)]
-        y[1] = y[1] + (u / (self.m * self.L ** 2))
+             (self.m * self.g * self.L * self.B.core.sin(x[0]) - self.b * x[1]) / (self.m * self.L ** 2)]
+        y[1] = y[1] + (u[0] / (self.m * self.L ** 2))
         return y
 
 
@@ -309,6 +318,8 @@ class HindmarshRose(ODE):
     * https://en.wikipedia.org/wiki/Hindmarsh%E2%80%93Rose_model
     * https://demonstrations.wolfram.com/HindmarshRoseNeuronModel/
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [-5., -10., 0.]}
@@ -334,7 +345,7 @@ class HindmarshRose(ODE):
     def equations(self, t, x, u):
         theta = -self.a*x[0]**3 + self.b*x[0]**2
         phi = self.c -self.d*x[0]**2
-        dx1 = x[1] + theta - x[2] + u
+        dx1 = x[1] + theta - x[2] + u[0]
         dx2 = phi - x[1]
         dx3 = self.r*(self.s*(x[0]-self.xR)-x[2])
         dx = [dx1, dx2, dx3]
@@ -348,6 +359,8 @@ class IverSimple(ODE):
     control surface deflections/propeller thrust, and actuator dynamics
     with non-kinematic output
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0., 0., 0.01, 0., 0., 0., 0., 0.]}
@@ -394,17 +407,14 @@ class IverSimple(ODE):
         delta_qc = u[1]
         delta_rc = u[2]
 
-        dx_dt = np.zeros(8)  # Kinematics:
-        dx_dt[0] = q
-        dx_dt[1] = r / (np.cos(theta))
-
-        dx_dt[2] = self.Xuu*(uu**2) + self.k*delta_u  # Dynamics
-        dx_dt[3] = self.Muq*uu*q + self.Mq*q - self.Bz*np.sin(theta) + self.b*(uu**2)*delta_q
-        dx_dt[4] = self.Nur*uu*r + self.c*(uu**2)*delta_r
-
-        dx_dt[5] = self.K_delta_u*( delta_u - delta_uc )  # Actuator dynamics
-        dx_dt[6] = self.K_delta_q*( delta_q - delta_qc )
-        dx_dt[7] = self.K_delta_r*( delta_r - delta_rc )
+        dx_dt = [q,  # Kinematics:
+                 r / (self.B.core.cos(theta)),
+                 self.Xuu*(uu**2) + self.k*delta_u,  # Dynamics
+                 self.Muq*uu*q + self.Mq*q - self.Bz*self.B.core.sin(theta) + self.b*(uu**2)*delta_q,
+                 self.Nur*uu*r + self.c*(uu**2)*delta_r,
+                 self.K_delta_u*( delta_u - delta_uc ),  # Actuator dynamics
+                 self.K_delta_q*( delta_q - delta_qc ),
+                 self.K_delta_r*( delta_r - delta_rc )]
 
         return dx_dt
 
@@ -415,6 +425,8 @@ class Actuator(ODE):
     Since the equations are linear they are a good sanity check for your modeling implementations.
     """
 
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [0., 0., 0.]}
@@ -450,10 +462,9 @@ class Actuator(ODE):
         delta_rc = u[2]
 
         # Actuator dynamics:
-        dx_dt = np.zeros(3)
-        dx_dt[0] = self.K_delta_u * (delta_u - delta_uc)
-        dx_dt[1] = self.K_delta_q * (delta_q - delta_qc)
-        dx_dt[2] = self.K_delta_r * (delta_r - delta_rc)
+        dx_dt = [self.K_delta_u * (delta_u - delta_uc),
+                 self.K_delta_q * (delta_q - delta_qc),
+                 self.K_delta_r * (delta_r - delta_rc)]
 
         return dx_dt
 
@@ -463,6 +474,8 @@ class SwingEquation(ODE):
     `Power Grid Swing Equation. <https://en.wikipedia.org/wiki/Swing_equation>`_
     The second-order swing equation is converted to two first-order ODEs
     """
+    vectorized = True
+
     @property
     def params(self):
         Pm = 0.8
@@ -502,7 +515,7 @@ class SwingEquation(ODE):
         Pm = u[0]
         Pmax = self.Pmax
         dx_dt = [self.ws * domega,
-                 (Pm - Pmax * np.sin(delta) - self.D * domega) / self.M]
+                 (Pm - Pmax * self.B.core.sin(delta) - self.D * domega) / self.M]
         return dx_dt
 
 
@@ -511,6 +524,8 @@ class DuffingControl(ODE):
     Duffing equation with driving force as a function of control inputs not time
     `Source <https://en.wikipedia.org/wiki/Duffing_equation>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1., 0.],
@@ -539,7 +554,7 @@ class DuffingControl(ODE):
     def equations(self, t, x, u):
         dx1 = x[1]
         dx2 = - self.delta*x[1] - self.alpha*x[0] - self.beta*x[0]**3 + \
-              self.gamma*np.cos(self.omega*u[0])
+              self.gamma*self.B.core.cos(self.omega*u[0])
         dx = [dx1, dx2]
         return dx
 
@@ -552,6 +567,8 @@ class VanDerPolControl(ODE):
     * http://kitchingroup.cheme.cmu.edu/blog/2013/02/02/Solving-a-second-order-ode/
     * section V.A in: https://arxiv.org/abs/2203.14114
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': self.rng.standard_normal(2),
@@ -584,6 +601,8 @@ class ThomasAttractorControl(ODE):
     control input: dissipativity parameter b
     `Source <https://en.wikipedia.org/wiki/Thomas%27_cyclically_symmetric_attractor>`_
     """
+    vectorized = True
+
     @property
     def params(self):
         variables = {'x0': [1., -1., 1.]}
@@ -602,9 +621,9 @@ class ThomasAttractorControl(ODE):
     @cast_backend
     def equations(self, t, x, u):
         b = u[0]
-        dx1 = np.sin(x[1]) - b*x[0]
-        dx2 = np.sin(x[2]) - b*x[1]
-        dx3 = np.sin(x[0]) - b*x[2]
+        dx1 = self.B.core.sin(x[1]) - b*x[0]
+        dx2 = self.B.core.sin(x[2]) - b*x[1]
+        dx3 = self.B.core.sin(x[0]) - b*x[2]
         dx = [dx1, dx2, dx3]
         return dx
 
@@ -70,6 +70,126 @@ class Node(nn.Module):
         return f"{self.name}({', '.join(self.input_keys)}) -> {', '.join(self.output_keys)}"
 
 
+EMPTY = object()  # marks execution plan slots which have not been written by any node
+
+
+def is_node(node):
+    """
+    :param node: (nn.Module) Node-like object with input_keys and output_keys
+    :return: (bool) True if node dispatches positional tensors to its callable through Node.forward
+    """
+    return isinstance(node, Node) and type(node).forward is Node.forward
+
+
+class ExecutionPlan:
+    """
+    Flat execution plan for an ordered list of nodes. Input and output keys of every node are resolved
+    once into integer slots of a list of tensors, so that execution does not rebuild or merge
+    data dictionaries after every node. Produces the same dictionary as merging
+    node outputs into the input data one node at a time.
+    """
+    def __init__(self, nodes, input_keys):
+        """
+
+        :param nodes: (list of Node-like objects) Nodes in order of execution
+        :param input_keys: (list of str) Keys of the data dictionary the plan will be executed on
+        """
+        self.input_keys = list(input_keys)
+        index = {k: i for i, k in enumerate(self.input_keys)}
+        self.steps = []
+        for node in nodes:
+            direct = is_node(node)
+            if direct:
+                in_slots = [index[k] for k in node.input_keys]
+                out_keys = node.output_keys
+            else:
+                in_slots = list(index.values())
+                out_keys = list(node.output_keys) + [node.name]
+            for k in out_keys:
+                index.setdefault(k, len(index))
+            out_slots = [index[k] for k in out_keys]
+            self.steps.append((direct, node, in_slots, out_slots))
+        self.keys = list(index)
+        self.index = index
+        self.runner = self.run
+
+    def run(self, *inputs):
+        """
+        Executes the plan on a flat list of values ordered as self.input_keys
+
+        :param inputs: Values of self.input_keys
+        :return: (list) Values of all slots ordered as self.keys
+        """
+        slots = list(inputs) + [EMPTY] * (len(self.keys) - len(inputs))
+        for direct, node, in_slots, out_slots in self.steps:
+            if direct:
+                output = node.callable(*[slots[i] for i in in_slots])
+                if not isinstance(output, tuple):
+                    output = [output]
+                for i, v in zip(out_slots, output):
+                    slots[i] = v
+            else:
+                output = node({self.keys[i]: slots[i] for i in in_slots if slots[i] is not EMPTY})
+                if isinstance(output, torch.Tensor):
+                    output = {node.name: output}
+                for k, v in output.items():
+                    if k not in self.index:
+                        raise ValueError(f'Node {node.name} returned key {k} which is not in its output_keys '
+                                         f'{list(node.output_keys)}. Declare it to use the node in an execution plan.')
+                    slots[self.index[k]] = v
+        return slots
+
+    def __call__(self, data):
+        """
+
+        :param data: (dict {str: Tensor}) Data dictionary with keys self.input_keys
+        :return: (dict {str: Tensor}) Data dictionary updated with outputs of all nodes
+        """
+        slots = self.runner(*[data[k] for k in self.input_keys])
+        return {k: v for k, v in zip(self.keys, slots) if v is not EMPTY}
+
+    def export(self, backend='compile', data=None, **kwargs):
+        """
+        Exports the plan to a compiled runner used by subsequent calls.
+
+        :param backend: (str) 'compile' for torch.compile or 'trace' for TorchScript tracing with torch.jit.trace
+        :param data: (dict {str: Tensor}) Example data required for tracing. Non-tensor values are frozen as constants
+        :param kwargs: Keyword arguments passed to torch.compile or torch.jit.trace
+        :return: self
+        """
+        if backend == 'compile':
+            self.runner = torch.compile(self.run, **kwargs)
+        elif backend == 'trace':
+            assert data is not None, 'Tracing an execution plan requires example data.'
+            inputs = [data[k] for k in self.input_keys]
+            tensor_idx = [i for i, v in enumerate(inputs) if isinstance(v, torch.Tensor)]
+            slots = self.run(*inputs)
+            out_idx = [i for i, v in enumerate(slots) if isinstance(v, torch.Tensor)]
+
+            def run_tensors(*tensors):
+                values = list(inputs)
+                for i, v in zip(tensor_idx, tensors):
+                    values[i] = v
+                slots = self.run(*values)
+                return tuple(slots[i] for i in out_idx)
+
+            module = nn.Module()
+            module.nodes = nn.ModuleList([node for _, node, _, _ in self.steps])
+            module.forward = run_tensors
+            traced = torch.jit.trace(module, tuple(inputs[i] for i in tensor_idx), **kwargs)
+
+            def runner(*inputs):
+                outputs = traced(*[inputs[i] for i in tensor_idx])
+                slots = list(inputs) + [EMPTY] * (len(self.keys) - len(inputs))
+                for i, v in zip(out_idx, outputs):
+                    slots[i] = v
+                return slots
+            self.runner = runner
+        else:
+            raise ValueError(f'Unknown execution plan backend {backend}, expected "compile" or "trace".')
+        return self
+
+
 class MovingHorizon(nn.Module):
     """
     The MovingHorizon class buffers single time step inputs for time-delay modeling from past ndelay
@@ -110,7 +230,7 @@ class System(nn.Module):
     """
     Simple implementation for arbitrary cyclic computation
     """
-    def __init__(self, nodes, name=None, nstep_key='X', init_func=None, nsteps=None):
+    def __init__(self, nodes, name=None, nstep_key='X', init_func=None, nsteps=None, delegate_rollout=False):
         """
 
         :param nodes: (list of Node objects)
@@ -118,16 +238,21 @@ class System(nn.Module):
         :param nstep_key: (str) Key is used to infer number of rollout steps from input_data
         :param init_func: (callable(input_dict) -> input_dict) This function is used to set initial conditions of the system
         :param nsteps: (int) prediction horizon (rollout steps) length
+        :param delegate_rollout: (bool) Delegate the rollout of a system made of a single integrator node to
+                                 Integrator.rollout, see System.integrator_node. The node is then not called
+                                 at every step, so overrides and hooks of the node are bypassed.
         """
         super().__init__()
         self.nstep_key = nstep_key
         self.nsteps = nsteps
+        self.delegate_rollout = delegate_rollout
         self.nodes, self.name = nn.ModuleList(nodes), name
         if init_func is not None:
             self.init = init_func
         self.input_keys = set().union(*[c.input_keys for c in nodes])
         self.output_keys = set().union(*[c.output_keys for c in nodes])
         self.system_graph = self.graph()
+        self.plan = None
 
     def graph(self):
         self._check_unique_names()
@@ -263,12 +388,169 @@ class System(nn.Module):
         data = input_dict.copy()
         nsteps = self.nsteps if self.nsteps is not None else data[self.nstep_key].shape[1]  # Infer number of rollout steps
         data = self.init(data)  # Set initial conditions of the system
+        if self.delegate_rollout and type(self).cat is System.cat:
+            node = self.integrator_node(data, nsteps)
+            if node is not None:
+                return self.integrator_rollout(node, data, nsteps)
+        self.check_interpolated(data)
+        if type(self).cat is not System.cat:
+            return self.cat_rollout(data, nsteps)
+        if self.plan is not None:
+            return self.stack(data, self.rollout(data, nsteps))
+        steps = {}  # per-step node outputs, stacked once after the rollout
+        for i in range(nsteps):
+            for node in self.nodes:
+                indata = {k: self.step_data(data, steps, k, i) for k in node.input_keys}  # collect what the compute node needs from data nodes
+                outdata = node(indata)  # compute
+                for k, v in outdata.items():  # feed the data nodes
+                    steps.setdefault(k, []).append(v)
+        return self.stack(data, steps)  # return recorded system measurements
+
+    def cat_rollout(self, data, nsteps):
+        """
+        Rollout which feeds node outputs back to the data with System.cat after every node call.
+        Used instead of stacking the rollout once for subclasses which override System.cat.
+
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        :param nsteps: (int) Number of rollout steps
+        :return: (dict: {str: Tensor})
+        """
         for i in range(nsteps):
             for node in self.nodes:
                 indata = {k: data[k][:, i] for k in node.input_keys}  # collect what the compute node needs from data nodes
                 outdata = node(indata)  # compute
                 data = self.cat(data, outdata)  # feed the data nodes
-        return data  # return recorded system measurements
+        return data
+
+    def integrator_node(self, data, nsteps):
+        """
+        Detects systems made of a single Node which advances its first input key with a single step
+        integrator, e.g. Node(integrator, ['xn', 'U'], ['xn']), so that the rollout can be delegated to Integrator.rollout.
+        Exogenous inputs of such systems may also be given as LinInterp_Horizon to interpolate them within steps.
+
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        :param nsteps: (int) Number of rollout steps
+        :return: (Node or None) The integrator node, or None if the rollout must step through the nodes
+        """
+        from neuromancer.dynamics.integrators import Integrator
+        from neuromancer.dynamics.interpolation import LinInterp_Horizon
+        if len(self.nodes) != 1:
+            return None
+        node = self.nodes[0]
+        if not (is_node(node) and isinstance(node.callable, Integrator) and node.callable.single_step):
+            return None
+        state, inputs = node.input_keys[0], node.input_keys[1:]
+        if list(node.output_keys) != [state] or state in inputs or data[state].shape[1] != 1:
+            return None
+        if not all(data[k].nsteps >= nsteps if isinstance(data[k], LinInterp_Horizon)
+                   else data[k].ndim == 3 and data[k].shape[1] >= nsteps for k in inputs):
+            return None
+        return node
+
+    def check_interpolated(self, data):
+        """
+        Interpolated inputs can not be indexed by time step, so they are only supported by rollouts
+        delegated to Integrator.rollout.
+
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        """
+        if all(isinstance(v, torch.Tensor) for v in data.values()):
+            return
+        from neuromancer.dynamics.interpolation import LinInterp_Horizon
+        keys = [k for k, v in data.items() if isinstance(v, LinInterp_Horizon)]
+        if keys:
+            raise ValueError(f'Inputs {keys} given as LinInterp_Horizon require a System with delegate_rollout=True '
+                             f'made of a single integrator node whose inputs cover the rollout, '
+                             f'see System.integrator_node.')
+
+    def integrator_rollout(self, node, data, nsteps):
+        """
+        Rollout of a single integrator node with Integrator.rollout, equivalent to stepping the node nsteps times
+
+        :param node: (Node) Node returned by System.integrator_node
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        :param nsteps: (int) Number of rollout steps
+        :return: (dict: {str: Tensor})
+        """
+        state = node.input_keys[0]
+        X = node.callable.rollout(data[state][:, 0], [data[k] for k in node.input_keys[1:]], nsteps)
+        data[state] = torch.cat([data[state], X], dim=1)
+        return data
+
+    def compile_plan(self, backend=None, **kwargs):
+        """
+        Resolves the dispatch of every node once so that the rollout calls Node callables
+        directly on positional tensors instead of building input and output dictionaries at every step.
+        Should be called again if the nodes of the system are modified.
+
+        :param backend: (str) None for the eager plan or 'compile' to wrap the rollout with torch.compile
+        :param kwargs: Keyword arguments passed to torch.compile
+        :return: self
+        """
+        self.plan = [(True, node.callable, list(node.input_keys), list(node.output_keys)) if is_node(node)
+                     else (False, node, list(node.input_keys), list(node.output_keys)) for node in self.nodes]
+        if backend is None:
+            self.rollout = self.plan_rollout
+        elif backend == 'compile':
+            self.rollout = torch.compile(self.plan_rollout, **kwargs)
+        else:
+            raise ValueError(f'Unknown system plan backend {backend}, expected None or "compile".')
+        return self
+
+    def plan_rollout(self, data, nsteps):
+        """
+        Rollout of the compiled node plan
+
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        :param nsteps: (int) Number of rollout steps
+        :return: (dict {str: list of Tensors}) (batch, dim) node outputs appended during the rollout
+        """
+        steps = {}
+        for i in range(nsteps):
+            for direct, func, input_keys, output_keys in self.plan:
+                inputs = [self.step_data(data, steps, k, i) for k in input_keys]
+                if direct:
+                    output = func(*inputs)
+                    if not isinstance(output, tuple):
+                        output = [output]
+                    output = zip(output_keys, output)
+                else:
+                    output = func(dict(zip(input_keys, inputs))).items()
+                for k, v in output:
+                    steps.setdefault(k, []).append(v)
+        return steps
+
+    @staticmethod
+    def step_data(data, steps, key, i):
+        """
+        Reads time step i of key from the rollout without materializing the concatenated trajectory.
+        Time index i refers to the (batch, time, dim) tensor which System.cat would have produced so far.
+
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        :param steps: (dict {str: list of Tensors}) (batch, dim) node outputs appended during the rollout
+        :param key: (str) Data key to read
+        :param i: (int) Time index
+        :return: (Tensor) (batch, dim) slice at time index i
+        """
+        if key in steps:
+            offset = data[key].shape[1] if key in data else 0
+            if i >= offset:
+                return steps[key][i - offset]
+        return data[key][:, i]
+
+    def stack(self, data, steps):
+        """
+        Stacks the per-step node outputs along the time dimension and appends them
+        to the corresponding entries in data. Equivalent to calling System.cat once per step.
+
+        :param data: (dict {str: Tensor}) Initial (batch, time, dim) data of the rollout
+        :param steps: (dict {str: list of Tensors}) (batch, dim) node outputs appended during the rollout
+        :return: (dict: {str: Tensor})
+        """
+        for k, v in steps.items():
+            v = torch.stack(v, dim=1)
+            data[k] = torch.cat([data[k], v], dim=1) if k in data else v
+        return data
 
     def freeze(self):
         """
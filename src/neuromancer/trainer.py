@@ -2,6 +2,10 @@
 
 
 """
+import os
+import shutil
+import tempfile
+import weakref
 from copy import deepcopy
 
 import torch
@@ -27,6 +31,104 @@ def move_batch_to_device(batch, device="cpu"):
     return {k: v.to(device) if isinstance(v, torch.Tensor) else v for k, v in batch.items()}
 
 
+class RunningMean:
+    """
+    Accumulates a detached running sum of per-batch metrics so that epoch means do not keep
+    every per-batch loss tensor alive until the end of the epoch.
+    """
+    def __init__(self):
+        self.total, self.count = 0., 0
+
+    def append(self, value):
+        self.total = self.total + value.detach()
+        self.count += 1
+
+    def mean(self):
+        return self.total / self.count
+
+
+class BestModel:
+    """
+    Snapshot of the best model state dict kept in buffers which are allocated once and updated in place,
+    instead of deep copying the state dict at every improvement of the evaluation metric.
+    Optionally the buffers are memory-mapped files on disk so that the snapshot does not occupy RAM or device memory.
+    """
+    def __init__(self, model, path=None):
+        """
+
+        :param model: (nn.Module) Model to track
+        :param path: (str) Optional directory for memory-mapped snapshot buffers. Every snapshot maps one file
+                     per dtype in its own temporary subdirectory, which is removed with the snapshot
+        """
+        self.model, self.path = model, path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self.path = tempfile.mkdtemp(prefix='best_model_', dir=path)
+            weakref.finalize(self, shutil.rmtree, self.path, True)
+        self.state = {}
+        self.allocate(model.state_dict())
+        self.update()
+
+    def allocate(self, state):
+        """
+        Allocates snapshot buffers matching the tensors of a state dict.
+
+        :param state: (dict {str: Tensor}) State dict of the tracked model
+        """
+        tensors = {k: v for k, v in state.items() if isinstance(v, torch.Tensor)}
+        if self.path is None:
+            self.state = {k: torch.empty_like(v, memory_format=torch.contiguous_format) for k, v in tensors.items()}
+            return
+        for dtype in {v.dtype for v in tensors.values()}:
+            group = {k: v for k, v in tensors.items() if v.dtype == dtype}
+            numel = max(sum(v.numel() for v in group.values()), 1)
+            filename = os.path.join(self.path, f'{str(dtype).split(".")[-1]}.bin')
+            storage = torch.from_file(filename, shared=True, size=numel, dtype=dtype)
+            itemsize = torch.empty((), dtype=dtype).element_size()
+            if os.path.getsize(filename) != numel * itemsize:
+                raise RuntimeError(f'Snapshot file {filename} does not match the size of the tracked model.')
+            offset = 0
+            for k, v in group.items():
+                self.state[k] = storage[offset:offset + v.numel()].view(v.shape)
+                offset += v.numel()
+        self.state = {k: self.state[k] for k in tensors}
+
+    def update(self):
+        """
+        Copies the current state of the tracked model into the snapshot buffers in place.
+        Entries whose shape, dtype, or device changed since allocation are replaced by a fresh copy.
+        """
+        for k, v in self.model.state_dict().items():
+            buffer = self.state.get(k)
+            if not isinstance(v, torch.Tensor):
+                self.state[k] = deepcopy(v)
+            elif buffer is None or buffer.shape != v.shape or buffer.dtype != v.dtype \
+                    or (self.path is None and buffer.device != v.device):
+                self.state[k] = v.detach().clone()
+            else:
+                buffer.copy_(v.detach())
+
+    def state_dict(self):
+        """
+        :return: (dict {str: Tensor}) Snapshot state dict. Its tensors are updated in place by subsequent snapshots
+        """
+        return self.state
+
+    def copy(self):
+        """
+        :return: (dict {str: Tensor}) Independent copy of the snapshot state dict, unaffected by subsequent snapshots
+        """
+        return {k: v.clone() if isinstance(v, torch.Tensor) else deepcopy(v) for k, v in self.state.items()}
+
+    def save(self, path):
+        """
+        Saves the snapshot state dict to a file loadable with torch.load
+
+        :param path: (str) File to save the snapshot to
+        """
+        torch.save(self.state, path)
+
+
 class CustomEarlyStopping(EarlyStopping):
     """
     Custom early stopping callback inherited from PyTorch Lightning Early Stopping. 
@@ -182,7 +284,11 @@ class Trainer:
         eval_mode="min",
         clip=100.0,
         multi_fidelity=False,
-        device="cpu"
+        device="cpu",
+        fast_step=False,
+        compile_model=False,
+        autocast_dtype=None,
+        best_model_path=None,
     ):
         """
 
@@ -196,9 +302,32 @@ class Trainer:
         :param warmup: (int) How many epochs to wait before enacting early stopping policy
         :param eval_metric: (str) Performance metric for model selection and early stopping
         :param multi_fidelity: (bool) If yes, performs updates on the parameter alpha of the multi-fidelity net
+        :param fast_step: (bool) If yes, uses foreach/fused implementations of the default optimizer and gradient clipping,
+                          and accumulates epoch metrics as detached running sums
+        :param compile_model: (bool or dict) If yes, wraps the problem forward pass and loss with torch.compile.
+                              A dict is passed to torch.compile as keyword arguments
+        :param autocast_dtype: (torch.dtype) If given, runs forward passes under torch.autocast with this dtype,
+                               e.g. torch.bfloat16 on CPU. Gradients are scaled for torch.float16
+        :param best_model_path: (str) Optional directory to keep the best model snapshot in memory-mapped files
         """
         self.model = problem
-        self.optimizer = optimizer if optimizer is not None else torch.optim.Adam(problem.parameters(), 0.01, betas=(0.0, 0.9))
+        self.device = device
+        self.fast_step = fast_step
+        if optimizer is None:
+            # fused Adam requires the parameters themselves to be on CUDA, whatever the device argument says
+            if fast_step and all(p.is_cuda for p in problem.parameters()):
+                optimizer = torch.optim.Adam(problem.parameters(), 0.01, betas=(0.0, 0.9), fused=True)
+            elif fast_step:
+                optimizer = torch.optim.Adam(problem.parameters(), 0.01, betas=(0.0, 0.9), foreach=True)
+            else:
+                optimizer = torch.optim.Adam(problem.parameters(), 0.01, betas=(0.0, 0.9))
+        self.optimizer = optimizer
+        self.forward = problem
+        if compile_model:
+            self.forward = torch.compile(problem, **(compile_model if isinstance(compile_model, dict) else {}))
+        self.autocast_dtype = autocast_dtype
+        self.grad_scaler = torch.amp.GradScaler(torch.device(device).type,
+                                                enabled=autocast_dtype == torch.float16)
         self.train_data = train_data
         self.dev_data = dev_data
         self.test_data = test_data
@@ -224,9 +353,55 @@ class Trainer:
         self.badcount = 0
         self.clip = clip
         self.best_devloss = np.finfo(np.float32).max if self._eval_min else 0.
-        self.best_model = deepcopy(self.model.state_dict())
+        self.best = BestModel(self.model, path=best_model_path)
+        self.best_model = self.best.state_dict()
         self.multi_fidelity=multi_fidelity
-        self.device = device
+
+    def autocast(self):
+        """
+        :return: Autocast context for forward passes, disabled if autocast_dtype is None
+        """
+        return torch.autocast(device_type=torch.device(self.device).type, dtype=self.autocast_dtype,
+                              enabled=self.autocast_dtype is not None)
+
+    def epoch_metrics(self):
+        """
+        :return: Container for per-batch metrics of an epoch
+        """
+        return RunningMean() if self.fast_step else []
+
+    def epoch_mean(self, losses):
+        """
+        :param losses: Per-batch metrics gathered in the container from Trainer.epoch_metrics
+        :return: (torch.Tensor) Mean of the per-batch metrics
+        """
+        return losses.mean() if self.fast_step else torch.mean(torch.stack(losses))
+
+    def train_step(self, batch):
+        """
+        Single optimization step: forward pass with loss, backward pass, gradient clipping and optimizer update
+
+        :param batch: (dict {str: torch.Tensor}) Training batch on the training device
+        :return: (dict {str: torch.Tensor}) Output of the problem forward pass
+        """
+        with self.autocast():
+            output = self.forward(batch)
+
+            if self.multi_fidelity:
+                for node in self.model.nodes:
+                    alpha_loss = node.callable.get_alpha_loss()
+                    output[self.train_metric] += alpha_loss
+
+        self.optimizer.zero_grad()
+        self.grad_scaler.scale(output[self.train_metric]).backward()
+        self.grad_scaler.unscale_(self.optimizer)
+        if self.fast_step:
+            torch.nn.utils.clip_grad_norm_(self.model.parameters(), self.clip, foreach=True)
+        else:
+            torch.nn.utils.clip_grad_norm_(self.model.parameters(), self.clip)
+        self.grad_scaler.step(self.optimizer)
+        self.grad_scaler.update()
+        return output
 
     def train(self):
         """
@@ -239,25 +414,15 @@ class Trainer:
             for i in range(self.current_epoch, self.current_epoch+self.epochs):
 
                 self.model.train()
-                losses = []
+                losses = self.epoch_metrics()
                 for t_batch in self.train_data:
                     t_batch['epoch'] = i
                     t_batch = move_batch_to_device(t_batch, self.device)
-                    output = self.model(t_batch)
-
-                    if self.multi_fidelity:
-                        for node in self.model.nodes:
-                            alpha_loss = node.callable.get_alpha_loss()
-                            output[self.train_metric] += alpha_loss
-
-                    self.optimizer.zero_grad()
-                    output[self.train_metric].backward()
-                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), self.clip)
-                    self.optimizer.step()
+                    output = self.train_step(t_batch)
                     losses.append(output[self.train_metric])
                     self.callback.end_batch(self, output)
 
-                output[f'mean_{self.train_metric}'] = torch.mean(torch.stack(losses))
+                output[f'mean_{self.train_metric}'] = self.epoch_mean(losses)
                 self.callback.begin_epoch(self, output)
 
                 if self.lr_scheduler is not None:
@@ -266,18 +431,19 @@ class Trainer:
                 with torch.set_grad_enabled(self.model.grad_inference):
                     self.model.eval()
                     if self.dev_data is not None:
-                        losses = []
+                        losses = self.epoch_metrics()
                         for d_batch in self.dev_data:
                             d_batch = move_batch_to_device(d_batch, self.device)
-                            eval_output = self.model(d_batch)
+                            with self.autocast():
+                                eval_output = self.forward(d_batch)
                             losses.append(eval_output[self.dev_metric])
-                        eval_output[f'mean_{self.dev_metric}'] = torch.mean(torch.stack(losses))
+                        eval_output[f'mean_{self.dev_metric}'] = self.epoch_mean(losses)
                         output = {**output, **eval_output}
                     self.callback.begin_eval(self, output)  # Used for alternate dev evaluation
 
                     if (self._eval_min and output[self.eval_metric] < self.best_devloss)\
                             or (not self._eval_min and output[self.eval_metric] > self.best_devloss):
-                        self.best_model = deepcopy(self.model.state_dict())
+                        self.best.update()
                         self.best_devloss = output[self.eval_metric]
                         self.badcount = 0
                     else:
@@ -305,7 +471,8 @@ class Trainer:
         self.callback.end_train(self, output)  # write training visualizations
 
         # Assign best weights to the model
-        self.model.load_state_dict(self.best_model)
+        self.model.load_state_dict(self.best.state_dict())
+        self.best_model = self.best.copy()
 
         if self.logger is not None:
             self.logger.log_artifacts({
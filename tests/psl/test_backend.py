@@ -1,4 +1,6 @@
 from neuromancer.psl import nonautonomous, autonomous, building_envelope
+from neuromancer.psl.base import ZeroOrderHold
+import scipy.interpolate
 import numpy as np
 import pytest
 
@@ -31,4 +33,77 @@ def test_building(system):
     sys3 = system(backend='torch', set_stats=False)
     data2 = sys2.simulate(nsim=2, x0=sys2.x0, U=sys2.U[:3], D=sys2._D[:2])
     data3 = sys3.simulate(nsim=2, x0=sys3.x0, U=sys3.U[:3], D=sys3._D[:2])
-    assert np.isclose(data2['X'], data3['X'], rtol=1e-04, atol=1e-05).all(), f'{system} failed'
\ No newline at end of file
+    assert np.isclose(data2['X'], data3['X'], rtol=1e-04, atol=1e-05).all(), f'{system} failed'
+
+@pytest.mark.parametrize("system,backend", [(s, b) for s in auto_systems for b in ['numpy', 'torch']])
+def test_autonomous_batch(system, backend):
+    sys = system(backend=backend, set_stats=False)
+    x0 = sys.B.cast(np.stack([np.asarray(sys.x0) * (1. + 0.1 * i) for i in range(3)]), dtype=sys.B.core.float32)
+    data = sys.simulate_batch(x0=x0, nsim=5)
+    assert data['X'].shape == (3, 5, sys.nx0)
+    for i in range(3):
+        ref = sys.simulate(nsim=5, x0=x0[i])
+        assert np.isclose(data['X'][i], ref['X'], rtol=1e-04, atol=1e-05).all(), f'{system} failed'
+
+
+@pytest.mark.parametrize("system", [autonomous.systems['VanDerPol'], nonautonomous.systems['TwoTank']])
+def test_batch_default_ntraj(system):
+    sys = system()
+    assert sys.simulate_batch(nsim=5)['X'].shape == (1, 5, sys.nx0)
+    assert sys.simulate_batch(ntraj=2, nsim=5)['X'].shape == (2, 5, sys.nx0)
+
+
+@pytest.mark.parametrize("system", nauto_systems)
+def test_non_autonomous_batch(system):
+    sys = system(seed=0)
+    x0 = np.stack([sys.get_x0() for _ in range(3)])
+    U = np.stack([sys.get_U(6) for _ in range(3)])
+    data = sys.simulate_batch(x0=x0, U=U)
+    pooled = sys.simulate_batch(x0=x0, U=U, processes=2)
+    assert data['X'].shape == pooled['X'].shape == (3, 5, sys.nx0)
+    assert data['U'].shape[:2] == (3, 5)
+    for i in range(3):
+        ref = sys.simulate(x0=x0[i], U=U[i])
+        assert np.array_equal(pooled['X'][i], ref['X'])
+        assert np.isclose(data['X'][i], ref['X'], rtol=1e-04, atol=1e-05).all(), f'{system} failed'
+
+
+@pytest.mark.parametrize("Time", [np.arange(7) * 0.1, np.array([0., 0.1, 0.15, 0.4, 1.0, 1.05, 2.0])])
+def test_zero_order_hold(Time):
+    U = np.random.default_rng(0).standard_normal((len(Time), 2))
+    reference = scipy.interpolate.interp1d(Time, U, kind='previous', axis=0, fill_value='extrapolate')
+    zoh = ZeroOrderHold(Time, U)
+    for t in [*Time, *(Time[:-1] + np.diff(Time) / 2), Time[-1] + 1.]:
+        assert np.array_equal(zoh(t), reference(t))
+
+
+@pytest.mark.parametrize("system,backend", [(s, b) for s in [autonomous.VanDerPol, nonautonomous.LorenzControl,
+                                                             nonautonomous.TwoTank]
+                                            for b in ['numpy', 'torch']])
+def test_fixed_step(system, backend):
+    sys = system(backend=backend, set_stats=False)
+    kwargs = {'U': sys.U[:21]} if hasattr(sys, 'U') else {}
+    ref = sys.simulate(nsim=20, x0=sys.x0, **kwargs)
+    rk4 = sys.simulate(nsim=20, x0=sys.x0, method='rk4', **kwargs)
+    euler = sys.simulate(nsim=20, x0=sys.x0, method='euler', **kwargs)
+    assert rk4['X'].shape == euler['X'].shape == ref['X'].shape
+    assert np.isclose(rk4['X'], ref['X'], rtol=1e-02, atol=1e-03).all(), f'{system} failed'
+    assert np.abs(rk4['X'] - ref['X']).max() < np.abs(euler['X'] - ref['X']).max()
+    x0 = sys.B.core.stack([sys.x0, sys.x0 * 1.1])
+    batch_kwargs = {k: sys.B.core.stack([v, v]) for k, v in kwargs.items()}
+    batch = sys.simulate_batch(x0=x0, nsim=20, method='rk4', **batch_kwargs)
+    assert np.isclose(batch['X'][0], rk4['X'], rtol=1e-04, atol=1e-05).all()
+
+
+@pytest.mark.parametrize("system,backend", [(s, b) for s in nauto_systems for b in ['numpy', 'torch']])
+def test_forward_batch(system, backend):
+    sys = system(backend=backend, set_stats=False)
+    x = sys.B.core.stack([sys.x0 * (1. + 0.01 * i) for i in range(4)])
+    u = sys.B.core.stack([sys.U[i] for i in range(4)])
+    x_next = sys.forward(x, u)
+    x_rk4 = sys.forward(x, u, method='rk4')
+    assert x_next.shape == x_rk4.shape == (4, sys.nx0)
+    for i in range(4):
+        ref = sys.simulate(nsim=1, x0=x[i], U=sys.B.core.stack([u[i], u[i]]))['X']
+        assert np.isclose(sys.forward(x[i:i + 1], u[i:i + 1]), ref, rtol=1e-04, atol=1e-05).all(), f'{system} failed'
+        assert np.isclose(x_next[i], ref[0], rtol=1e-04, atol=1e-05).all(), f'{system} failed'
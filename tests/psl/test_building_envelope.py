@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pytest
+import scipy.io
+import torch
+
+from neuromancer.psl import building_envelope
+from neuromancer.psl.building_envelope import BuildingEnvelope, LinearBuildingEnvelope, linear_scan
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    """
+    Small synthetic building model in the format of the downloaded parameter files.
+    """
+    monkeypatch.setenv('NEUROMANCER_CACHE_DIR', str(tmp_path / 'cache'))
+    rng = np.random.default_rng(0)
+    nx, nq, nd, ny = 6, 2, 3, 2
+    Q, _ = np.linalg.qr(rng.standard_normal((nx, nx)))
+    path = tmp_path / 'SimpleSingleZone.mat'
+    scipy.io.savemat(path, {'Ad': 0.95 * Q, 'Bd': 1e-4 * rng.standard_normal((nx, nq)),
+                            'Cd': rng.standard_normal((ny, nx)), 'Ed': 0.1 * rng.standard_normal((nx, nd)),
+                            'Gd': 0.01 * rng.standard_normal((nx, 1)), 'Fd': rng.standard_normal((ny, 1)),
+                            'x0': rng.standard_normal((nx, 1)), 'y_ss': rng.standard_normal(ny),
+                            'dT_max': np.array([[20.]]), 'dT_min': np.array([[0.]]),
+                            'mf_max': np.full((1, nq), 100.), 'mf_min': np.zeros((1, nq)),
+                            'umax': np.full((1, nq), 5.), 'umin': np.zeros((1, nq)),
+                            'disturb': rng.standard_normal((6100, nd)), 'type': 'synthetic', 'HC_system': 'none'})
+    return str(path)
+
+
+def building(model_path, linear=False, backend='numpy'):
+    base = LinearBuildingEnvelope if linear else BuildingEnvelope
+    system = type(base.__name__, (base,), {'path': model_path})
+    return system(system='SimpleSingleZone', backend=backend)
+
+
+def reference_simulation(system, x, U, D):
+    X, Y = [], []
+    for k in range(len(U) - 1):
+        x, y = system.equations(x, U[k], D[k])
+        X.append(x)
+        Y.append(y - system.y_ss)
+    return np.stack(X), np.stack(Y)
+
+
+def test_linear_scan():
+    rng = np.random.default_rng(1)
+    A = 0.3 * rng.standard_normal((4, 4))
+    b, x0 = rng.standard_normal((2, 37, 4)), rng.standard_normal((2, 4))
+    sequential = linear_scan(A, b, x0)
+    assert np.allclose(linear_scan(A, b, x0, parallel=True), sequential)
+    x = x0[1]
+    for k in range(37):
+        x = A @ x + b[1, k]
+        assert np.allclose(sequential[1, k], x)
+    tensors = [torch.tensor(v) for v in (A, b, x0)]
+    assert np.allclose(linear_scan(*tensors, parallel=True, cat=torch.cat).numpy(), sequential)
+
+
+@pytest.mark.parametrize('linear', [False, True])
+@pytest.mark.parametrize('parallel', [False, True])
+def test_simulate(model_path, linear, parallel):
+    system = building(model_path, linear)
+    U, D = system.get_U(51), system.get_D(51)
+    sim = system.simulate(nsim=50, x0=system.x0, U=U, D=D, parallel=parallel)
+    X, Y = reference_simulation(system, system.x0, U, D)
+    assert sim['X'].shape == X.shape and sim['Y'].shape == Y.shape
+    assert np.allclose(sim['X'], X, atol=1e-5) and np.allclose(sim['Y'], Y, atol=1e-5)
+
+    x0 = np.stack([system.get_x0() for _ in range(3)])
+    U = np.stack([system.get_U(51) for _ in range(3)])
+    D = np.stack([system.get_D(51) for _ in range(3)])
+    batch = system.simulate_batch(x0=x0, U=U, D=D, parallel=parallel)
+    assert batch['X'].shape == (3, 50, system.nx) and batch['D'].shape == (3, 50, 1)
+    for i in range(3):
+        sim = system.simulate(nsim=50, x0=x0[i], U=U[i], D=D[i], parallel=parallel)
+        for k in ['X', 'Y', 'U', 'D', 'Dhidden']:
+            assert np.allclose(batch[k][i], sim[k], atol=1e-5)
+
+
+def test_simulate_torch(model_path):
+    system = building(model_path, backend='torch')
+    U, D = system.get_U(21), system.get_D(21)
+    sim = system.simulate(nsim=20, x0=system.x0, U=U, D=D, parallel=True)
+    X, _ = reference_simulation(system, system.x0, U, D)
+    assert isinstance(sim['X'], torch.Tensor) and np.allclose(sim['X'], X, atol=1e-5)
+    assert system.simulate_batch(ntraj=2, nsim=20)['X'].shape == (2, 20, system.nx)
+    assert system.simulate_batch(nsim=20)['X'].shape == (1, 20, system.nx)
+
+
+def test_parameter_cache(model_path, monkeypatch):
+    calls = []
+    loadmat = building_envelope.loadmat
+    monkeypatch.setattr(building_envelope, 'loadmat', lambda *args, **kwargs: calls.append(kwargs) or loadmat(*args, **kwargs))
+    a, b = building(model_path), building(model_path, backend='torch')
+    # one read of the parameters and one conversion of the disturbances
+    assert len(calls) == 2 and calls[1]['variable_names'] == ['disturb']
+    assert a.p is b.p
+    # the converted series keeps the dtype of the model file and is stored in the cache directory
+    assert isinstance(a._D, np.memmap) and np.array_equal(a._D, scipy.io.loadmat(model_path)['disturb'])
+    assert a._D.dtype == np.float64 and a.get_D(10).dtype == np.float32
+    assert os.listdir(building_envelope.cache_dir())[0].endswith('_disturb.npy')
+    assert sorted(os.listdir(os.path.dirname(model_path))) == ['SimpleSingleZone.mat', 'cache']
+    assert isinstance(b._D, torch.Tensor) and np.array_equal(b._D.numpy(), a._D)
+    assert np.array_equal(a.D, a._D[a.nsim + 1].astype(np.float32))
+
+    # modified files are read again
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    building(model_path)
+    assert len(calls) == 4
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from neuromancer.psl.generate import generate_dataset, make_system
+
+
+@pytest.mark.parametrize("name,signal", [('LorenzSystem', None), ('TwoTank', None), ('VanDerPolControl', 'sin')])
+def test_generate_dataset(tmp_path, name, signal):
+    data = generate_dataset(name, 5, 10, signal=signal, seed=3)
+    assert data['X'].shape[:2] == (5, 10) and data['Time'].shape == (10,)
+    assert not np.array_equal(data['X'][0], data['X'][1])
+    pooled = generate_dataset(name, 5, 10, signal=signal, seed=3, processes=2, cache_dir=tmp_path)
+    cached = generate_dataset(name, 5, 10, signal=signal, seed=3, cache_dir=tmp_path)
+    for k in data:
+        assert np.array_equal(data[k], pooled[k]) and np.array_equal(data[k], cached[k])
+    assert not np.array_equal(data['X'], generate_dataset(name, 5, 10, signal=signal, seed=4)['X'])
+
+
+def test_make_system_cached_stats(tmp_path):
+    fresh = make_system('DuffingControl', seed=5)
+    make_system('DuffingControl', seed=5, cache_dir=tmp_path)
+    cached = make_system('DuffingControl', seed=5, cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+    for k, stats in fresh.stats.items():
+        for s in stats:
+            assert np.array_equal(stats[s], cached.stats[k][s])
+    assert np.array_equal(fresh.get_x0(), cached.get_x0())
@@ -0,0 +1,246 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.io
+import torch
+from torch.utils.data import DataLoader
+
+from neuromancer.dataset import (
+    GraphDataset,
+    RunningStats,
+    SequenceBatchSampler,
+    SequenceDataset,
+    get_sequence_dataloaders,
+    normalize_data,
+    normalize_files,
+    radius_graph,
+    read_file,
+)
+
+
+torch.manual_seed(0)
+
+
+def sequence_data(nsim=103, multisequence=False):
+    rng = np.random.default_rng(0)
+    data = {'X': rng.standard_normal((nsim, 3)), 'U': rng.standard_normal((nsim, 2))}
+    if multisequence:
+        data = [data, {k: v[:nsim // 2] for k, v in data.items()}]
+    return data
+
+
+def assert_batches_equal(batch, reference):
+    assert batch.keys() == reference.keys()
+    for k, v in reference.items():
+        assert torch.equal(batch[k], v) if isinstance(v, torch.Tensor) else batch[k] == v
+
+
+@pytest.mark.parametrize('moving_horizon', [False, True])
+@pytest.mark.parametrize('multisequence', [False, True])
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_batched_access_matches_collate(moving_horizon, multisequence, shuffle):
+    dataset = SequenceDataset(sequence_data(multisequence=multisequence), nsteps=4,
+                              moving_horizon=moving_horizon, name='train')
+    sampler = SequenceBatchSampler(dataset, 7, shuffle=shuffle)
+    loader = DataLoader(dataset, batch_sampler=sampler, collate_fn=dataset.collate_fn)
+    assert len(loader) == len(sampler) == -(-len(dataset) // 7)
+    seen = []
+    for batch in loader:
+        indices = batch['index'].tolist()
+        seen += indices
+        assert_batches_equal(batch, dataset.collate_fn([dataset[i] for i in indices]))
+    assert sorted(seen) == list(range(len(dataset)))
+
+
+def test_contiguous_batch_is_view():
+    dataset = SequenceDataset(sequence_data(), nsteps=4, moving_horizon=True, batch_views=True)
+    batch = dataset.get_batch(slice(3, 10))
+    assert batch['Xp'].untyped_storage().data_ptr() == dataset.batched_data.untyped_storage().data_ptr()
+    assert torch.equal(batch['Xp'], dataset.get_full_batch()['Xp'][3:10])
+    assert torch.equal(batch['Xf'], dataset.get_batch([4, 5, 6, 7, 8, 9, 10])['Xp'])
+
+
+@pytest.mark.parametrize('indices', [slice(3, 10), [5, 1, 8]])
+def test_batch_in_place_edits(indices):
+    dataset = SequenceDataset(sequence_data(), nsteps=4, moving_horizon=True)
+    reference = dataset.batched_data.clone()
+    batch = dataset.get_batch(indices)
+    for k in ['Xp', 'Xf', 'Up', 'Uf']:
+        batch[k].mul_(0.)
+    assert torch.equal(dataset.batched_data, reference)
+
+
+def test_default_collate():
+    dataset = SequenceDataset(sequence_data(), nsteps=4, moving_horizon=True)
+    loader = DataLoader(dataset, batch_size=7)
+    batch = next(iter(loader))
+    reference = dataset.collate_fn([dataset[i] for i in range(7)])
+    del reference['name']
+    assert_batches_equal(batch, reference)
+
+
+def test_drop_last():
+    dataset = SequenceDataset(sequence_data(), nsteps=4, moving_horizon=True)
+    for shuffle in [False, True]:
+        sampler = SequenceBatchSampler(dataset, 16, shuffle=shuffle, drop_last=True)
+        batches = list(sampler)
+        assert len(batches) == len(sampler) == len(dataset) // 16
+        assert all(len(dataset.get_batch(b)['index']) == 16 for b in batches)
+
+
+def test_sequence_dataloaders():
+    (train, dev, test), _, dims = get_sequence_dataloaders(sequence_data(300), nsteps=5, batch_size=4)
+    batch = next(iter(train))
+    assert batch['Xp'].shape == (4, 5, 3) and batch['Uf'].shape == (4, 5, 2)
+    assert batch['name'] == 'nstep_train'
+    assert sum(len(b['index']) for b in train) == len(train.dataset)
+
+
+@pytest.mark.parametrize('moving_horizon', [False, True])
+@pytest.mark.parametrize('multisequence', [False, True])
+def test_memmap_storage(tmp_path, moving_horizon, multisequence):
+    data = sequence_data(multisequence=multisequence)
+    memory = SequenceDataset(data, nsteps=4, moving_horizon=moving_horizon)
+    disk = SequenceDataset(data, nsteps=4, moving_horizon=moving_horizon, cache_dir=tmp_path)
+    assert len(disk) == len(memory)
+    assert torch.equal(disk.batched_data, memory.batched_data)
+    for i in [0, 5, len(memory) - 1]:
+        for k, v in memory[i].items():
+            assert torch.equal(torch.as_tensor(disk[i][k]), torch.as_tensor(v))
+    for indices in [slice(0, len(memory)), slice(3, 11), torch.randperm(len(memory))[:9]]:
+        assert_batches_equal(disk.get_batch(indices), memory.get_batch(indices))
+    assert_batches_equal(disk.get_full_batch(), memory.get_full_batch())
+    # windows of a single sequence are views of the memory-mapped time series
+    if not multisequence:
+        assert disk.batched_data.untyped_storage().data_ptr() == disk.full_data.untyped_storage().data_ptr()
+        assert disk.get_full_batch()['Xp'].untyped_storage().data_ptr() == disk.full_data.untyped_storage().data_ptr()
+        disk.batch_views = True
+        batch = disk.get_batch(slice(3, 11))
+        assert batch['Xp'].untyped_storage().data_ptr() == disk.full_data.untyped_storage().data_ptr()
+    # preprocessing is cached on disk and reused
+    SequenceDataset(data, nsteps=4, moving_horizon=moving_horizon, cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_memmap_dataloaders(tmp_path):
+    data = sequence_data(300)
+    loaders, _, _ = get_sequence_dataloaders(data, nsteps=5, batch_size=4)
+    cached, _, _ = get_sequence_dataloaders(data, nsteps=5, batch_size=4, cache_dir=tmp_path)
+    for loader, cached_loader in zip(loaders, cached):
+        for batch, cached_batch in zip(loader, cached_loader):
+            assert torch.equal(batch['Xp'], cached_batch['Xp'])
+            assert torch.equal(batch['Uf'], cached_batch['Uf'])
+
+
+def test_running_stats_merge():
+    rng = np.random.default_rng(1)
+    chunks = [rng.standard_normal((n, 3)) * 5 + 2 for n in [1, 17, 40, 3]]
+    full = np.concatenate(chunks)
+    stats = RunningStats()
+    for chunk in chunks[:2]:
+        stats.update(chunk)
+    other = RunningStats().update(chunks[2]).update(chunks[3])
+    stats.merge(other).merge(RunningStats())
+    assert stats.count == len(full)
+    assert np.allclose(stats.mean, full.mean(0)) and np.allclose(stats.std, full.std(0))
+    assert np.array_equal(stats.min, full.min(0)) and np.array_equal(stats.max, full.max(0))
+
+
+@pytest.mark.parametrize('norm_type', ['zscore', 'zero-one', 'one-one'])
+def test_normalize_files(tmp_path, norm_type):
+    rng = np.random.default_rng(2)
+    src = tmp_path / 'raw'
+    src.mkdir()
+    for n, exp_ids in [(50, None), (37, [0] * 20 + [1] * 17)]:
+        df = pd.DataFrame(rng.standard_normal((n, 3)) * 3, columns=['x0', 'x1', 'u0'])
+        if exp_ids is not None:
+            df['exp_id'] = exp_ids
+        df.to_csv(src / f'exp{n}.csv', index=False)
+    reference = []
+    for d in read_file(str(src)):
+        reference += d if isinstance(d, list) else [d]
+    reference, reference_stats = normalize_data(reference, norm_type)
+
+    data, stats = normalize_files(str(src), norm_type, str(tmp_path / 'shards'), chunksize=8)
+    assert stats.keys() == reference_stats.keys()
+    for k, v in reference_stats.items():
+        assert np.allclose(stats[k], v)
+    assert len(data) == len(reference) == 3
+    for d, ref in zip(data, reference):
+        assert d.keys() == ref.keys()
+        for k in ref:
+            assert np.allclose(d[k], ref[k], atol=1e-6)
+
+
+def test_normalize_files_same_stem(tmp_path):
+    rng = np.random.default_rng(3)
+    src = tmp_path / 'raw'
+    src.mkdir()
+    csv = pd.DataFrame(rng.standard_normal((20, 2)), columns=['x0', 'u0'])
+    csv.to_csv(src / 'exp.csv', index=False)
+    scipy.io.savemat(src / 'exp.mat', {'x': rng.standard_normal((30, 1)) + 5, 'u': rng.standard_normal((30, 1))})
+    data, _ = normalize_files(str(src), 'zscore', str(tmp_path / 'shards'), chunksize=8)
+    reference, _ = normalize_data(read_file(str(src)), 'zscore')
+    assert len(data) == 2 and sorted(os.listdir(tmp_path / 'shards')) == ['exp.csv', 'exp.mat']
+    for d, ref in zip(data, reference):
+        for k in ref:
+            assert np.allclose(d[k], ref[k], atol=1e-6)
+
+
+def dense_radius_graph(x, r, loop):
+    dist = torch.cdist(x, x)
+    edges = [(i, j) for i in range(len(x)) for j in torch.argwhere(dist[i] < r).flatten().tolist() if i != j or loop]
+    return torch.tensor(edges, dtype=torch.long).reshape(-1, 2).T
+
+
+@pytest.mark.parametrize('dims', [1, 2, 3])
+@pytest.mark.parametrize('loop', [False, True])
+def test_radius_graph(dims, loop):
+    x = torch.rand(4, 200, dims) * torch.tensor([1., 0.3, 2.])[:dims]
+    batch = radius_graph(x, 0.1, loop=loop)
+    assert len(batch) == 4
+    for xi, edges in zip(x, batch):
+        assert torch.equal(edges, dense_radius_graph(xi, 0.1, loop))
+        assert torch.equal(radius_graph(xi, 0.1, loop=loop), edges)
+    assert radius_graph(torch.zeros(0, dims), 0.1).shape == (2, 0)
+
+
+def test_graph_dataset_build_graphs(tmp_path):
+    positions = [torch.rand(30, 12, 2) * 0.1, torch.rand(20, 12, 2) * 0.1]
+    kwargs = dict(node_attr={'pos': positions}, seq_len=4, seq_stride=2, build_graphs='pos',
+                  connectivity_radius=0.02)
+    dataset = GraphDataset(**kwargs)
+    assert len(dataset.graphs) == 2 * 5
+    for (i, t), edges in dataset.graphs.items():
+        assert torch.equal(edges, dense_radius_graph(positions[i][:, t - 1], 0.02, loop=True))
+
+    cached = GraphDataset(cache_dir=str(tmp_path), **kwargs)
+    assert len(list(tmp_path.iterdir())) == 1
+    reloaded = GraphDataset(cache_dir=str(tmp_path), **kwargs)
+    for key, edges in dataset.graphs.items():
+        assert torch.equal(cached.graphs[key], edges) and torch.equal(reloaded.graphs[key], edges)
+    assert torch.equal(reloaded[0]['edge_index'], dataset[0]['edge_index'])
+
+
+def test_graph_collate():
+    positions = [torch.rand(n, 10, 2) * 0.1 for n in [30, 20, 25]]
+    dataset = GraphDataset(node_attr={'pos': positions}, seq_len=4, build_graphs='pos', connectivity_radius=0.03)
+    samples = [dataset[i] for i in [0, len(dataset) - 1, 9]]
+    for _ in range(2):
+        batch = GraphDataset.collate_fn(samples)
+        # samples are left untouched, so collating them again gives the same batch
+        assert all(torch.equal(sample['batch'], torch.zeros(sample['num_nodes'], dtype=torch.long)) for sample in samples)
+        assert batch['num_nodes'] == sum(sample['num_nodes'] for sample in samples)
+        assert torch.equal(batch['batch'], torch.cat([torch.full((s['num_nodes'],), i) for i, s in enumerate(samples)]))
+        offset, edges = 0, []
+        for sample in samples:
+            edges.append(sample['edge_index'] + offset)
+            offset += sample['num_nodes']
+        assert torch.equal(batch['edge_index'], torch.cat(edges, dim=1))
+        assert batch['num_edges'] == batch['edge_index'].size(1)
+        for key in ['pos', 'y_pos']:
+            assert torch.equal(batch[key], torch.cat([sample[key] for sample in samples]))
+    loader = DataLoader(dataset, batch_size=4, collate_fn=GraphDataset.collate_fn)
+    assert sum(b['num_nodes'] for b in loader) == sum(dataset[i]['num_nodes'] for i in range(len(dataset)))
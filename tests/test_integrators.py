@@ -1,5 +1,6 @@
+import pytest
 import torch
-from neuromancer.dynamics import ode, integrators
+from neuromancer.dynamics import ode, integrators, interpolation
 from hypothesis import given, settings, strategies as st
 from neuromancer.modules.blocks import MLP
 import neuromancer.slim as slim
@@ -83,3 +84,165 @@ def test_integrator_white_ode_auto_hybrid_shape(batchsize, integrator, ode):
     assert y.shape[0] == batchsize and y.shape[1] == fx.out_features
 
 
+
+
+@given(st.integers(0, 20),
+       st.booleans(),
+       st.booleans(),
+       st.sampled_from(integrators_generic + [v for v in integrators.integrators_second_order.values()]))
+@settings(max_examples=50, deadline=None)
+def test_integrator_rollout(nsteps, nonauto, grad, integrator):
+    nx, nu = 4, 2
+    nout = nx // 2 if integrator in integrators.integrators_second_order.values() else nx
+    fx = MLP(nout + nu * nonauto, nout, bias=True, hsizes=[8])
+    model = integrator(fx, h=0.1)
+    x0 = torch.randn([5, nx])
+    u_seq = torch.randn([5, nsteps + 3, nu]) if nonauto else None
+    x, reference = x0, []
+    with torch.set_grad_enabled(grad):
+        for i in range(nsteps):
+            x = model(x, u_seq[:, i]) if nonauto else model(x)
+            reference.append(x)
+        X = model.rollout(x0, u_seq, nsteps)
+    assert X.shape == (5, nsteps, nx) and X.requires_grad == (grad and nsteps > 0)
+    if nsteps:
+        assert torch.allclose(X, torch.stack(reference, dim=1), atol=1e-6)
+
+
+@pytest.mark.parametrize('method', ['euler', 'rk4', 'dopri5', 'explicit_adams'])
+@pytest.mark.parametrize('mode', ['adjoint', 'direct', 'checkpoint'])
+@pytest.mark.parametrize('nonauto', [False, True])
+def test_diffeq_integrator_modes(method, mode, nonauto):
+    torch.manual_seed(0)
+    nx, nu, nsteps = 3, 2, 7
+    fx = MLP(nx + nu * nonauto, nx, hsizes=[8])
+    model = integrators.DiffEqIntegrator(fx, h=0.1, method=method, mode=mode, checkpoint_steps=3)
+    reference = integrators.DiffEqIntegrator(fx, h=0.1, method=method, mode=mode)
+    x0 = torch.randn([4, nx])
+    u_seq = torch.randn([4, nsteps, nu], requires_grad=True) if nonauto else None
+    wrt = list(fx.parameters()) + ([u_seq] if nonauto else [])
+    x, X_ref = x0, []
+    for i in range(nsteps):
+        x = reference(x, u_seq[:, i]) if nonauto else reference(x)
+        X_ref.append(x)
+    X_ref = torch.stack(X_ref, dim=1)
+    X = model.rollout(x0, u_seq, nsteps)
+    tol = 1e-4 if method == 'dopri5' else 1e-5
+    assert X.shape == (4, nsteps, nx)
+    assert torch.allclose(X, X_ref, atol=tol)
+    grads = torch.autograd.grad(X.sum(), wrt, allow_unused=True, materialize_grads=True)
+    for g, g_ref in zip(grads, torch.autograd.grad(X_ref.sum(), wrt, allow_unused=True, materialize_grads=True)):
+        assert torch.allclose(g, g_ref, atol=10 * tol)
+    # single steps use the cached time grid extended by the rollout
+    assert model.time_grid.shape == (nsteps + 1,)
+    assert torch.allclose(model(x0, u_seq[:, 0]) if nonauto else model(x0), X_ref[:, 0])
+
+
+@pytest.mark.parametrize('integrator', [v for v in integrators.integrators.values() if v.stage_offsets is not None] +
+                         [v for v in integrators.integrators_second_order.values()])
+def test_integrator_rollout_interpolated_inputs(integrator):
+    torch.manual_seed(0)
+    nx, nu, nsteps = 4, 2, 6
+    nout = nx // 2 if integrator in integrators.integrators_second_order.values() else nx
+    model = integrator(MLP(nout + nu, nout, hsizes=[8]), h=0.1)
+    x0, U = torch.randn([5, nx]), torch.randn([5, nsteps + 1, nu])
+    u = interpolation.LinInterp_Horizon(U, h=0.1)
+    x, reference = x0, []
+    for i in range(nsteps):
+        # inputs interpolated between the samples of the step at the time of every block evaluation
+        stage_inputs = [(U[:, i] + c * (U[:, i + 1] - U[:, i]),) for c in model.stage_offsets]
+        x = model.integrate_stages(x, stage_inputs)
+        reference.append(x)
+    X = model.rollout(x0, u, nsteps)
+    assert torch.allclose(X, torch.stack(reference, dim=1), atol=1e-6)
+    # held inputs use the samples at the start of every step
+    assert torch.allclose(model.rollout(x0, [U[:, :nsteps]]), model.rollout(x0, [U[:, :nsteps]], nsteps))
+    assert torch.allclose(u.step(2, 0.5), u(0.25)) and torch.allclose(u(10.), U[:, -1])
+
+
+@pytest.mark.parametrize('method', ['rk4', 'dopri5'])
+def test_diffeq_integrator_interpolated_inputs(method):
+    torch.manual_seed(0)
+    nx, nu, nsteps = 3, 2, 5
+    fx = MLP(nx + nu, nx, hsizes=[8])
+    U = torch.randn([4, nsteps + 1, nu])
+    x0, u = torch.randn([4, nx]), interpolation.LinInterp_Horizon(U, h=0.1)
+    X = integrators.DiffEqIntegrator(fx, h=0.1, method=method, mode='direct').rollout(x0, u)
+    # agrees with the stage interpolation of the fourth order RK4 integrator
+    expected = integrators.RK4(fx, h=0.1).rollout(x0, u)
+    assert torch.allclose(X, expected, atol=1e-6 if method == 'rk4' else 1e-4)
+
+
+def test_rkf_adaptive():
+    torch.manual_seed(0)
+    rates = torch.tensor([[1.], [50.]])
+    decay = torch.nn.Parameter(torch.tensor(1.))
+
+    class Linear(torch.nn.Module):
+        in_features, out_features = 1, 1
+
+        def forward(self, x, *u):
+            return -decay * rates * x + (u[0] if u else 0.)
+
+    x0, nsteps = torch.ones(2, 1), 4
+    t = 0.5 * torch.arange(1, nsteps + 1)
+    exact = torch.exp(-rates * t)
+    adaptive = integrators.Runge_Kutta_Fehlberg(Linear(), h=0.5, adaptive=True, rtol=1e-5, atol=1e-8)
+    X = adaptive.rollout(x0, nsteps=nsteps)[..., 0]
+    # the stiff trajectory is resolved with substeps, where the fixed step diverges
+    assert torch.allclose(X, exact, atol=1e-5)
+    assert not torch.allclose(integrators.Runge_Kutta_Fehlberg(Linear(), h=0.5).rollout(x0, nsteps=nsteps)[..., 0],
+                              exact, atol=1e-2)
+    assert torch.allclose(adaptive(x0), X[:, :1], atol=1e-6)
+    # each trajectory takes the substeps its error requires
+    x, dt = adaptive.adaptive_step(x0, ())
+    assert dt[0] > 2 * dt[1]
+    # accepted substeps are differentiable
+    dX = torch.autograd.grad(X.sum(), decay)[0]
+    assert torch.allclose(dX, -(rates * t * exact).sum(), rtol=1e-3)
+    u = torch.zeros(2, nsteps, 1, requires_grad=True)
+    assert torch.autograd.grad(adaptive.rollout(x0, u).sum(), u)[0].abs().min() > 0
+    # a budget of one substep reduces to the fixed step
+    single = integrators.Runge_Kutta_Fehlberg(Linear(), h=0.5, adaptive=True, max_substeps=1)
+    assert torch.allclose(single(x0), integrators.Runge_Kutta_Fehlberg(Linear(), h=0.5)(x0))
+
+
+def test_rkf_adaptive_overflow():
+    scale = torch.nn.Parameter(torch.tensor(1.))
+
+    class Cubic(torch.nn.Module):
+        in_features, out_features = 1, 1
+
+        def forward(self, x):
+            return -scale * x ** 3
+
+    x0 = torch.tensor([[10.], [0.1]])
+    adaptive = integrators.Runge_Kutta_Fehlberg(Cubic(), h=1., adaptive=True, rtol=1e-5, atol=1e-8)
+    # the first trial step of the stiff element overflows and is rejected
+    with torch.no_grad():
+        assert not torch.isfinite(adaptive.fehlberg(x0, 1., [()] * 6)[0][0]).all()
+    x = adaptive(x0)
+    exact = x0 / torch.sqrt(1 + 2 * x0 ** 2)
+    assert torch.allclose(x, exact, rtol=1e-4)
+    grad = torch.autograd.grad(x.sum(), scale)[0]
+    assert torch.isfinite(grad)
+    # local error estimates of the accepted substeps are recorded for every step
+    assert len(adaptive.local_error) == 1 and adaptive.local_error[0].shape == x0.shape
+    assert torch.isfinite(adaptive.local_error[0]).all()
+
+
+def test_integrator_abstract_methods():
+    fx = MLP(2, 2, hsizes=[4])
+
+    class Incomplete(integrators.Integrator):
+        pass
+
+    class NoStages(integrators.ExplicitIntegrator):
+        stage_offsets = (0.,)
+
+    for integrator in [Incomplete, NoStages]:
+        with pytest.raises(TypeError):
+            integrator(fx)
+    model = integrators.Runge_Kutta_Fehlberg(fx, adaptive=True)
+    with pytest.raises(ValueError, match='stage_offsets'):
+        integrators.ExplicitIntegrator.integrate(model, torch.randn(3, 2))
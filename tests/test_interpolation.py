@@ -1,4 +1,7 @@
+import numpy as np
+import pytest
 import torch
+from scipy.interpolate import CubicSpline
 from neuromancer.dynamics import interpolation
 from hypothesis import given, settings, strategies as st
 
@@ -43,4 +46,34 @@ def test_LinInterp_multi_u_Online_dims(nu, nbatches):
     assert uq.shape[0] == tq.shape[0]
     assert uq.shape[1] == u.shape[2]
 
-# %%
+
+def reference_interpolation(t, u, tq, mode):
+    i = np.searchsorted(t, tq, side='right') - 1
+    if mode == 'zoh':
+        return u[np.clip(i, 0, len(t) - 1)]
+    if mode == 'cubic':
+        return CubicSpline(t, u, bc_type='natural')(tq)
+    i = np.clip(i, 0, len(t) - 2)
+    return u[i] + (u[i + 1] - u[i]) / (t[i + 1] - t[i])[:, None] * (tq - t[i])[:, None]
+
+
+@pytest.mark.parametrize('mode', ['linear', 'zoh', 'cubic'])
+@pytest.mark.parametrize('shared_t', [False, True])
+def test_LinInterp_Offline_nonuniform(mode, shared_t):
+    torch.manual_seed(0)
+    nbatch, nsteps, nu = 3, 12, 2
+    t = torch.cumsum(torch.rand(1 if shared_t else nbatch, nsteps, dtype=torch.float64) + 0.1, dim=1)
+    t = t.expand(nbatch, -1)
+    u = torch.randn(nbatch, nsteps, nu, dtype=torch.float64)
+    # queries extrapolate on both ends and hit the sampling times
+    tq = torch.cat([torch.rand(nbatch, 20, dtype=torch.float64) * 16 - 1, t[:, :5]], dim=1)
+    interp = interpolation.LinInterp_Offline(t[:1, :, None] if shared_t else t, u, mode=mode)
+    uq = interp(tq)
+    assert uq.shape == (nbatch, 25, nu) and uq.dtype == torch.float64
+    for i in range(nbatch):
+        expected = reference_interpolation(t[i].numpy(), u[i].numpy(), tq[i].numpy(), mode)
+        assert np.allclose(uq[i].numpy(), expected)
+        single = interpolation.LinInterp_Offline(t[i, :, None], u[i], mode=mode)
+        assert torch.allclose(single(tq[i, :, None]), uq[i])
+    # a scalar query time is shared by the batch
+    assert torch.allclose(interp(torch.tensor(3.3)), interp(torch.full((nbatch, 1), 3.3))[:, 0])
@@ -0,0 +1,44 @@
+import torch
+from hypothesis import given, settings, strategies as st
+
+from neuromancer.dynamics.library import FunctionLibrary, PolynomialLibrary, FourierLibrary
+
+
+def reference(library, X):
+    """
+    Column by column evaluation of the library functions.
+    """
+    output = torch.ones((X.shape[0], library.shape[0]))
+    for i, terms in enumerate(library.library):
+        for func in terms if isinstance(terms, tuple) else (terms,):
+            output[:, i] *= func(X)
+    return output
+
+
+@given(st.integers(1, 6), st.integers(1, 4), st.integers(1, 50))
+@settings(max_examples=50, deadline=None)
+def test_polynomial_library(n_features, max_degree, batchsize):
+    library = PolynomialLibrary(n_features, max_degree=max_degree)
+    X = torch.randn(batchsize, n_features)
+    output = library.evaluate(X)
+    assert output.shape == (batchsize, library.shape[0])
+    assert torch.allclose(output, reference(library, X), rtol=1e-5, atol=1e-6)
+
+
+@given(st.integers(1, 6), st.integers(1, 4), st.booleans(), st.booleans())
+@settings(max_examples=50, deadline=None)
+def test_fourier_library(n_features, max_freq, include_sin, include_cos):
+    library = FourierLibrary(n_features, max_freq=max_freq, include_sin=include_sin, include_cos=include_cos)
+    X = torch.randn(20, n_features)
+    output = library.evaluate(X)
+    assert output.shape == (20, library.shape[0])
+    assert torch.allclose(output, reference(library, X), atol=1e-6)
+
+
+def test_function_library():
+    library = FunctionLibrary([lambda X: X[:, 0] * X[:, 1], lambda X: torch.exp(X[:, 1]), lambda X: 2.],
+                              n_features=2)
+    X = torch.randn(10, 2, dtype=torch.float64)
+    output = library.evaluate(X)
+    assert output.dtype == torch.get_default_dtype()
+    assert torch.allclose(output, reference(library, X))
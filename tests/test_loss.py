@@ -1,4 +1,6 @@
+import math
 import numpy as np
+import pytest
 import torch
 
 from neuromancer.constraint import variable
@@ -115,3 +117,41 @@ def test_mul(multiplier, p, x, y, aggLoss, problems, weight):
     assert torch.isclose(multiplier * output["penalty_loss"], weighted_output["penalty_loss"])
     assert torch.isclose(multiplier * output["loss"], weighted_output["loss"])
 
+
+
+@pytest.mark.parametrize('aggLoss', agg_losses)
+@pytest.mark.parametrize('problem', problems)
+def test_grouped_constraints(aggLoss, problem):
+    """
+    Constraints evaluated on stacked operands should match evaluating every constraint separately
+    """
+    torch.manual_seed(0)
+    datapoints = {"p": torch.rand(5, 2), "x": torch.rand(5, 2), "y": torch.rand(5, 2), "name": "test"}
+    loss = problem(aggLoss, 10.)
+    loss.constraints.append(variable("x") == 2.)
+    loss.constraints.append(2 * variable("y") == variable("x"))
+    output = loss(datapoints)
+    for c in loss.constraints:
+        expected = c(datapoints)
+        for k in c.output_keys:
+            assert torch.allclose(output[k], expected[k])
+    eq_flags = torch.cat([torch.full((math.prod(c(datapoints)[c.output_keys[1]].shape[1:]),),
+                                     str(c.comparator) == 'eq') for c in loss.constraints])
+    assert torch.equal(output['C_eq_values'], output['C_values'][:, eq_flags])
+    assert torch.equal(output['C_ineq_violations'], output['C_violations'][:, ~eq_flags])
+    assert torch.allclose(output['penalty_loss'], loss.calculate_constraints(datapoints)['penalty_loss'])
+
+
+@pytest.mark.parametrize('aggLoss', agg_losses)
+def test_constraint_layout_replaced_constraints(aggLoss):
+    """
+    Replacing constraints by constraints of the same sizes with other comparators should update the eq/ineq layout
+    """
+    datapoints = {"x": torch.rand(5, 2), "y": torch.rand(5, 2), "name": "test"}
+    loss = aggLoss([], [variable("x") == 1., variable("y") <= 1.])
+    output = loss(datapoints)
+    assert torch.equal(output['C_eq_values'], output['C_values'][:, :2])
+    loss.constraints = torch.nn.ModuleList([variable("x") <= 1., variable("y") == 1.])
+    output = loss(datapoints)
+    assert torch.equal(output['C_eq_values'], output['C_values'][:, 2:])
+    assert torch.equal(output['C_ineq_values'], output['C_values'][:, :2])
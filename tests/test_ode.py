@@ -1,5 +1,6 @@
 import torch
 from neuromancer.dynamics import ode, physics
+from neuromancer.dynamics.library import PolynomialLibrary
 from hypothesis import given, settings, strategies as st
 import random
 from neuromancer.modules.blocks import MLP
@@ -79,4 +80,97 @@ def test_random_network(nAgents, nCouplings, nu, batchsize, bias, system):
     x = torch.randn([batchsize, insize])
     y = ode(x)
 
-    assert y.shape[0] == batchsize and y.shape[1] == nAgents
\ No newline at end of file
+    assert y.shape[0] == batchsize and y.shape[1] == nAgents
+
+def reference_network_rhs(ode, x):
+    """
+    Agent by agent and pin by pin evaluation of GeneralNetworkedODE with additive inductive bias.
+    """
+    intrinsic = torch.cat([agent(x[:, list(agent_dict.values())]) for agent, agent_dict in zip(ode.agents, ode.map)], -1)
+    coupling = torch.zeros_like(x)
+    for physics in ode.couplings:
+        for pin in physics.pins:
+            send, receive = ode.map[pin[0]][physics.feature_name], ode.map[pin[1]][physics.feature_name]
+            contribution = physics(x[:, [send, receive]])
+            coupling[:, [send]] += contribution
+            if physics.symmetric:
+                coupling[:, [receive]] -= contribution
+    return (intrinsic + coupling)[:, :ode.outsize]
+
+
+def input_grad(y, x):
+    # source and sink agents without couplings give outputs independent of x
+    if not y.requires_grad:
+        return torch.zeros_like(x)
+    return torch.autograd.grad(y.sum(), x, allow_unused=True, materialize_grads=True)[0]
+
+
+@given(st.integers(1, 30),
+       st.integers(0, 60),
+       st.integers(1, 20),
+       st.randoms(use_true_random=False))
+@settings(max_examples=50, deadline=None)
+def test_network_matches_reference(nAgents, nPins, batchsize, rng):
+    torch.manual_seed(rng.randint(0, 2 ** 16))
+    agents = [rng.choice(agent_list)(state_names=["T"]) for _ in range(nAgents)]
+    for agent in agents:
+        if isinstance(agent, physics.RCNode):
+            agent.C, agent.scaling = torch.nn.Parameter(torch.rand(1)), rng.random()
+    couplings = [cls(feature_name="T", symmetric=rng.random() < 0.5,
+                     pins=[[rng.randrange(nAgents), rng.randrange(nAgents)] for _ in range(rng.randint(0, nPins))])
+                 for cls in coupling_list]
+    model = ode.GeneralNetworkedODE(map=physics.map_from_agents(agents), agents=agents, couplings=couplings,
+                                    insize=nAgents, outsize=nAgents)
+    x = torch.randn([batchsize, nAgents], requires_grad=True)
+    y, reference = model(x), reference_network_rhs(model, x)
+    assert torch.allclose(y, reference, atol=1e-6)
+    assert torch.allclose(input_grad(y, x), input_grad(reference, x), atol=1e-6)
+
+
+def test_network_index_buffers():
+    agents = [physics.RCNode(state_names=["T"]), physics.SourceSink(state_names=["T"]),
+              physics.RCNode(state_names=["T"])]
+    couplings = [physics.DeltaTemp(feature_name="T", symmetric=True, pins=[[0, 1], [1, 2]])]
+    model = ode.GeneralNetworkedODE(map=physics.map_from_agents(agents), agents=agents, couplings=couplings,
+                                    insize=3, outsize=3)
+    state = model.state_dict()
+    buffers = dict(model.named_buffers())
+    assert buffers and not any(name in state for name in buffers)
+    # recompiling after changing pins replaces the index buffers
+    couplings[0].pins = [[0, 2]]
+    model.compile_network()
+    assert model._pin_index.tolist() == [0, 2]
+    model = model.double()
+    assert all(b.dtype == torch.long for b in model.buffers())
+    x = torch.randn(4, 3, dtype=torch.float64)
+    assert torch.allclose(model(x), reference_network_rhs(model, x))
+
+
+def test_sindy_fit():
+    torch.manual_seed(0)
+    library = PolynomialLibrary(2, max_degree=3)
+    # damped Duffing oscillator: dx0 = x1, dx1 = -0.1 x1 - x0 - 0.5 x0^3
+    true_coef = torch.zeros(library.shape)
+    names = str(library).split(', ')
+    true_coef[names.index('x1'), 0] = 1.
+    true_coef[names.index('x1'), 1] = -0.1
+    true_coef[names.index('x0'), 1] = -1.
+    true_coef[names.index('x0^3'), 1] = -0.5
+
+    def rhs(x):
+        return library.evaluate(x) @ true_coef
+
+    # trajectories from several initial conditions with a fine rk4 step
+    dt, x = 0.01, [torch.rand(8, 2) * 4 - 2]
+    for _ in range(300):
+        k1 = rhs(x[-1]); k2 = rhs(x[-1] + dt / 2 * k1); k3 = rhs(x[-1] + dt / 2 * k2); k4 = rhs(x[-1] + dt * k3)
+        x.append(x[-1] + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4))
+    x = torch.stack(x, dim=1)
+
+    model = ode.SINDy(library, threshold=0.05)
+    model.fit(x, dx=rhs(x.reshape(-1, 2)).reshape(x.shape))
+    assert torch.allclose(model.coef, true_coef, atol=1e-4)
+    model = ode.SINDy(library, threshold=0.05).fit(x, t=dt)
+    assert torch.equal(model.coef != 0, true_coef != 0)
+    assert torch.allclose(model.coef, true_coef, atol=1e-2)
+    assert torch.allclose(model(x[:, 0]), rhs(x[:, 0]), atol=1e-2)
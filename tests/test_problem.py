@@ -274,3 +274,49 @@ def test_check_unique_names():
 
 
 
+
+
+@pytest.mark.parametrize('backend', [None, 'trace'])
+def test_problem_compiled_plan(backend):
+    """
+    Pytest testing function to check that the compiled execution plan of Problem.step and Problem.forward
+    gives the same outputs as merging data dictionaries node by node
+    """
+    objectives, constraints, components, loss, edges = example_1()
+    nodes = components + [Node(lambda x, p: (x * p, x - p), ['x', 'p'], ['y', 'z'], name='post'),
+                          System([Node(lambda y: 0.5 * y, ['y'], ['y'], name='decay')], name='rollout', nsteps=1)]
+    problem = Problem(nodes, loss)
+    test_data = next(iter(get_test_dataloader_example_1()))
+    test_data['y'] = torch.rand(2, 1, 2)
+    expected_output = step(test_data, problem)
+    expected_loss = problem(test_data)
+
+    problem.compile_plan(backend=backend)
+    actual_output = problem.step(test_data)
+    actual_loss = problem(test_data)
+    assert list(expected_output) == list(actual_output)
+    assert dict_equals(expected_output, actual_output)
+    assert torch.allclose(expected_loss['train_loss'], actual_loss['train_loss'])
+    assert actual_loss['train_loss'].requires_grad
+    assert len(problem.plans) == 1
+
+
+def test_problem_compiled_plan_missing_key():
+    objectives, constraints, components, loss, edges = example_1()
+    problem = Problem(components, loss).compile_plan()
+    with pytest.raises(KeyError):
+        problem.step({'a': torch.rand(2, 1), 'name': 'train'})
+
+
+def test_problem_compiled_plan_undeclared_output():
+    class ExtraNode(Node):
+        def forward(self, data):
+            return {'y': data['x'], 'extra': data['x']}
+
+    objectives, constraints, components, loss, edges = example_1()
+    problem = Problem(components + [ExtraNode(lambda x: x, ['x'], ['y'], name='extra_node')], loss)
+    test_data = next(iter(get_test_dataloader_example_1()))
+    assert 'extra' in problem.step(test_data)
+    problem.compile_plan()
+    with pytest.raises(ValueError, match='extra_node'):
+        problem.step(test_data)
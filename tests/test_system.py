@@ -4,6 +4,9 @@ import torch.nn as nn
 import pydot
 import itertools
 from neuromancer.system import Node, System, MovingHorizon
+from neuromancer.dynamics.integrators import RK4
+from neuromancer.dynamics.interpolation import LinInterp_Horizon
+from neuromancer.modules.blocks import MLP
 from collections import defaultdict
 
 
@@ -489,6 +492,40 @@ def test_forward_on_valid_node_lists(get_nodes_and_edges, get_nstep_batch):
     assert dict_equals(test_result_dict, expected_result_dict)
 
 
+def test_forward_appends_to_initial_data():
+    """
+    Function to test that System's forward appends rollout outputs to initial data already
+    present for a key, and that node inputs read the appended steps, as with per-step cat
+    """
+    nsteps, batch = 5, 3
+    integrator = Node(lambda x, u: 0.9*x + u, ['x', 'u'], ['x'], name='integrator')
+    policy = Node(nn.Linear(2, 1), ['x'], ['u'], name='policy')
+    system = System(nodes=[policy, integrator], nsteps=nsteps)
+    input_data_dict = {'x': torch.rand(batch, 1, 2), 'u': torch.rand(batch, 2, 1)}
+    test_result_dict = system(input_data_dict)
+    expected_result_dict = generate_expected_output(node_list=[policy, integrator], nsteps=nsteps,
+                                                    init_data=input_data_dict)
+    assert dict_equals(test_result_dict, expected_result_dict)
+    assert test_result_dict['x'].shape == (batch, nsteps + 1, 2)
+    assert test_result_dict['u'].shape == (batch, nsteps + 2, 1)
+
+
+def test_forward_overridden_cat():
+    """
+    Function to test that System's forward feeds node outputs through an overridden cat
+    """
+    class ClampedSystem(System):
+        def cat(self, data3d, data2d):
+            return super().cat(data3d, {k: v.clamp(max=1.) for k, v in data2d.items()})
+
+    nsteps, batch = 5, 3
+    node = Node(lambda x: 2.*x, ['x'], ['x'], name='double')
+    input_data_dict = {'x': torch.rand(batch, 1, 2) + 0.5}
+    test_result_dict = ClampedSystem(nodes=[node], nsteps=nsteps)(input_data_dict)
+    assert test_result_dict['x'].shape == (batch, nsteps + 1, 2)
+    assert torch.equal(test_result_dict['x'][:, 1:], torch.ones(batch, nsteps, 2))
+
+
 def test_forward_on_invalid_node_lists(get_nodes_and_edges, get_nstep_batch):
     """
     Function to test System's forward on a variety of invalid graph types - that is, when the input node list
@@ -565,3 +602,72 @@ def test_graph_generation_invalid_node_lists(get_nodes_and_edges):
                 assert edges != expected_edges
 
 
+
+
+def test_forward_compiled_plan(get_nodes_and_edges, get_nstep_batch):
+    """
+    Function to test that System's compiled plan rollout equals the dictionary based rollout
+    """
+    node_list, expected_edges = get_nodes_and_edges
+    nstep, batch = get_nstep_batch
+    system = System(nodes=node_list, nsteps=nstep).compile_plan()
+    input_data_dict = generate_data_dict(node_list, expected_edges, nstep, batch)
+    test_result_dict = system(input_data_dict)
+    expected_result_dict = generate_expected_output(node_list=node_list, nsteps=nstep, init_data=input_data_dict)
+    assert dict_equals(test_result_dict, expected_result_dict)
+
+
+@pytest.mark.parametrize('nonauto', [False, True])
+@pytest.mark.parametrize('grad', [False, True])
+def test_forward_integrator_rollout(nonauto, grad):
+    """
+    Function to test that System delegates the rollout of a single integrator node to Integrator.rollout
+    and produces the same trajectories as stepping through the node
+    """
+    nx, nu, nsteps = 3, 2, 7
+    model = RK4(MLP(nx + nu * nonauto, nx, hsizes=[8]), h=0.1)
+    input_keys = ['x', 'u'] if nonauto else ['x']
+    system = System([Node(model, input_keys, ['x'], name='model')], nsteps=nsteps, delegate_rollout=True)
+    data = {'x': torch.randn(4, 1, nx), 'u': torch.randn(4, nsteps, nu)}
+    assert system.integrator_node(data, nsteps) is system.nodes[0]
+    with torch.set_grad_enabled(grad):
+        output = system(data)
+        expected = System([Node(model, input_keys, ['x'], name='model')], nsteps=nsteps).compile_plan()(data)
+    assert output['x'].shape == (4, nsteps + 1, nx)
+    assert dict_equals(output, expected)
+    # teacher forced initial states and short input sequences step through the node
+    assert system.integrator_node({'x': torch.randn(4, 3, nx), 'u': data['u']}, nsteps) is None
+    if nonauto:
+        assert system.integrator_node({'x': data['x'], 'u': data['u'][:, :-1]}, nsteps) is None
+
+
+def test_forward_integrator_interpolated_inputs():
+    """
+    Function to test that System rollouts of a single integrator node accept interpolated exogenous inputs
+    """
+    nx, nu, nsteps = 3, 2, 7
+    model = RK4(MLP(nx + nu, nx, hsizes=[8]), h=0.1)
+    system = System([Node(model, ['x', 'u'], ['x'], name='model')], nsteps=nsteps, delegate_rollout=True)
+    x, U = torch.randn(4, 1, nx), torch.randn(4, nsteps + 1, nu)
+    output = system({'x': x, 'u': LinInterp_Horizon(U, h=0.1)})
+    assert torch.equal(output['x'][:, 1:], model.rollout(x[:, 0], LinInterp_Horizon(U, h=0.1), nsteps))
+    assert system.integrator_node({'x': x, 'u': LinInterp_Horizon(U[:, :nsteps - 1], h=0.1)}, nsteps) is None
+    with pytest.raises(ValueError, match="'u'"):
+        system({'x': x, 'u': LinInterp_Horizon(U[:, :nsteps - 1], h=0.1)})
+    with pytest.raises(ValueError, match='delegate_rollout'):
+        System([Node(model, ['x', 'u'], ['x'], name='model')], nsteps=nsteps)({'x': x, 'u': LinInterp_Horizon(U, h=0.1)})
+
+
+def test_forward_integrator_rollout_opt_in():
+    """
+    Function to test that System steps through a single integrator node unless delegate_rollout is set
+    """
+    nx, nsteps = 3, 5
+    model = RK4(MLP(nx, nx, hsizes=[8]), h=0.1)
+    node = Node(model, ['x'], ['x'], name='model')
+    calls = []
+    node.register_forward_hook(lambda module, args, output: calls.append(1))
+    System([node], nsteps=nsteps)({'x': torch.randn(4, 1, nx)})
+    assert len(calls) == nsteps
+    System([node], nsteps=nsteps, delegate_rollout=True)({'x': torch.randn(4, 1, nx)})
+    assert len(calls) == nsteps
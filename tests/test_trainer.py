@@ -1,9 +1,10 @@
+import os
 import torch
 import torch.nn as nn
 import pytest
 import neuromancer.slim as slim
 from unittest import TestCase
-from neuromancer.trainer import Trainer, LitTrainer
+from neuromancer.trainer import Trainer, LitTrainer, BestModel
 from neuromancer.problem import Problem, LitProblem
 from neuromancer.constraint import variable
 from neuromancer.dataset import DictDataset, LitDataModule
@@ -296,4 +297,100 @@ def test_early_stopping(get_problem, get_data):
 
     assert base_trainer.current_epoch == 5 
     assert lit_trainer.current_epoch == 5
-"""
\ No newline at end of file
+"""
+
+@pytest.mark.parametrize('fast_step, compile_model, autocast_dtype', [(True, False, None),
+                                                                (True, False, torch.bfloat16),
+                                                                (False, True, None)])
+def test_fast_train_step(get_data, fast_step, compile_model, autocast_dtype):
+    problem = sample_problem()
+    train_data, dev_data, test_data, batch_size = get_data(nsim=512)
+    train_loader = torch.utils.data.DataLoader(train_data, batch_size=batch_size, num_workers=0,
+                                               collate_fn=train_data.collate_fn, shuffle=True)
+    dev_loader = torch.utils.data.DataLoader(dev_data, batch_size=batch_size, num_workers=0,
+                                             collate_fn=dev_data.collate_fn, shuffle=False)
+    test_loader = torch.utils.data.DataLoader(test_data, batch_size=batch_size, num_workers=0,
+                                              collate_fn=test_data.collate_fn, shuffle=False)
+    initial_weights = {k: v.clone() for k, v in problem.state_dict().items()}
+    trainer = Trainer(problem, train_loader, dev_loader, test_loader, patience=99999, epochs=2,
+                      fast_step=fast_step, compile_model=compile_model, autocast_dtype=autocast_dtype)
+    best_model = trainer.train()
+    assert trainer.current_epoch == 2
+    assert any(not torch.equal(initial_weights[k], best_model[k]) for k in initial_weights)
+    if fast_step:
+        assert trainer.optimizer.defaults['foreach']
+    output = trainer.test(best_model)
+    assert torch.isfinite(output['mean_dev_loss'])
+
+
+@pytest.mark.parametrize('spill', [False, True])
+def test_best_model_in_place(tmp_path, spill):
+    model = nn.Sequential(nn.Linear(3, 4), nn.BatchNorm1d(4))
+    best = BestModel(model, path=str(tmp_path) if spill else None)
+    snapshot = best.state_dict()
+    buffers = {k: v.data_ptr() for k, v in snapshot.items()}
+    initial = {k: v.clone() for k, v in model.state_dict().items()}
+    for k, v in model.state_dict().items():
+        assert torch.equal(snapshot[k], v)
+        assert snapshot[k].data_ptr() != v.data_ptr()
+
+    with torch.no_grad():
+        for p in model.parameters():
+            p.add_(1.)
+    for k in initial:
+        assert torch.equal(snapshot[k], initial[k])
+
+    best.update()
+    assert best.state_dict() is snapshot
+    for k, v in model.state_dict().items():
+        assert torch.equal(snapshot[k], v)
+        assert snapshot[k].data_ptr() == buffers[k]
+
+    best.save(tmp_path / 'best.pth')
+    loaded = torch.load(tmp_path / 'best.pth')
+    for k, v in model.state_dict().items():
+        assert torch.equal(loaded[k], v)
+
+
+def test_best_model_shared_directory(tmp_path):
+    models = [nn.Linear(3, 4), nn.Linear(5, 2)]
+    snapshots = [BestModel(model, path=str(tmp_path)) for model in models]
+    assert len(os.listdir(tmp_path)) == 2
+    with torch.no_grad():
+        for model in models:
+            for p in model.parameters():
+                p.add_(1.)
+    snapshots[1].update()
+    # snapshots in the same directory neither overwrite each other nor reuse files of another model size
+    for model, best, updated in zip(models, snapshots, [False, True]):
+        for k, v in model.state_dict().items():
+            assert torch.equal(best.state_dict()[k], v) == updated
+    del snapshots, best
+    assert os.listdir(tmp_path) == []
+
+
+def test_train_returns_independent_snapshots(get_data):
+    problem = sample_problem()
+    train_data, dev_data, test_data, batch_size = get_data(nsim=512)
+    loaders = [torch.utils.data.DataLoader(data, batch_size=batch_size, num_workers=0, collate_fn=data.collate_fn)
+               for data in [train_data, dev_data, test_data]]
+    trainer = Trainer(problem, *loaders, patience=99999, epochs=2)
+    first = trainer.train()
+    first_copy = {k: v.clone() for k, v in first.items()}
+    # later improvements of the tracked snapshot do not overwrite returned state dicts
+    with torch.no_grad():
+        for p in problem.parameters():
+            p.add_(1.)
+    trainer.best_devloss = float('inf')
+    second = trainer.train()
+    assert second is not first
+    for k in first_copy:
+        assert torch.equal(first[k], first_copy[k])
+    assert any(not torch.equal(first[k], second[k]) for k in first)
+
+
+def test_fast_step_optimizer_follows_parameters():
+    problem = sample_problem()
+    trainer = Trainer(problem, None, None, None, device='cuda', fast_step=True)
+    # the parameters are on the CPU, so the fused CUDA implementation must not be selected
+    assert trainer.optimizer.defaults['foreach'] and not trainer.optimizer.defaults['fused']